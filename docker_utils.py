@@ -1,18 +1,42 @@
 from kivy.uix.screenmanager import Screen
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
+from kivy.uix.togglebutton import ToggleButton
+from kivy.uix.checkbox import CheckBox
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
 from kivy.uix.spinner import Spinner
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.popup import Popup
+from kivy.uix.progressbar import ProgressBar
+from kivy.uix.widget import Widget
+from kivy.graphics import Color, Line
 from kivy.clock import Clock
+from kivy.utils import escape_markup, get_color_from_hex
 from kivy.uix.dropdown import DropDown
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 
 import os
+import io
+import re
+import fnmatch
+import json
+import hashlib
+import heapq
+import queue
+import stat
+import struct
+import tarfile
 import threading
 import time
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
 
 try:
     import docker
@@ -21,20 +45,3668 @@ except ImportError:
     docker = None
     DOCKER_AVAILABLE = False
 
-# Placeholder classes to split from main
-class DockerScreen(Screen):
-    def __init__(self, **kwargs):
-        super(DockerScreen, self).__init__(**kwargs)
+# Connection settings for the shared Docker client (overridable from the environment)
+DOCKER_TIMEOUT = int(os.environ.get("DOCKER_CLIENT_TIMEOUT", "60"))
+DOCKER_MAX_POOL_SIZE = int(os.environ.get("DOCKER_CLIENT_POOL_SIZE", "10"))
+DOCKER_CONNECT_RETRIES = int(os.environ.get("DOCKER_CLIENT_RETRIES", "3"))
+DOCKER_RETRY_DELAY = 0.5
+# Upper bound on daemon calls running concurrently in the background
+DOCKER_WORKERS = int(os.environ.get("DOCKER_CLIENT_WORKERS", "4"))
+
+
+class DockerEngine:
+    """Process-wide Docker client shared by every screen and background thread.
+
+    The client is created lazily on first use, so screens that are never opened
+    do not pay for the daemon handshake. docker-py keeps the HTTP connections in
+    its pool alive, so all callers reuse the same sockets. Blocking daemon calls
+    made on behalf of the UI run on a bounded worker pool (see submit()).
+    """
+
+    def __init__(
+        self,
+        timeout=DOCKER_TIMEOUT,
+        max_pool_size=DOCKER_MAX_POOL_SIZE,
+        retries=DOCKER_CONNECT_RETRIES,
+        workers=DOCKER_WORKERS,
+    ):
+        self.timeout = timeout
+        self.max_pool_size = max_pool_size
+        self.retries = max(1, retries)
+        self.last_error = None
+        self._client = None
+        self._connecting = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="docker-worker"
+        )
+
+    @property
+    def available(self):
+        """True once a client has been connected successfully"""
+        return self._client is not None
+
+    def get_client(self):
+        """Return the shared client, connecting on first use"""
+        client = self._client
+        if client is not None:
+            return client
+
+        with self._lock:
+            if self._client is None:
+                self._client = self._connect()
+            return self._client
+
+    def connect_async(self):
+        """Connect on the worker pool unless an attempt is already running"""
+        future = self._connecting
+        if future is None or future.done():
+            future = self._connecting = self._executor.submit(self.get_client)
+        return future
+
+    def _connect(self):
+        if not DOCKER_AVAILABLE:
+            raise RuntimeError("The Docker SDK for Python is not installed")
+
+        for attempt in range(self.retries):
+            try:
+                client = docker.from_env(
+                    timeout=self.timeout, max_pool_size=self.max_pool_size
+                )
+                client.ping()
+                self.last_error = None
+                return client
+            except Exception as e:
+                self.last_error = e
+                if attempt + 1 < self.retries:
+                    time.sleep(DOCKER_RETRY_DELAY * (attempt + 1))
+        raise self.last_error
+
+    def ping(self):
+        """Health check; drops the pooled client if the daemon stopped answering"""
+        try:
+            return bool(self.get_client().ping())
+        except Exception as e:
+            self.last_error = e
+            self.reset()
+            return False
+
+    def reset(self):
+        """Close the pooled connections so the next call reconnects"""
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def submit(self, fn, *args, on_success=None, on_error=None):
+        """Run fn(*args) on the worker pool.
+
+        The callbacks receive the result (or the exception) on the Kivy thread,
+        so they can touch widgets directly. Returns the Future.
+        """
+        future = self._executor.submit(fn, *args)
+
+        def done(f):
+            try:
+                result = f.result()
+            except Exception as e:
+                if on_error is not None:
+                    Clock.schedule_once(lambda dt, error=e: on_error(error), 0)
+                return
+            if on_success is not None:
+                Clock.schedule_once(lambda dt: on_success(result), 0)
+
+        future.add_done_callback(done)
+        return future
+
+    def shutdown(self):
+        """Stop the worker pool and close the connections"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.reset()
+
+
+# Single engine instance used by the whole application
+docker_engine = DockerEngine()
+
+
+class DockerClientMixin:
+    """Gives a screen access to the shared Docker engine"""
+
+    @property
+    def docker_client(self):
+        return docker_engine.get_client()
+
+    @property
+    def docker_available(self):
+        return docker_engine.available
+
+    def _connect_docker(self):
+        """Error message while the shared engine is not connected, else None.
+
+        Never blocks the UI: without a client a connection attempt is started
+        on the worker pool, and the action can be retried once it succeeds.
+        """
+        if docker_engine.available:
+            return None
+        docker_engine.connect_async()
+        if docker_engine.last_error is not None:
+            return str(docker_engine.last_error)
+        return "still connecting, please try again in a moment"
+
+
+def parse_docker_timestamp(value):
+    """Convert an API timestamp (epoch int or RFC 3339 string) to epoch seconds"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r"^([^.Z+]+?)(\.\d+)?(Z|[+-]\d\d:\d\d)?$", value or "")
+    if not match:
+        return 0.0
+    main, fraction, zone = match.groups()
+    # Python only parses microseconds, Docker sends nanoseconds
+    fraction = (fraction or "")[:7]
+    zone = "+00:00" if zone in (None, "Z") else zone
+    try:
+        return datetime.fromisoformat(f"{main}{fraction}{zone}").timestamp()
+    except ValueError:
+        return 0.0
+
+
+def summarize_image(summary):
+    """Flatten a /images/json or /images/{id}/json entry into a model row"""
+    tags = [t for t in (summary.get("RepoTags") or []) if t != "<none>:<none>"]
+    return {
+        "id": summary["Id"],
+        "short_id": summary["Id"].replace("sha256:", "")[:12],
+        "tags": tags,
+        "created": parse_docker_timestamp(summary.get("Created")),
+        "size": summary.get("Size", 0),
+    }
+
+
+def describe_image(image_id, image_table, fallback=""):
+    """Human readable image name for an image ID, using the lookup table"""
+    image = image_table.get(image_id)
+    if image and image["tags"]:
+        return image["tags"][0]
+    if fallback and not fallback.startswith("sha256:"):
+        return fallback
+    return (image_id or fallback).replace("sha256:", "")[:12]
+
+
+def summarize_container(summary, image_table):
+    """Flatten a low-level /containers/json entry into a display row"""
+    names = summary.get("Names") or []
+    return {
+        "id": summary["Id"],
+        "short_id": summary["Id"][:12],
+        "name": names[0].lstrip("/") if names else summary["Id"][:12],
+        "image_id": summary.get("ImageID", ""),
+        "image_ref": summary.get("Image", ""),
+        "image": describe_image(
+            summary.get("ImageID", ""), image_table, summary.get("Image", "")
+        ),
+        "status": summary.get("State", ""),
+        "created": parse_docker_timestamp(summary.get("Created")),
+    }
+
+
+# Filters the daemon understands for /containers/json and /images/json
+CONTAINER_FILTER_KEYS = (
+    "ancestor", "before", "exited", "expose", "health", "label", "name",
+    "network", "publish", "since", "status", "volume",
+)
+IMAGE_FILTER_KEYS = ("before", "dangling", "label", "reference", "since")
+
+
+def parse_filter_text(text, allowed):
+    """Parse docker CLI style "key=value key=value" filters into an API filters dict"""
+    filters = {}
+    for token in text.split():
+        key, separator, value = token.partition("=")
+        key = key.lower()
+        if not separator or not value:
+            raise ValueError(f"Filters look like key=value, got '{token}'")
+        if key not in allowed:
+            raise ValueError(f"Unknown filter '{key}', use one of: {', '.join(allowed)}")
+        filters.setdefault(key, []).append(value)
+    return filters
+
+
+# Sort choice -> (key, newest/largest first) for the cached model rows
+CONTAINER_SORT_KEYS = {
+    "Sort: Name": (lambda c: c["name"].lower(), False),
+    "Sort: Newest": (lambda c: c["created"], True),
+    "Sort: Oldest": (lambda c: c["created"], False),
+    "Sort: Status": (lambda c: (c["status"], c["name"].lower()), False),
+}
+IMAGE_SORT_KEYS = {
+    # Untagged images sort after the tagged ones
+    "Sort: Name": (lambda i: (not i["tags"], i["tags"][0].lower() if i["tags"] else i["id"]), False),
+    "Sort: Newest": (lambda i: i["created"], True),
+    "Sort: Oldest": (lambda i: i["created"], False),
+    "Sort: Largest": (lambda i: i["size"], True),
+}
+
+
+def sort_rows(rows, choice, sort_keys):
+    key, reverse = sort_keys.get(choice, next(iter(sort_keys.values())))
+    return sorted(rows, key=key, reverse=reverse)
+
+
+# Container state implied by each lifecycle event
+CONTAINER_EVENT_STATES = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+}
+
+# Image events after which the image has to be re-inspected
+IMAGE_REFRESH_EVENTS = ("pull", "tag", "untag", "import", "load")
+
+
+class DockerState:
+    """In-memory model of containers and images kept current by /events.
+
+    A background thread loads one snapshot and then applies the daemon's
+    event stream as incremental updates, so screens never have to re-list
+    everything after an action. Listeners are called on the Kivy thread, and
+    bursts of events are coalesced into a single notification.
+    """
+
+    NOTIFY_DELAY = 0.1
+    RECONNECT_DELAY = 2
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.containers = {}
+        self.images = {}
+        self.loaded = False
+        self.last_error = None
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._notify_pending = False
+        # (kind, ID) pairs changed since the last notification, None after a
+        # reload; listeners read the batch they were called for from last_changes
+        self._changes = set()
+        self.last_changes = None
+        self._thread = None
+        self._events = None
+        self._stop = threading.Event()
+
+    # -- listeners ---------------------------------------------------------
+    def add_listener(self, callback):
+        """Register a callback invoked on the UI thread after every change"""
+        self._listeners.append(callback)
+
+    def _notify(self, kind=None, ids=()):
+        with self._lock:
+            if kind is None:
+                self._changes = None
+            elif self._changes is not None:
+                self._changes.update((kind, item_id) for item_id in ids)
+            if self._notify_pending:
+                return
+            self._notify_pending = True
+        Clock.schedule_once(self._dispatch, self.NOTIFY_DELAY)
+
+    def _dispatch(self, dt):
+        with self._lock:
+            self._notify_pending = False
+            self.last_changes, self._changes = self._changes, set()
+        for callback in list(self._listeners):
+            callback()
+
+    # -- lifecycle ---------------------------------------------------------
+    def start(self):
+        """Start the event subscriber if it is not running yet"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        events = self._events
+        if events is not None:
+            try:
+                events.close()
+            except Exception:
+                pass
+
+    def _watch(self):
+        while not self._stop.is_set():
+            try:
+                client = self.engine.get_client()
+                # Subscribe before taking the snapshot so nothing is missed
+                # between the two; replayed events are idempotent
+                self._events = client.events(decode=True)
+                self.load()
+                for event in self._events:
+                    if self._stop.is_set():
+                        break
+                    try:
+                        self.apply_event(event)
+                    except Exception as e:
+                        # A failed lookup must not tear down the subscription
+                        self.last_error = e
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.last_error = e
+                self._notify()
+            finally:
+                events, self._events = self._events, None
+                if events is not None:
+                    try:
+                        events.close()
+                    except Exception:
+                        pass
+            self._stop.wait(self.RECONNECT_DELAY)
+
+    # -- snapshot ----------------------------------------------------------
+    def load(self):
+        """Replace the model with a fresh snapshot from the daemon"""
+        client = self.engine.get_client()
+        images = self._list_images(client)
+        containers = {}
+        for summary in client.api.containers(all=True):
+            container = summarize_container(summary, images)
+            containers[container["id"]] = container
+
+        with self._lock:
+            self.images = images
+            self.containers = containers
+            self.loaded = True
+            self.last_error = None
+        self._notify()
+
+    def _list_images(self, client):
+        images = {}
+        for summary in client.api.images():
+            image = summarize_image(summary)
+            images[image["id"]] = image
+        return images
+
+    def reload(self):
+        """Reload the snapshot on the engine's worker pool"""
+
+        def on_error(error):
+            self.last_error = error
+            self._notify()
+
+        return self.engine.submit(self.load, on_error=on_error)
+
+    # -- incremental updates -----------------------------------------------
+    def apply_event(self, event):
+        """Apply one decoded /events message to the model"""
+        kind = event.get("Type")
+        action = (event.get("Action") or event.get("status") or "").split(":")[0]
+        actor = event.get("Actor") or {}
+        actor_id = actor.get("ID") or event.get("id")
+        if not actor_id:
+            return
+
+        if kind == "container":
+            self._apply_container_event(action, actor_id, actor.get("Attributes") or {})
+        elif kind == "image":
+            self._apply_image_event(action, actor_id)
+
+    def _apply_container_event(self, action, container_id, attributes):
+        if action == "destroy":
+            with self._lock:
+                changed = self.containers.pop(container_id, None) is not None
+            if changed:
+                self._notify("container", [container_id])
+            return
+
+        with self._lock:
+            container = self.containers.get(container_id)
+            if container is not None:
+                if action in CONTAINER_EVENT_STATES:
+                    container["status"] = CONTAINER_EVENT_STATES[action]
+                elif action == "rename" and attributes.get("name"):
+                    container["name"] = attributes["name"].lstrip("/")
+                else:
+                    return
+
+        if container is None and action in CONTAINER_EVENT_STATES:
+            self.refresh_container(container_id)
+        elif container is not None:
+            self._notify("container", [container_id])
+
+    def _apply_image_event(self, action, image_ref):
+        if action == "delete":
+            with self._lock:
+                changed = self.images.pop(image_ref, None) is not None
+            if changed:
+                self._relabel_containers()
+                self._notify("image", [image_ref])
+        elif action in IMAGE_REFRESH_EVENTS:
+            self.refresh_image(image_ref)
+
+    def refresh_container(self, container_id):
+        """Re-read a single container from the daemon"""
+        self.refresh_containers([container_id])
+
+    def refresh_containers(self, container_ids):
+        """Re-read some containers with one filtered list call"""
+        container_ids = list(container_ids)
+        if not container_ids:
+            return
+        client = self.engine.get_client()
+        summaries = client.api.containers(all=True, filters={"id": container_ids})
+        with self._lock:
+            found = set()
+            for summary in summaries:
+                container = summarize_container(summary, self.images)
+                self.containers[container["id"]] = container
+                found.add(container["id"])
+            for container_id in container_ids:
+                if container_id not in found:
+                    self.containers.pop(container_id, None)
+        self._notify("container", container_ids)
+
+    def refresh_image(self, image_ref):
+        """Re-inspect a single image (by ID or reference) from the daemon"""
+        client = self.engine.get_client()
+        changed = [image_ref]
+        try:
+            image = summarize_image(client.api.inspect_image(image_ref))
+        except Exception:
+            # The image (or the tag) is gone
+            with self._lock:
+                self.images.pop(image_ref, None)
+        else:
+            with self._lock:
+                self.images[image["id"]] = image
+            changed.append(image["id"])
+        self._relabel_containers()
+        self._notify("image", changed)
+
+    def _relabel_containers(self):
+        with self._lock:
+            for container in self.containers.values():
+                container["image"] = describe_image(
+                    container["image_id"], self.images, container["image_ref"]
+                )
+
+    # -- queries -----------------------------------------------------------
+    def list_containers(self, all=True):
+        with self._lock:
+            containers = [dict(c) for c in self.containers.values()]
+        if not all:
+            containers = [c for c in containers if c["status"] == "running"]
+        return containers
+
+    def list_images(self):
+        with self._lock:
+            return [dict(i, tags=list(i["tags"])) for i in self.images.values()]
+
+    def get_container(self, container_id):
+        with self._lock:
+            container = self.containers.get(container_id)
+            return dict(container) if container is not None else None
 
-        # Initialize Docker client
+    def get_image(self, image_id):
+        with self._lock:
+            image = self.images.get(image_id)
+            return dict(image, tags=list(image["tags"])) if image is not None else None
+
+    def image_name(self, image_id, fallback=""):
+        with self._lock:
+            return describe_image(image_id, self.images, fallback)
+
+
+# Shared model of the daemon's containers and images
+docker_state = DockerState(docker_engine)
+
+
+def query_containers(client, filters, limit=None):
+    """Rows of the containers the daemon matches against the filters"""
+    images = dict((image["id"], image) for image in docker_state.list_images())
+    summaries = client.api.containers(all=True, filters=filters, limit=limit or -1)
+    return [summarize_container(summary, images) for summary in summaries]
+
+
+def query_images(client, filters, limit=None):
+    """Rows of the images the daemon matches against the filters, newest first"""
+    summaries = client.api.images(filters=filters)
+    # /images/json has no limit parameter, so cut the newest N here
+    summaries = sorted(summaries, key=lambda s: s.get("Created") or 0, reverse=True)
+    if limit is not None:
+        summaries = summaries[:limit]
+    return [summarize_image(summary) for summary in summaries]
+
+
+def _filter_pattern_matches(pattern, text):
+    try:
+        return re.search(pattern, text) is not None
+    except re.error:
+        return True
+
+
+def container_may_match(container, filters):
+    """False only if a filter the model can check rules the container out"""
+    for key, values in filters.items():
+        if key == "status" and container["status"] not in values:
+            return False
+        if key == "name" and not any(
+            _filter_pattern_matches(value, container["name"]) for value in values
+        ):
+            return False
+    return True
+
+
+def image_may_match(image, filters):
+    """False only if a filter the model can check rules the image out"""
+    for key, values in filters.items():
+        if key == "dangling" and (values[-1].lower() in ("1", "true")) == bool(image["tags"]):
+            return False
+        if key == "reference" and not any(
+            fnmatch.fnmatch(tag, value) or fnmatch.fnmatch(tag.rsplit(":", 1)[0], value)
+            for tag in image["tags"]
+            for value in values
+        ):
+            return False
+    return True
+
+
+class DaemonFilter:
+    """One screen's daemon-side filter.
+
+    While a filter is set, the screen shows only the rows the daemon returned
+    for it instead of the shared model. The query is re-run when the model
+    reports a change to one of those rows, or to a row the filter may now
+    let in, so a limit still means the daemon's newest N.
+    """
+
+    def __init__(self, engine, query, kind, may_match, on_change):
+        self.engine = engine
+        self.query = query
+        self.kind = kind
+        self.may_match = may_match
+        self.on_change = on_change
+        self.filters = {}
+        self.limit = None
+        self.rows = None
+        self.error = None
+        self._running = False
+        self._dirty = False
+
+    @property
+    def active(self):
+        return bool(self.filters) or self.limit is not None
+
+    def set(self, filters, limit=None):
+        self.filters = filters
+        self.limit = limit
+        self.rows = None
+        self.error = None
+        if not self.active:
+            self.on_change()
+            return
+        self.refresh()
+
+    def affected(self, changes, lookup):
+        """Whether a batch of model changes can alter this filter's result.
+
+        `changes` is the model's set of (kind, ID) pairs, None after a full
+        reload; `lookup` returns the model row for an ID, or None.
+        """
+        if not self.active:
+            return False
+        if changes is None or self.rows is None:
+            return True
+        shown = set(row["id"] for row in self.rows)
+        for kind, item_id in changes:
+            if kind != self.kind:
+                continue
+            if item_id in shown:
+                return True
+            row = lookup(item_id)
+            if row is not None and self.may_match(row, self.filters):
+                return True
+        return False
+
+    def refresh(self):
+        """Re-run the query on the worker pool; overlapping calls are coalesced"""
+        if not self.active:
+            return
+        if self._running:
+            self._dirty = True
+            return
+        self._running = True
+        self._dirty = False
+        filters, limit = self.filters, self.limit
+
+        def run():
+            return self.query(self.engine.get_client(), filters, limit)
+
+        def on_success(rows):
+            self._running = False
+            if filters is self.filters and limit == self.limit:
+                self.rows = rows
+                self.error = None
+            self._done()
+
+        def on_error(error):
+            self._running = False
+            self.error = error
+            self._done()
+
+        self.engine.submit(run, on_success=on_success, on_error=on_error)
+
+    def _done(self):
+        # Filters changed or the model moved on while the query ran
+        if self._dirty:
+            self.refresh()
+        self.on_change()
+
+    def view(self, list_all):
+        """The rows to show: the daemon's matches, or list_all() when unfiltered"""
+        if not self.active:
+            return list_all()
+        return [dict(row) for row in self.rows or ()]
+
+
+def format_bytes(size):
+    """Human readable byte count"""
+    size = float(size or 0)
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def format_duration(seconds):
+    """Compact duration such as 4s, 2m05s or 1h03m"""
+    seconds = int(max(0, seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def split_image_reference(image_name):
+    """Split "repo[:tag|@digest]" into (repo, tag), defaulting to latest"""
+    repository, tag = docker.utils.parse_repository_tag(image_name)
+    return repository, tag or "latest"
+
+
+# How often pull progress is pushed to the UI, whatever the event rate
+PULL_UI_RATE = 4
+
+# Layer statuses after which the layer's bytes are all on disk
+LAYER_DOWNLOADED = ("Verifying Checksum", "Download complete", "Extracting", "Pull complete")
+
+
+class PullProgress:
+    """Aggregates the per-layer events of a streaming pull.
+
+    The pull thread feeds every decoded event to update(); the UI samples
+    snapshot() on a fixed timer, so chatty progress events never reach the
+    Clock queue individually.
+    """
+
+    # Weight of the newest sample in the throughput moving average
+    RATE_SMOOTHING = 0.3
+
+    def __init__(self):
+        self.layers = {}
+        self.status = ""
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._rate = 0.0
+        self._sample_bytes = 0
+        self._sample_time = self.started
+
+    def update(self, event):
+        """Apply one decoded /images/create event"""
+        if "error" in event:
+            raise RuntimeError(event["error"])
+
+        layer_id = event.get("id")
+        status = event.get("status", "")
+        detail = event.get("progressDetail") or {}
+        with self._lock:
+            if not layer_id or status.startswith(("Pulling from", "Digest:", "Status:")):
+                self.status = status
+                return
+
+            layer = self.layers.setdefault(
+                layer_id, {"current": 0, "total": 0, "done": False}
+            )
+            if status == "Downloading":
+                layer["total"] = detail.get("total", layer["total"])
+                layer["current"] = detail.get("current", layer["current"])
+            elif status in LAYER_DOWNLOADED:
+                layer["current"] = layer["total"]
+                layer["done"] = status == "Pull complete"
+            elif status == "Already exists":
+                layer["done"] = True
+
+    def snapshot(self):
+        """Totals, throughput and ETA at this instant"""
+        now = time.time()
+        with self._lock:
+            current = sum(layer["current"] for layer in self.layers.values())
+            total = sum(layer["total"] for layer in self.layers.values())
+            done = sum(1 for layer in self.layers.values() if layer["done"])
+            count = len(self.layers)
+            status = self.status
+
+            elapsed = now - self._sample_time
+            if elapsed > 0:
+                rate = (current - self._sample_bytes) / elapsed
+                self._rate += self.RATE_SMOOTHING * (rate - self._rate)
+                self._sample_bytes = current
+                self._sample_time = now
+            rate = max(0.0, self._rate)
+
+        return {
+            "current": current,
+            "total": total,
+            "fraction": current / total if total else 0.0,
+            "rate": rate,
+            "eta": (total - current) / rate if rate > 0 and total > current else None,
+            "layers_done": done,
+            "layers": count,
+            "elapsed": now - self.started,
+            "status": status,
+        }
+
+    def describe(self, snapshot=None):
+        """One-line summary for a status label"""
+        snapshot = snapshot or self.snapshot()
+        text = (
+            f"{format_bytes(snapshot['current'])} / {format_bytes(snapshot['total'])}"
+            f"  |  {format_bytes(snapshot['rate'])}/s"
+            f"  |  layers {snapshot['layers_done']}/{snapshot['layers']}"
+        )
+        if snapshot["eta"] is not None:
+            text += f"  |  ETA {format_duration(snapshot['eta'])}"
+        return text
+
+
+def stream_pull(client, image_name, progress):
+    """Pull an image through the streaming API, feeding progress events"""
+    repository, tag = split_image_reference(image_name)
+    for event in client.api.pull(repository, tag=tag, stream=True, decode=True):
+        progress.update(event)
+
+
+def track_pull_progress(progress, progress_bar, label):
+    """Refresh a progress bar and label from a PullProgress at PULL_UI_RATE.
+
+    Returns the Clock event; cancel it when the pull finishes.
+    """
+
+    def refresh(dt):
+        snapshot = progress.snapshot()
+        progress_bar.value = snapshot["fraction"] * 100
+        label.text = progress.describe(snapshot)
+
+    return Clock.schedule_interval(refresh, 1.0 / PULL_UI_RATE)
+
+
+# Lines of build output kept for display, and how often the display refreshes
+BUILD_LOG_LINES = 2000
+BUILD_UI_RATE = 4
+
+
+class BuildProgress:
+    """Collects streamed build output and times each Dockerfile step.
+
+    Output is kept in a bounded ring buffer so the TextInput showing it never
+    holds more than BUILD_LOG_LINES lines, however long the build log gets.
+    """
+
+    STEP_PATTERN = re.compile(r"^Step (\d+/\d+) : (.*)$")
+
+    def __init__(self, max_lines=BUILD_LOG_LINES):
+        self.lines = deque(maxlen=max_lines)
+        self.steps = []
+        self.image_id = None
+        self.started = time.time()
+        self.version = 0
+        self._partial = ""
+        self._lock = threading.Lock()
+
+    def update(self, event):
+        """Apply one decoded /build message"""
+        if "error" in event:
+            raise RuntimeError(event["error"].strip())
+
+        with self._lock:
+            if "stream" in event:
+                self._add_text(event["stream"])
+            elif "status" in event:
+                # Base image pulls triggered by FROM
+                status = event["status"]
+                if event.get("id"):
+                    status = f"{event['id']}: {status}"
+                self._add_line(status)
+            aux = event.get("aux") or {}
+            if "ID" in aux:
+                self.image_id = aux["ID"]
+            self.version += 1
+
+    def _add_text(self, text):
+        text = self._partial + text
+        *lines, self._partial = text.split("\n")
+        for line in lines:
+            self._add_line(line.rstrip("\r"))
+
+    def _add_line(self, line):
+        match = self.STEP_PATTERN.match(line)
+        if match:
+            now = time.time()
+            if self.steps:
+                self.steps[-1]["end"] = now
+            self.steps.append(
+                {"step": match.group(1), "instruction": match.group(2), "start": now, "end": None}
+            )
+        self.lines.append(line)
+
+    def add_note(self, text):
+        """Add client-side output (e.g. the context report) to the log"""
+        with self._lock:
+            for line in text.splitlines():
+                self._add_line(line)
+            self.version += 1
+
+    def finish(self):
+        """Close the last step once the stream has ended"""
+        with self._lock:
+            if self._partial:
+                self._add_line(self._partial)
+                self._partial = ""
+            if self.steps and self.steps[-1]["end"] is None:
+                self.steps[-1]["end"] = time.time()
+            self.version += 1
+
+    def text(self):
+        with self._lock:
+            return "\n".join(self.lines)
+
+    def step_report(self):
+        """Step timings, slowest first"""
+        with self._lock:
+            steps = [dict(step) for step in self.steps]
+        now = time.time()
+        steps.sort(key=lambda step: (step["end"] or now) - step["start"], reverse=True)
+        report = []
+        for step in steps:
+            duration = (step["end"] or now) - step["start"]
+            report.append(f"{duration:7.1f}s  Step {step['step']} : {step['instruction']}")
+        return "\n".join(report)
+
+
+# Packed build contexts kept on disk, and the tar streaming block size
+BUILD_CONTEXT_CACHE_ENTRIES = 5
+TAR_CHUNK_SIZE = 64 * 1024
+
+
+def read_dockerignore(root):
+    """Patterns from the context's .dockerignore, as the Docker CLI reads them"""
+    path = os.path.join(root, ".dockerignore")
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = [line.strip() for line in f.read().splitlines()]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+class BuildContext:
+    """A build directory packed the way the daemon will receive it.
+
+    scan() applies .dockerignore and measures what is left; stream() yields
+    the tar in chunks without materialising it. Each packed tar is also kept
+    in a small on-disk cache keyed by a fingerprint of every included path,
+    size, mode and mtime, so rebuilding an unchanged tree skips re-tarring.
+    """
+
+    def __init__(self, root, dockerfile="Dockerfile", cache_dir=None):
+        self.root = os.path.abspath(root)
+        self.dockerfile = dockerfile
+        self.cache_dir = cache_dir
+        self.entries = []
+        self.total_size = 0
+        self.file_count = 0
+        self.fingerprint = None
+        self.from_cache = False
+        self._tar = tarfile.TarFile(fileobj=io.BytesIO(), mode="w")
+
+    def scan(self):
+        """Apply .dockerignore and measure the remaining files"""
+        if not os.path.exists(os.path.join(self.root, self.dockerfile)):
+            raise FileNotFoundError(f"No {self.dockerfile} in {self.root}")
+
+        patterns = read_dockerignore(self.root)
+        paths = docker.utils.exclude_paths(
+            self.root, patterns, dockerfile=self.dockerfile
+        )
+        digest = hashlib.sha256()
+        self.entries = []
+        self.total_size = 0
+        self.file_count = 0
+        for path in sorted(paths):
+            st = os.lstat(os.path.join(self.root, path))
+            size = st.st_size if stat.S_ISREG(st.st_mode) else 0
+            if stat.S_ISDIR(st.st_mode):
+                path += os.sep
+            self.entries.append((path, size))
+            self.total_size += size
+            self.file_count += 1 if stat.S_ISREG(st.st_mode) else 0
+            digest.update(f"{path}\0{size}\0{st.st_mode}\0{st.st_mtime_ns}\n".encode())
+        self.fingerprint = digest.hexdigest()
+        return self
+
+    def largest(self, count=10):
+        """Biggest top-level files/directories in the context"""
+        sizes = {}
+        for path, size in self.entries:
+            parts = path.replace(os.sep, "/").split("/", 1)
+            name = parts[0] + ("/" if len(parts) > 1 else "")
+            sizes[name] = sizes.get(name, 0) + size
+        return sorted(sizes.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def report(self, count=10):
+        cached = " (packed copy cached)" if self.is_cached() else ""
+        lines = [
+            f"Build context: {format_bytes(self.total_size)} in {self.file_count} files{cached}",
+            "Largest contributors:",
+        ]
+        for name, size in self.largest(count):
+            lines.append(f"  {format_bytes(size):>10}  {name}")
+        return "\n".join(lines)
+
+    def is_cached(self):
+        cache_path = self._cache_path()
+        return cache_path is not None and os.path.exists(cache_path)
+
+    def _cache_path(self):
+        if not self.cache_dir or not self.fingerprint:
+            return None
+        return os.path.join(self.cache_dir, f"{self.fingerprint}.tar")
+
+    def stream(self):
+        """Yield the context tar in chunks, from the cache when possible"""
+        cache_path = self._cache_path()
+        if self.is_cached():
+            self.from_cache = True
+            os.utime(cache_path)
+            with open(cache_path, "rb") as f:
+                while True:
+                    chunk = f.read(TAR_CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+
+        cache_file = None
+        if cache_path:
+            # Unique name, so two builds of the same tree cannot clash
+            part_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.part"
+            try:
+                cache_file = open(part_path, "wb")
+            except Exception as e:
+                print(f"Build context cache disabled: {str(e)}")
+
+        complete = False
+        try:
+            for chunk in self._tar_chunks():
+                if cache_file is not None:
+                    cache_file.write(chunk)
+                yield chunk
+            complete = True
+        finally:
+            if cache_file is not None:
+                cache_file.close()
+                if complete:
+                    os.replace(part_path, cache_path)
+                    self._prune_cache()
+                else:
+                    os.remove(part_path)
+
+    def _tar_chunks(self):
+        for path, size in self.entries:
+            path = path.rstrip(os.sep)
+            full_path = os.path.join(self.root, path)
+            info = self._tar.gettarinfo(full_path, arcname=path.replace(os.sep, "/"))
+            if os.name == "nt":
+                # Same normalisation as docker-py: no permission bits on Windows
+                info.mode = info.mode & 0o755 | 0o111
+            if not info.isfile():
+                yield info.tobuf(tarfile.DEFAULT_FORMAT, "utf-8", "surrogateescape")
+                continue
+
+            yield info.tobuf(tarfile.DEFAULT_FORMAT, "utf-8", "surrogateescape")
+            remaining = info.size
+            with open(full_path, "rb") as f:
+                while remaining > 0:
+                    chunk = f.read(min(TAR_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        # File shrank while packing: pad to the announced size
+                        chunk = b"\0" * min(TAR_CHUNK_SIZE, remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+            padding = -info.size % tarfile.BLOCKSIZE
+            if padding:
+                yield b"\0" * padding
+
+        # End-of-archive marker
+        yield b"\0" * (tarfile.BLOCKSIZE * 2)
+
+    def _prune_cache(self):
+        try:
+            cached = [
+                os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir)
+                if name.endswith(".tar")
+            ]
+            cached.sort(key=os.path.getmtime, reverse=True)
+            for path in cached[BUILD_CONTEXT_CACHE_ENTRIES:]:
+                os.remove(path)
+        except Exception as e:
+            print(f"Error pruning build context cache: {str(e)}")
+
+
+def get_build_context_cache():
+    data_dir = get_app_data_directory()
+    if not data_dir:
+        return None
+    cache_dir = os.path.join(data_dir, "build-contexts")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def stream_build(client, progress, **build_args):
+    """Run a build through the streaming API, feeding output to progress"""
+    try:
+        for event in client.api.build(decode=True, **build_args):
+            progress.update(event)
+    finally:
+        progress.finish()
+    return progress.image_id
+
+
+def track_build_output(progress, output_text, rate=BUILD_UI_RATE):
+    """Mirror the build ring buffer into a TextInput at a fixed rate.
+
+    Returns the Clock event; cancel it when the build finishes.
+    """
+    shown = {"version": -1}
+
+    def refresh(dt):
+        if progress.version != shown["version"]:
+            shown["version"] = progress.version
+            output_text.text = progress.text()
+            output_text.cursor = output_text.get_cursor_from_index(len(output_text.text))
+
+    return Clock.schedule_interval(refresh, 1.0 / rate)
+
+
+# Parallel builds when a plan does not say otherwise
+BUILD_PLAN_WORKERS = 4
+
+
+class PlanBuild:
+    """One image of a build plan"""
+
+    def __init__(self, tag, context, depends_on=()):
+        self.tag = tag
+        self.context = context
+        self.depends_on = list(depends_on)
+        self.status = "pending"
+        self.message = ""
+        self.image_id = None
+        self.started = None
+        self.finished = None
+        self.progress = BuildProgress(max_lines=200)
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class BuildPlan:
+    """Builds many images in dependency order with bounded parallelism.
+
+    A plan is a JSON file: {"workers": 4, "builds": [{"tag": "acme/api:latest",
+    "context": "api", "depends_on": ["acme/base:latest"]}, ...]}. Contexts are
+    relative to the plan file. Dependencies on tags outside the plan are
+    treated as existing images. An image is reused instead of rebuilt when
+    its context and its parents' image IDs are unchanged since the last
+    successful build and the image is still present locally.
+    """
+
+    def __init__(self, builds, workers=BUILD_PLAN_WORKERS, state_path=None):
+        self.builds = {}
+        for build in builds:
+            if build.tag in self.builds:
+                raise ValueError(f"Duplicate tag in build plan: {build.tag}")
+            self.builds[build.tag] = build
+        self.workers = max(1, workers)
+        self.state_path = state_path
+        self.started = None
+        self.finished = None
+        self.order = self._topological_order()
+
+    @classmethod
+    def load(cls, path, state_path=None):
+        with open(path) as f:
+            plan = json.load(f)
+        if isinstance(plan, list):
+            plan = {"builds": plan}
+        base_dir = os.path.dirname(os.path.abspath(path))
+        builds = [
+            PlanBuild(
+                entry["tag"],
+                os.path.join(base_dir, entry.get("context", ".")),
+                entry.get("depends_on", []),
+            )
+            for entry in plan["builds"]
+        ]
+        return cls(builds, plan.get("workers", BUILD_PLAN_WORKERS), state_path)
+
+    def _topological_order(self):
+        """Kahn's algorithm over the dependencies inside the plan"""
+        remaining = {
+            tag: {dep for dep in build.depends_on if dep in self.builds}
+            for tag, build in self.builds.items()
+        }
+        order = []
+        ready = [tag for tag, deps in remaining.items() if not deps]
+        while ready:
+            tag = ready.pop(0)
+            order.append(tag)
+            for other, deps in remaining.items():
+                if tag in deps:
+                    deps.discard(tag)
+                    if not deps:
+                        ready.append(other)
+        if len(order) != len(self.builds):
+            cycle = sorted(set(self.builds) - set(order))
+            raise ValueError(f"Dependency cycle between: {', '.join(cycle)}")
+        return order
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
         try:
-            import docker
+            with open(self.state_path) as f:
+                return json.load(f)
+        except Exception:
+            return {}
 
-            self.docker_client = docker.from_env()
-            self.docker_available = True
+    def _save_state(self, state):
+        if not self.state_path:
+            return
+        try:
+            with open(self.state_path, "w") as f:
+                json.dump(state, f, indent=2)
         except Exception as e:
-            self.docker_client = None
-            self.docker_available = False
+            print(f"Error saving build plan state: {str(e)}")
+
+    def run(self, client):
+        """Run the whole plan; blocks until every build has finished"""
+        self.started = time.time()
+        state = self._load_state()
+        state_lock = threading.Lock()
+        pending = list(self.order)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                # Start every build whose parents are done
+                for tag in list(pending):
+                    build = self.builds[tag]
+                    parents = [self.builds[d] for d in build.depends_on if d in self.builds]
+                    if any(p.status in ("failed", "blocked") for p in parents):
+                        build.status = "blocked"
+                        build.message = "a dependency failed"
+                        pending.remove(tag)
+                    elif all(p.status in ("done", "up to date") for p in parents):
+                        pending.remove(tag)
+                        build.status = "queued"
+                        future = executor.submit(
+                            self._build, client, build, state, state_lock
+                        )
+                        running[future] = build
+
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.pop(future)
+
+        self.finished = time.time()
+        self._save_state(state)
+
+    def _build_key(self, client, build, context):
+        """Context fingerprint combined with the parents' current image IDs"""
+        digest = hashlib.sha256(context.fingerprint.encode())
+        for dep in sorted(build.depends_on):
+            parent = self.builds.get(dep)
+            if parent is not None:
+                parent_id = parent.image_id
+            else:
+                parent_id = client.api.inspect_image(dep)["Id"]
+            digest.update(f"{dep}={parent_id}".encode())
+        return digest.hexdigest()
+
+    def _build(self, client, build, state, state_lock):
+        build.started = time.time()
+        build.status = "scanning"
+        try:
+            context = BuildContext(build.context, cache_dir=get_build_context_cache())
+            context.scan()
+            key = self._build_key(client, build, context)
+
+            # Reuse the existing image when nothing it depends on changed
+            with state_lock:
+                previous = state.get(build.tag)
+            if previous and previous.get("key") == key:
+                try:
+                    image_id = client.api.inspect_image(build.tag)["Id"]
+                except Exception:
+                    image_id = None
+                if image_id == previous.get("image_id"):
+                    build.image_id = image_id
+                    build.status = "up to date"
+                    return
+
+            build.status = "building"
+            build.image_id = stream_build(
+                client,
+                build.progress,
+                fileobj=context.stream(),
+                custom_context=True,
+                tag=build.tag,
+                rm=True,
+            )
+            with state_lock:
+                state[build.tag] = {"key": key, "image_id": build.image_id}
+            build.status = "done"
+        except Exception as e:
+            build.status = "failed"
+            build.message = str(e)
+        finally:
+            build.finished = time.time()
+
+    def summary(self):
+        """Wall time of the plan against the sum of the individual builds"""
+        built = [b for b in self.builds.values() if b.status == "done"]
+        serial = sum(b.duration for b in built)
+        wall = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        counts = {}
+        for build in self.builds.values():
+            counts[build.status] = counts.get(build.status, 0) + 1
+        text = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+        text += f"  |  wall {format_duration(wall)} vs serial {format_duration(serial)}"
+        if wall > 0 and serial > 0:
+            text += f" ({serial / wall:.1f}x)"
+        return text
+
+
+def normalize_image_reference(image_name):
+    """Canonical "registry/namespace/repo:tag" form used to spot duplicates"""
+    repository, tag = split_image_reference(image_name.strip())
+    parts = repository.split("/")
+    if len(parts) == 1 or not ("." in parts[0] or ":" in parts[0] or parts[0] == "localhost"):
+        parts.insert(0, "docker.io")
+    if parts[0] in ("docker.io", "index.docker.io", "registry-1.docker.io"):
+        parts[0] = "docker.io"
+        if len(parts) == 2:
+            parts.insert(1, "library")
+    separator = "@" if tag.startswith("sha256:") else ":"
+    return "/".join(parts) + separator + tag
+
+
+def parse_image_list(text):
+    """Image references from pasted text or a file: one per line, or separated
+    by spaces/commas; blank lines and # comments are ignored"""
+    references = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        references.extend(ref for ref in re.split(r"[\s,]+", line) if ref)
+    return references
+
+
+# Number of images pulled at the same time by the pull queue
+PULL_CONCURRENCY = int(os.environ.get("DOCKER_PULL_CONCURRENCY", "3"))
+# Finished pulls kept for the queue view
+PULL_HISTORY = 50
+
+
+class PullJob:
+    """One image reference in the pull queue"""
+
+    def __init__(self, reference, key):
+        self.reference = reference
+        self.key = key
+        self.status = "queued"
+        self.message = ""
+        self.digest = None
+        self.progress = PullProgress()
+        self.finished = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return not self.finished.is_set()
+
+    def add_done_callback(self, callback):
+        """Call callback(job) on the Kivy thread once the job has finished"""
+        with self._lock:
+            if not self.finished.is_set():
+                self._callbacks.append(callback)
+                return
+        Clock.schedule_once(lambda dt: callback(self), 0)
+
+    def _finish(self, status, message=""):
+        with self._lock:
+            self.status = status
+            self.message = message
+            self.finished.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            Clock.schedule_once(lambda dt, cb=callback: cb(self), 0)
+
+
+class PullManager:
+    """Process-wide pull queue with deduplication and bounded parallelism.
+
+    Identical references (after normalisation) share one job. References that
+    resolve to the same registry digest are only downloaded once; the others
+    give up their slot, wait on the owning job and are tagged locally once it
+    finishes.
+    """
+
+    def __init__(self, engine, concurrency=PULL_CONCURRENCY):
+        self.engine = engine
+        self.concurrency = max(1, concurrency)
+        self.jobs = []
+        self._running = 0
+        self._by_digest = {}
+        # Digest -> jobs waiting on the job that downloads it
+        self._waiters = {}
+        self._lock = threading.Lock()
+
+    def set_concurrency(self, concurrency):
+        with self._lock:
+            self.concurrency = max(1, concurrency)
+        self._dispatch()
+
+    def enqueue(self, references):
+        """Queue image references, returning one job per reference"""
+        jobs = []
+        with self._lock:
+            active = {job.key: job for job in self.jobs if job.active}
+            for reference in references:
+                try:
+                    key = normalize_image_reference(reference)
+                except Exception:
+                    key = reference
+                job = active.get(key)
+                if job is None:
+                    job = PullJob(reference, key)
+                    self.jobs.append(job)
+                    active[key] = job
+                jobs.append(job)
+        self._dispatch()
+        return jobs
+
+    def clear_finished(self):
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.active]
+
+    def _dispatch(self):
+        with self._lock:
+            while self._running < self.concurrency:
+                job = next((j for j in self.jobs if j.status == "queued"), None)
+                if job is None:
+                    break
+                job.status = "starting"
+                self._running += 1
+                threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _run(self, job):
+        waiters = []
+        try:
+            self._pull(job)
+        except Exception as e:
+            job._finish("failed", str(e))
+        finally:
+            with self._lock:
+                self._running -= 1
+                if job.digest and self._by_digest.get(job.digest) is job:
+                    del self._by_digest[job.digest]
+                    waiters = self._waiters.pop(job.digest, [])
+                self._prune()
+            self._dispatch()
+        for waiter in waiters:
+            self._follow_owner(waiter, job)
+
+    def _follow_owner(self, job, owner):
+        """Finish a job that waited for another job pulling the same digest"""
+        if owner.status != "done":
+            # The shared download failed; let this reference try on its own
+            with self._lock:
+                job.status = "queued"
+            self._dispatch()
+            return
+        repository, tag = split_image_reference(job.reference)
+        try:
+            if not tag.startswith("sha256:"):
+                self.engine.get_client().api.tag(owner.reference, repository, tag)
+            job._finish("done", f"shared digest with {owner.reference}")
+        except Exception as e:
+            job._finish("failed", str(e))
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond PULL_HISTORY"""
+        finished = [job for job in self.jobs if not job.active]
+        if len(finished) > PULL_HISTORY:
+            dropped = set(map(id, finished[: len(finished) - PULL_HISTORY]))
+            self.jobs = [job for job in self.jobs if id(job) not in dropped]
+
+    def _pull(self, job):
+        client = self.engine.get_client()
+        repository, tag = split_image_reference(job.reference)
+
+        # Resolve the digest so tags that point at the same image share a download
+        job.status = "resolving"
+        if tag.startswith("sha256:"):
+            job.digest = tag
+        else:
+            try:
+                distribution = client.api.inspect_distribution(job.reference)
+                job.digest = distribution["Descriptor"]["digest"]
+            except Exception:
+                job.digest = None
+
+        if job.digest:
+            with self._lock:
+                owner = self._by_digest.setdefault(job.digest, job)
+                if owner is not job:
+                    # Hand the slot back; the owner's thread finishes this job
+                    job.status = f"waiting for {owner.reference}"
+                    self._waiters.setdefault(job.digest, []).append(job)
+                    return
+
+        job.status = "pulling"
+        stream_pull(client, job.reference, job.progress)
+        job._finish("done", job.progress.status)
+
+
+# Shared pull queue, so concurrent popups never race on the same image
+pull_manager = PullManager(docker_engine)
+
+
+APP_DATA_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cloud-manager")
+
+
+def get_app_data_directory():
+    """Directory for the application's caches and saved settings"""
+    data_dir = APP_DATA_DIRECTORY
+
+    # Create the directory if it doesn't exist
+    try:
+        os.makedirs(data_dir, exist_ok=True)
+    except Exception as e:
+        print(f"Error creating data directory: {str(e)}")
+        return None
+
+    return data_dir
+
+
+def app_data_path(name):
+    """Path inside the app data directory; nothing is created until it is written"""
+    return os.path.join(APP_DATA_DIRECTORY, name)
+
+
+# Docker Hub search autocomplete settings
+SEARCH_LIMIT = 5
+SEARCH_MIN_LENGTH = 3
+SEARCH_DEBOUNCE = 0.3
+SEARCH_MAX_IN_FLIGHT = 2
+SEARCH_CACHE_SIZE = 500
+SEARCH_CACHE_TTL = 24 * 3600
+
+
+class SearchCache:
+    """LRU cache of Docker Hub search results with a TTL, saved to disk.
+
+    Lookups are prefix aware: a query that extends a cached term is answered
+    from that term's results when the cached result set was complete (fewer
+    hits than the search limit), and otherwise gives provisional suggestions
+    while the real search runs.
+    """
+
+    def __init__(self, path, max_entries=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load(self):
+        """Read the saved entries; done on first use, not at import"""
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except Exception as e:
+            print(f"Ignoring unreadable search cache: {str(e)}")
+            return
+        now = time.time()
+        with self._lock:
+            for term, (stamp, results) in entries.items():
+                if now - stamp < self.ttl:
+                    self._entries[term] = (stamp, results)
+
+    def save(self):
+        if not self.path:
+            return
+        self.load()
+        with self._lock:
+            entries = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving search cache: {str(e)}")
+
+    def put(self, term, results):
+        self.load()
+        with self._lock:
+            self._entries[term.lower()] = (time.time(), list(results))
+            self._entries.move_to_end(term.lower())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fresh(self, term):
+        entry = self._entries.get(term)
+        if entry is None:
+            return None
+        if time.time() - entry[0] >= self.ttl:
+            del self._entries[term]
+            return None
+        self._entries.move_to_end(term)
+        return entry[1]
+
+    def lookup(self, term):
+        """Return (results, complete); results is None on a miss"""
+        self.load()
+        term = term.lower()
+        with self._lock:
+            results = self._fresh(term)
+            if results is not None:
+                return results, True
+
+            # Longest cached prefix of the query
+            for end in range(len(term) - 1, SEARCH_MIN_LENGTH - 1, -1):
+                results = self._fresh(term[:end])
+                if results is not None:
+                    matches = [r for r in results if term in r.lower()]
+                    return matches, len(results) < SEARCH_LIMIT
+        return None, False
+
+
+class HubSearch:
+    """Docker Hub search with a shared cache and a cap on in-flight requests"""
+
+    def __init__(self, engine, cache, max_in_flight=SEARCH_MAX_IN_FLIGHT):
+        self.engine = engine
+        self.cache = cache
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def search(self, term, on_results, on_error):
+        """Start a search on the worker pool; False if too many are running"""
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                return False
+            self._in_flight += 1
+
+        def run():
+            try:
+                hits = self.engine.get_client().images.search(term, limit=SEARCH_LIMIT)
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+            repos = [hit["name"] for hit in hits]
+            self.cache.put(term, repos)
+            self.cache.save()
+            return repos
+
+        self.engine.submit(run, on_success=on_results, on_error=on_error)
+        return True
+
+
+def _search_cache_path():
+    return app_data_path("hub_search_cache.json")
+
+
+# Shared Hub search used by the pull popup's autocomplete
+hub_search = HubSearch(docker_engine, SearchCache(_search_cache_path()))
+
+
+# Lines kept in memory per followed container; older lines fall off the front
+LOG_BUFFER_LINES = int(os.environ.get("DOCKER_LOG_BUFFER_LINES", "5000"))
+LOG_TAIL = 100
+LOG_UI_RATE = 4
+
+LOG_TIMESTAMP = re.compile(r"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)? ?")
+
+
+def split_log_timestamp(line):
+    """Split a timestamps=True log line into (epoch nanoseconds, text)"""
+    match = LOG_TIMESTAMP.match(line)
+    if not match:
+        return None, line
+    main, fraction, zone = match.groups()
+    zone = "+00:00" if zone in (None, "Z") else zone
+    try:
+        seconds = int(datetime.fromisoformat(f"{main}{zone}").timestamp())
+    except ValueError:
+        return None, line
+    # Keep full nanosecond precision, floats would blur neighbouring lines
+    nanos = int((fraction or "0")[:9].ljust(9, "0"))
+    return seconds * 1000000000 + nanos, line[match.end():]
+
+
+class LogFollower:
+    """Follows one container's log stream into a fixed-size ring buffer"""
+
+    def __init__(self, engine, container_id, max_lines=LOG_BUFFER_LINES, tail=LOG_TAIL):
+        self.engine = engine
+        self.container_id = container_id
+        self.tail = tail
+        self.lines = deque(maxlen=max_lines)
+        # Sequence number of the newest line, so readers can ask for the delta
+        self.appended = 0
+        # Timestamp of the newest line; the since= cursor for resuming
+        self.last_ns = 0
+        self.error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stream = None
+        self._thread = None
+
+    @property
+    def following(self):
+        """True while a run is going and has not been paused"""
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self):
+        """Start following, or resume from the last line seen"""
+        if self.following:
+            return
+        # Every run gets its own stop event, so a paused run that is still
+        # winding down cannot be revived or block the new one
+        self._stop.set()
+        self._stop = threading.Event()
+        self.error = None
+        self._thread = threading.Thread(target=self._follow, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def pause(self):
+        """Close the stream; start() picks up where it left off"""
+        self._stop.set()
+        stream = self._stream
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def drain(self, seen):
+        """Lines appended after sequence number `seen`, plus the new sequence number"""
+        with self._lock:
+            count = min(self.appended - seen, len(self.lines))
+            # Walk from the newest end so a small delta costs O(delta)
+            new_lines = [line for _, line in zip(range(count), reversed(self.lines))]
+            new_lines.reverse()
+            return new_lines, self.appended
+
+    def _follow(self, stop):
+        params = {"stream": True, "follow": True, "timestamps": True}
+        resume_ns = self.last_ns
+        if resume_ns:
+            # since= has one second resolution; the overlap is dropped below
+            params["since"] = resume_ns // 1000000000
+        else:
+            params["tail"] = self.tail
+
+        stream = None
+        try:
+            client = self.engine.get_client()
+            stream = self._stream = client.api.logs(self.container_id, **params)
+            if stop.is_set():
+                return
+            partial = b""
+            for chunk in stream:
+                if stop.is_set():
+                    break
+                # Frames do not necessarily end on a line boundary
+                partial += chunk
+                *complete, partial = partial.split(b"\n")
+                resume_ns = self._append(complete, resume_ns, stop)
+            if partial and not stop.is_set():
+                self._append([partial], resume_ns, stop)
+        except Exception as e:
+            if not stop.is_set():
+                self.error = str(e)
+        finally:
+            if self._stream is stream:
+                self._stream = None
+            if stream is not None:
+                try:
+                    stream.close()
+                except Exception:
+                    pass
+
+    def _append(self, raw_lines, resume_ns, stop):
+        """Parse complete lines, skipping ones already seen before a resume"""
+        entries = []
+        stamps = []
+        for raw in raw_lines:
+            nanos, text = split_log_timestamp(raw.decode("utf-8", errors="replace"))
+            if nanos is not None:
+                if resume_ns and nanos <= resume_ns:
+                    continue
+                resume_ns = 0
+            stamps.append(nanos)
+            entries.append((nanos or time.time_ns(), text.rstrip("\r")))
+        if entries:
+            stored = self._store(entries, stop)
+            # Only lines that were kept move the resume cursor, so a pause
+            # in the middle of a batch re-reads the rest on resume
+            for nanos in stamps[:stored]:
+                if nanos is not None:
+                    self.last_ns = nanos
+        return resume_ns
+
+    def _store(self, entries, stop):
+        """Keep parsed lines; returns how many of them were kept"""
+        with self._lock:
+            for _, text in entries:
+                self.lines.append(text)
+            self.appended += len(entries)
+        return len(entries)
+
+
+# Captured logs are rolled into a new segment every LOG_SEGMENT_LINES lines
+LOG_SEGMENT_LINES = 50000
+LOG_STORE_MAX_SEGMENTS = 40
+LOG_INDEX_CACHE = 8
+# Sealed indexes are split into shards so a query only reads the ones it needs
+LOG_INDEX_SHARDS = 64
+LOG_SEARCH_LIMIT = 500
+
+LOG_TOKEN = re.compile(r"\w+")
+LOG_OFFSET = struct.Struct("<Q")
+
+
+def log_query_terms(query):
+    """Split a search string into (token, open_start, open_end) index terms.
+
+    Tokens at the edges of the query may be cut-off parts of longer words in
+    the log line, so they are matched as suffix/prefix instead of exactly.
+    """
+    terms = []
+    for match in LOG_TOKEN.finditer(query):
+        terms.append(
+            (match.group().lower(), match.start() == 0, match.end() == len(query))
+        )
+    return terms
+
+
+def log_trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def log_index_shard(key):
+    return zlib.crc32(key.encode("utf-8")) % LOG_INDEX_SHARDS
+
+
+class LogSegment:
+    """One append-only log file with an inverted token index.
+
+    Each line of the file is "<epoch ns>\t<container>\t<text>". The index
+    maps every lowercased word to the line numbers it appears on, and every
+    trigram to the words containing it, so partial words are matched without
+    walking the whole vocabulary. The byte offset of every line is kept so
+    matches can be read with a seek.
+
+    A sealed segment keeps its offsets in a packed ".off" file and its index
+    in a ".idx" file made of a JSON header line followed by hashed shards;
+    shards are read the first time a query needs them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        base = os.path.splitext(path)[0]
+        self.index_path = base + ".idx"
+        self.offsets_path = base + ".off"
+        self.offsets = []
+        self.tokens = {}
+        self.trigrams = {}
+        # Newest timestamp per container, also the capture resume cursor
+        self.containers = {}
+        self.min_ns = None
+        self.max_ns = None
+        # Set once a sharded index is loaded; the in-memory maps stay empty then
+        self._shard_ranges = None
+        self._shard_base = 0
+        self._shards = {}
+        self._lines = 0
+
+    @property
+    def line_count(self):
+        return len(self.offsets) if self._shard_ranges is None else self._lines
+
+    def add(self, offset, nanos, container, text):
+        line = len(self.offsets)
+        self.offsets.append(offset)
+        for token in set(LOG_TOKEN.findall(text.lower())):
+            postings = self.tokens.get(token)
+            if postings is None:
+                postings = self.tokens[token] = []
+                for trigram in log_trigrams(token):
+                    self.trigrams.setdefault(trigram, []).append(token)
+            postings.append(line)
+        self.containers[container] = max(nanos, self.containers.get(container, 0))
+        self.min_ns = nanos if self.min_ns is None else min(self.min_ns, nanos)
+        self.max_ns = nanos if self.max_ns is None else max(self.max_ns, nanos)
+
+    def rebuild(self):
+        """Re-index the file, used for the active segment after a restart"""
+        offset = 0
+        with open(self.path, "rb") as f:
+            for raw in f:
+                fields = raw.decode("utf-8", errors="replace").rstrip("\n").split("\t", 2)
+                if len(fields) == 3 and fields[0].isdigit():
+                    self.add(offset, int(fields[0]), fields[1], fields[2])
+                offset += len(raw)
+
+    def seal(self):
+        """Write the offsets and index next to the log file; the segment is read-only after this"""
+        temp_path = f"{self.offsets_path}.{os.getpid()}.part"
+        with open(temp_path, "wb") as f:
+            f.write(struct.pack(f"<{len(self.offsets)}Q", *self.offsets))
+        os.replace(temp_path, self.offsets_path)
+
+        shards = [{"tokens": {}, "trigrams": {}} for _ in range(LOG_INDEX_SHARDS)]
+        for token, lines in self.tokens.items():
+            shards[log_index_shard(token)]["tokens"][token] = lines
+        for trigram, words in self.trigrams.items():
+            shards[log_index_shard(trigram)]["trigrams"][trigram] = words
+        blobs = [json.dumps(shard, separators=(",", ":")).encode("utf-8") for shard in shards]
+        ranges = []
+        position = 0
+        for blob in blobs:
+            ranges.append([position, len(blob)])
+            position += len(blob)
+        header = {"version": 2, "lines": len(self.offsets), "shards": ranges}
+
+        temp_path = f"{self.index_path}.{os.getpid()}.part"
+        with open(temp_path, "wb") as f:
+            f.write(json.dumps(header, separators=(",", ":")).encode("utf-8") + b"\n")
+            for blob in blobs:
+                f.write(blob)
+        os.replace(temp_path, self.index_path)
+
+    def load_index(self):
+        """Read the index header; shards are loaded lazily by the lookups"""
+        with open(self.index_path, "rb") as f:
+            first = f.readline()
+        index = json.loads(first)
+        if "version" not in index:
+            # Index written before sharding: one document with everything
+            self.offsets = index["offsets"]
+            self.tokens = index["tokens"]
+            for token in self.tokens:
+                for trigram in log_trigrams(token):
+                    self.trigrams.setdefault(trigram, []).append(token)
+            return
+        self._lines = index["lines"]
+        self._shard_base = len(first)
+        self._shard_ranges = index["shards"]
+
+    def _shard(self, key):
+        return self._load_shard(log_index_shard(key))
+
+    def _load_shard(self, number):
+        shard = self._shards.get(number)
+        if shard is None:
+            start, length = self._shard_ranges[number]
+            with open(self.index_path, "rb") as f:
+                f.seek(self._shard_base + start)
+                shard = json.loads(f.read(length))
+            self._shards[number] = shard
+        return shard
+
+    def _postings(self, word):
+        if self._shard_ranges is None:
+            return self.tokens.get(word, ())
+        return self._shard(word)["tokens"].get(word, ())
+
+    def _trigram_words(self, trigram):
+        if self._shard_ranges is None:
+            return self.trigrams.get(trigram, ())
+        return self._shard(trigram)["trigrams"].get(trigram, ())
+
+    def _partial_words(self, token):
+        """Words that may contain `token`, narrowed by its trigrams"""
+        if len(token) < 3:
+            # Too short for a trigram; walk the vocabulary
+            if self._shard_ranges is None:
+                return list(self.tokens)
+            words = []
+            for number in range(len(self._shard_ranges)):
+                words.extend(self._load_shard(number)["tokens"])
+            return words
+        words = None
+        for trigram in log_trigrams(token):
+            found = set(self._trigram_words(trigram))
+            words = found if words is None else words & found
+            if not words:
+                break
+        return words
+
+    def info(self):
+        return {
+            "name": os.path.basename(self.path),
+            "min_ns": self.min_ns,
+            "max_ns": self.max_ns,
+            "containers": self.containers,
+        }
+
+    def candidates(self, terms):
+        """Line numbers that contain every term, or None to scan everything"""
+        if not terms:
+            return None
+        result = None
+        for token, open_start, open_end in terms:
+            # The whole word always matches, whatever the open ends
+            lines = set(self._postings(token))
+            if open_start or open_end:
+                for word in self._partial_words(token):
+                    if word != token and (
+                        (open_start and open_end and token in word)
+                        or (open_start and not open_end and word.endswith(token))
+                        or (open_end and not open_start and word.startswith(token))
+                    ):
+                        lines.update(self._postings(word))
+            result = lines if result is None else result & lines
+            if not result:
+                break
+        return result
+
+    def read(self, line_numbers):
+        """Yield (ns, container, text) for the given line numbers"""
+        offsets = None if self._shard_ranges is None else open(self.offsets_path, "rb")
+        try:
+            with open(self.path, "rb") as f:
+                for line in sorted(line_numbers):
+                    if offsets is None:
+                        f.seek(self.offsets[line])
+                    else:
+                        offsets.seek(line * LOG_OFFSET.size)
+                        f.seek(LOG_OFFSET.unpack(offsets.read(LOG_OFFSET.size))[0])
+                    fields = f.readline().decode("utf-8", errors="replace").rstrip("\n").split("\t", 2)
+                    if len(fields) == 3:
+                        yield int(fields[0]), fields[1], fields[2]
+        finally:
+            if offsets is not None:
+                offsets.close()
+
+
+class LogStore:
+    """Append-only, segmented store of captured container logs.
+
+    Sealed segments are described in a small manifest (time range and
+    containers), so a search only opens the indexes of segments that can
+    match. Indexes are loaded on demand and kept in a small LRU.
+    """
+
+    def __init__(self, directory, segment_lines=LOG_SEGMENT_LINES,
+                 max_segments=LOG_STORE_MAX_SEGMENTS):
+        self.directory = directory
+        self.segment_lines = segment_lines
+        self.max_segments = max_segments
+        self.manifest = []
+        self.active = None
+        self._loaded = False
+        self._indexes = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, "segments.json")
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"segment-{number:06d}.log")
+
+    def _load(self):
+        if self._loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = []
+
+        # The active segment is the newest file that is not sealed yet
+        sealed = set(entry["name"] for entry in self.manifest)
+        numbers = [
+            int(name[8:14]) for name in os.listdir(self.directory)
+            if re.match(r"^segment-\d{6}\.log$", name)
+        ]
+        number = max(numbers) if numbers else 0
+        if number and os.path.basename(self._segment_path(number)) not in sealed:
+            self.active = LogSegment(self._segment_path(number))
+            self.active.rebuild()
+        else:
+            self.active = LogSegment(self._segment_path(number + 1))
+        self._loaded = True
+
+    def _save_manifest(self):
+        temp_path = f"{self.manifest_path}.{os.getpid()}.part"
+        with open(temp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(temp_path, self.manifest_path)
+
+    def _roll(self):
+        """Seal the active segment, start a new one and drop the oldest"""
+        self.active.seal()
+        self.manifest.append(self.active.info())
+        number = int(os.path.basename(self.active.path)[8:14]) + 1
+        self.active = LogSegment(self._segment_path(number))
+
+        while len(self.manifest) > self.max_segments:
+            oldest = self.manifest.pop(0)
+            path = os.path.join(self.directory, oldest["name"])
+            self._indexes.pop(oldest["name"], None)
+            base = os.path.splitext(path)[0]
+            for stale in (path, base + ".idx", base + ".off"):
+                try:
+                    os.remove(stale)
+                except OSError:
+                    pass
+        self._save_manifest()
+
+    def cursor(self, container):
+        """Timestamp of the newest stored line for a container, or 0"""
+        with self._lock:
+            self._load()
+            newest = self.active.containers.get(container, 0)
+            for entry in self.manifest:
+                newest = max(newest, entry["containers"].get(container, 0))
+            return newest
+
+    def containers(self):
+        with self._lock:
+            self._load()
+            names = set(self.active.containers)
+            for entry in self.manifest:
+                names.update(entry["containers"])
+            return sorted(names)
+
+    def append(self, container, entries):
+        """Store (ns, text) lines for a container"""
+        with self._lock:
+            self._load()
+            while entries:
+                room = self.segment_lines - len(self.active.offsets)
+                batch, entries = entries[:room], entries[room:]
+                with open(self.active.path, "ab") as f:
+                    for nanos, text in batch:
+                        offset = f.tell()
+                        text = text.replace("\t", "    ")
+                        f.write(f"{nanos}\t{container}\t{text}\n".encode("utf-8"))
+                        self.active.add(offset, nanos, container, text)
+                if len(self.active.offsets) >= self.segment_lines:
+                    self._roll()
+
+    def _sealed_segment(self, entry):
+        """Sealed segment with its index loaded, via the LRU"""
+        segment = self._indexes.get(entry["name"])
+        if segment is None:
+            segment = LogSegment(os.path.join(self.directory, entry["name"]))
+            segment.load_index()
+            self._indexes[entry["name"]] = segment
+            while len(self._indexes) > LOG_INDEX_CACHE:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(entry["name"])
+        return segment
+
+    def search(self, query, containers=None, since_ns=None, until_ns=None,
+               limit=LOG_SEARCH_LIMIT):
+        """Newest lines containing `query` (case-insensitive), plus scan stats"""
+        terms = log_query_terms(query)
+        needle = query.lower()
+
+        def wanted(info):
+            if info["min_ns"] is None:
+                return False
+            if since_ns is not None and info["max_ns"] < since_ns:
+                return False
+            if until_ns is not None and info["min_ns"] > until_ns:
+                return False
+            return not containers or any(c in info["containers"] for c in containers)
+
+        with self._lock:
+            self._load()
+            entries = list(self.manifest)
+            active = self.active
+            # Freeze the active segment's candidates while appends are blocked
+            active_lines = None
+            if wanted(active.info()):
+                active_lines = active.candidates(terms)
+                if active_lines is None:
+                    active_lines = range(active.line_count)
+                active_lines = list(active_lines)
+
+        scanned = 0
+        results = []
+        segments = [(active, active_lines)] if active_lines is not None else []
+        for entry in reversed(entries):
+            if wanted(entry):
+                segments.append((entry, None))
+
+        for source, lines in segments:
+            if len(results) >= limit:
+                break
+            if lines is None:
+                with self._lock:
+                    segment = self._sealed_segment(source)
+                lines = segment.candidates(terms)
+                if lines is None:
+                    lines = range(segment.line_count)
+            else:
+                segment = source
+            scanned += 1
+
+            for nanos, container, text in segment.read(lines):
+                if containers and container not in containers:
+                    continue
+                if since_ns is not None and nanos < since_ns:
+                    continue
+                if until_ns is not None and nanos > until_ns:
+                    continue
+                # The index only narrows candidates; confirm the actual substring
+                if needle in text.lower():
+                    results.append((nanos, container, text))
+
+        results.sort(reverse=True)
+        return results[:limit], {"segments": len(entries) + 1, "scanned": scanned}
+
+
+def get_log_store_directory():
+    return app_data_path("logs")
+
+
+class LogCapture(LogFollower):
+    """Copies one container's log stream into the log store"""
+
+    def __init__(self, engine, store, container_id, name):
+        super(LogCapture, self).__init__(engine, container_id, max_lines=1, tail="all")
+        self.store = store
+        self.name = name
+        # None: resume after the newest stored line, looked up by the reader
+        # thread since reading the store can mean loading a whole segment
+        self.last_ns = None
+        # Called from the reader thread when the stream ends by itself
+        self.on_end = None
+
+    def _follow(self, stop):
+        if self.last_ns is None:
+            self.last_ns = self.store.cursor(self.name)
+        super(LogCapture, self)._follow(stop)
+        if not stop.is_set() and self.on_end is not None:
+            self.on_end(self)
+
+    def _store(self, entries, stop):
+        self.store.append(self.name, entries)
+        with self._lock:
+            self.appended += len(entries)
+        return len(entries)
+
+
+# Seconds before re-checking a container whose capture stream ended
+LOG_CAPTURE_RETRY = 2.0
+
+
+class LogCaptureManager:
+    """Keeps log captures running for the containers the user selected"""
+
+    def __init__(self, engine, state, store):
+        self.engine = engine
+        self.state = state
+        self.store = store
+        self.captures = {}
+        state.add_listener(self._on_state_changed)
+
+    def is_captured(self, container_id):
+        return container_id in self.captures
+
+    def set_captured(self, container, captured):
+        capture = self.captures.pop(container["id"], None)
+        if capture is not None:
+            capture.pause()
+        if captured:
+            capture = LogCapture(self.engine, self.store, container["id"], container["name"])
+            capture.on_end = self._on_capture_ended
+            self.captures[container["id"]] = capture
+            capture.start()
+
+    def _on_capture_ended(self, capture):
+        # The container may already be running again, e.g. after a quick
+        # restart whose event arrived while the old stream was still open
+        Clock.schedule_once(lambda dt: self._on_state_changed(), LOG_CAPTURE_RETRY)
+
+    def _on_state_changed(self):
+        # A stopped container ends its stream; pick it up again once it runs
+        for container_id, capture in list(self.captures.items()):
+            container = self.state.get_container(container_id)
+            if container is None:
+                self.captures.pop(container_id).pause()
+            elif container["status"] == "running" and not capture.following:
+                capture.last_ns = None
+                capture.start()
+
+    def stop(self):
+        for capture in self.captures.values():
+            capture.pause()
+
+
+# Logs captured from selected containers, searchable from the containers screen
+log_store = LogStore(get_log_store_directory())
+log_capture = LogCaptureManager(docker_engine, docker_state, log_store)
+
+
+# Combined log view: lines buffered per container before its reader blocks,
+# and lines taken from each container per merge tick
+LOG_MUX_QUEUE = 1000
+LOG_MUX_QUOTA = 200
+# How long a line may wait for slower containers before it is shown anyway
+LOG_MUX_HOLDBACK = 1.0
+# Every followed container holds a reader thread, so keep the view bounded
+LOG_MUX_MAX_SOURCES = 16
+LOG_MUX_COLORS = ["4fc3f7", "aed581", "ffb74d", "f06292", "ba68c8", "4db6ac", "fff176", "e57373"]
+
+
+class LogSource(LogFollower):
+    """Feeds one container's log lines into a bounded queue"""
+
+    def __init__(self, engine, container_id, name, color, queue_size=LOG_MUX_QUEUE):
+        super(LogSource, self).__init__(engine, container_id, max_lines=1)
+        self.name = name
+        self.color = color
+        self.queue = queue.Queue(maxsize=queue_size)
+        # Newest timestamp handed to the multiplexer, and when it was taken;
+        # None until the first line, so a silent stream holds nothing back
+        self.newest_ns = 0
+        self.arrived = None
+
+    def _store(self, entries, stop):
+        # A full queue blocks this reader, so the daemon stops sending
+        # until the merge catches up instead of memory growing
+        queued = 0
+        for entry in entries:
+            while not stop.is_set():
+                try:
+                    self.queue.put(entry, timeout=0.5)
+                    queued += 1
+                    break
+                except queue.Full:
+                    continue
+            else:
+                break
+        return queued
+
+
+class LogMultiplexer:
+    """Merges several containers' log streams into one timestamp-ordered view.
+
+    Every container gets the same quota of lines per merge, so a noisy one
+    cannot crowd out the others; its backlog stays in its own bounded queue.
+    A line is held until every other live stream has caught up to its
+    timestamp, or for at most LOG_MUX_HOLDBACK seconds. Streams that have
+    not sent a line yet, or have been quiet for longer than the holdback,
+    count as caught up. At most LOG_MUX_MAX_SOURCES containers are followed.
+    """
+
+    def __init__(self, engine, quota=LOG_MUX_QUOTA, holdback=LOG_MUX_HOLDBACK,
+                 max_sources=LOG_MUX_MAX_SOURCES):
+        self.engine = engine
+        self.quota = quota
+        self.holdback = holdback
+        self.max_sources = max_sources
+        self.sources = OrderedDict()
+        self.paused = False
+        self._pending = []
+        self._sequence = 0
+        self._colors = 0
+
+    def add(self, container):
+        """Follow a container; False when the source limit is reached"""
+        if container["id"] in self.sources:
+            return True
+        if len(self.sources) >= self.max_sources:
+            return False
+        color = LOG_MUX_COLORS[self._colors % len(LOG_MUX_COLORS)]
+        self._colors += 1
+        source = LogSource(self.engine, container["id"], container["name"], color)
+        self.sources[container["id"]] = source
+        if not self.paused:
+            source.start()
+        return True
+
+    def remove(self, container_id):
+        source = self.sources.pop(container_id, None)
+        if source is not None:
+            source.pause()
+            self._pending = [item for item in self._pending if item[2] is not source]
+            heapq.heapify(self._pending)
+
+    def pause(self):
+        self.paused = True
+        for source in self.sources.values():
+            source.pause()
+
+    def resume(self):
+        self.paused = False
+        for source in self.sources.values():
+            source.start()
+
+    def stop(self):
+        self.pause()
+        self.sources.clear()
+
+    def merge(self):
+        """Return (ns, source, text) lines that are ready, oldest first"""
+        now = time.monotonic()
+        for source in self.sources.values():
+            for _ in range(self.quota):
+                try:
+                    nanos, text = source.queue.get_nowait()
+                except queue.Empty:
+                    break
+                source.newest_ns = max(source.newest_ns, nanos)
+                source.arrived = now
+                self._sequence += 1
+                heapq.heappush(self._pending, (nanos, self._sequence, source, text, now))
+
+        # Streams only move forward, so nothing older than the slowest
+        # stream's newest line can still arrive. A stream with nothing
+        # queued that has been quiet past the holdback is treated as caught
+        # up to now, instead of pinning the watermark to its last line.
+        live = [
+            source.newest_ns for source in self.sources.values()
+            if source.arrived is not None
+            and (source.following or not source.queue.empty())
+            and (now - source.arrived < self.holdback or not source.queue.empty())
+        ]
+        watermark = min(live) if live else None
+
+        ready = []
+        while self._pending:
+            nanos, _, source, text, arrived = self._pending[0]
+            if watermark is not None and nanos > watermark and now - arrived < self.holdback:
+                break
+            heapq.heappop(self._pending)
+            ready.append((nanos, source, text))
+        return ready
+
+
+# Bulk container operations run this many daemon calls at once
+BULK_WORKERS = int(os.environ.get("DOCKER_BULK_WORKERS", "8"))
+BULK_STOP_TIMEOUT = 10
+
+# Action -> (progress text, past tense, call taking (api, container ID, stop timeout))
+BULK_ACTIONS = OrderedDict(
+    [
+        ("Stop", ("Stopping", "Stopped", lambda api, cid, timeout: api.stop(cid, timeout=timeout))),
+        ("Start", ("Starting", "Started", lambda api, cid, timeout: api.start(cid))),
+        ("Restart", ("Restarting", "Restarted", lambda api, cid, timeout: api.restart(cid, timeout=timeout))),
+        ("Kill", ("Killing", "Killed", lambda api, cid, timeout: api.kill(cid))),
+        ("Remove", ("Removing", "Removed", lambda api, cid, timeout: api.remove_container(cid, force=True))),
+    ]
+)
+
+
+def run_bulk_action(client, container_ids, action, timeout=BULK_STOP_TIMEOUT, workers=BULK_WORKERS):
+    """Apply one action to many containers concurrently.
+
+    Returns {container ID: error message or None}; one failure does not
+    stop the others.
+    """
+    call = BULK_ACTIONS[action][2]
+    return run_bulk_calls(
+        lambda container_id: call(client.api, container_id, timeout), container_ids, workers
+    )
+
+
+def run_bulk_calls(call, keys, workers=BULK_WORKERS):
+    """Run call(key) for every key on a bounded pool; returns {key: error or None}"""
+    results = {}
+    keys = list(keys)
+    if not keys:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(keys)))) as pool:
+        futures = {pool.submit(call, key): key for key in keys}
+        for future, key in futures.items():
+            try:
+                future.result()
+                results[key] = None
+            except Exception as e:
+                results[key] = str(e)
+    return results
+
+
+# Restart policies offered for new containers
+RESTART_POLICIES = ("no", "on-failure", "unless-stopped", "always")
+MAX_REPLICAS = 100
+
+
+def _split_list(text):
+    return [item.strip() for item in (text or "").split(",") if item.strip()]
+
+
+def parse_port_specs(text):
+    """"8080:80, 9000:9000/udp, 443" -> [[host port or None, "80/tcp"], ...]"""
+    specs = []
+    for item in _split_list(text):
+        host, _, container = item.rpartition(":")
+        if "/" not in container:
+            container += "/tcp"
+        port, _, protocol = container.partition("/")
+        if not port.isdigit() or protocol not in ("tcp", "udp", "sctp"):
+            raise ValueError(f"Invalid port '{item}', use host:container or container")
+        if host and not host.isdigit():
+            raise ValueError(f"Invalid host port in '{item}'")
+        specs.append([int(host) if host else None, f"{port}/{protocol}"])
+    return specs
+
+
+def build_run_template(image, name="", command="", ports="", env="", volumes="",
+                       labels="", cpus="", memory="", restart="no"):
+    """Validate the run popup's fields into a JSON-friendly template"""
+    if not image:
+        raise ValueError("Please enter an image name")
+    label_map = {}
+    for item in _split_list(labels):
+        key, separator, value = item.partition("=")
+        if not separator:
+            raise ValueError(f"Labels look like key=value, got '{item}'")
+        label_map[key.strip()] = value.strip()
+    for item in _split_list(env):
+        if "=" not in item:
+            raise ValueError(f"Environment variables look like KEY=value, got '{item}'")
+    if cpus:
+        try:
+            float(cpus)
+        except ValueError:
+            raise ValueError("CPUs must be a number, e.g. 0.5")
+    return {
+        "image": image,
+        "name": name,
+        "command": command,
+        "ports": parse_port_specs(ports),
+        "env": _split_list(env),
+        "volumes": _split_list(volumes),
+        "labels": label_map,
+        "cpus": cpus,
+        "memory": memory,
+        "restart": restart if restart in RESTART_POLICIES else "no",
+    }
+
+
+def replica_run_args(template, index, count):
+    """containers.create() keyword arguments for replica `index` of `count`.
+
+    A fixed host port H becomes H + index; a blank host port lets the daemon
+    pick a free one for every replica.
+    """
+    name = template.get("name") or None
+    if name and count > 1:
+        name = f"{name}-{index + 1}"
+
+    ports = {}
+    for host, container in template.get("ports") or []:
+        ports[container] = host + index if host else None
+
+    args = {
+        "name": name,
+        "command": template.get("command") or None,
+        "ports": ports,
+        "environment": template.get("env") or None,
+        "volumes": template.get("volumes") or None,
+        "labels": template.get("labels") or None,
+    }
+    if template.get("cpus"):
+        args["nano_cpus"] = int(float(template["cpus"]) * 1e9)
+    if template.get("memory"):
+        args["mem_limit"] = template["memory"]
+    if template.get("restart") and template["restart"] != "no":
+        args["restart_policy"] = {"Name": template["restart"]}
+    return args
+
+
+def describe_published_ports(container):
+    """"49153->80/tcp, ..." from a reloaded container"""
+    published = []
+    for container_port, bindings in sorted((container.ports or {}).items()):
+        for binding in bindings or []:
+            published.append(f"{binding.get('HostPort')}->{container_port}")
+    return ", ".join(published)
+
+
+def replica_host_ports(template, count):
+    """Fixed host ports the replicas will publish, as (port, protocol) pairs"""
+    ports = []
+    for index in range(count):
+        for host, container in template.get("ports") or []:
+            if host:
+                ports.append((host + index, container.partition("/")[2]))
+    return ports
+
+
+def check_port_collisions(client, template, count):
+    """Raise ValueError if the replicas' fixed host ports clash or are taken"""
+    wanted = replica_host_ports(template, count)
+    out_of_range = [port for port, _ in wanted if port > 65535]
+    if out_of_range:
+        raise ValueError(f"Host port {out_of_range[0]} is out of range")
+    seen = set()
+    for port in wanted:
+        if port in seen:
+            raise ValueError(f"Host port {port[0]}/{port[1]} is used by two replicas")
+        seen.add(port)
+
+    # Ports already published by running containers
+    taken = set()
+    for summary in client.api.containers():
+        for binding in summary.get("Ports") or []:
+            if binding.get("PublicPort"):
+                taken.add((binding["PublicPort"], binding.get("Type", "tcp")))
+    clashes = sorted(seen & taken)
+    if clashes:
+        listed = ", ".join(f"{port}/{protocol}" for port, protocol in clashes[:5])
+        raise ValueError(f"Host ports already in use: {listed}")
+
+
+def launch_replicas(client, template, count, workers=BULK_WORKERS):
+    """Create and start `count` containers from a template concurrently.
+
+    Returns [(index, container or None, error or None)] in replica order. A
+    replica that fails to start is removed again instead of being left in
+    the created state.
+    """
+    check_port_collisions(client, template, count)
+
+    try:
+        client.images.get(template["image"])
+    except docker.errors.ImageNotFound:
+        # Share the pull queue so a pull already running is reused
+        job = pull_manager.enqueue([template["image"]])[0]
+        job.finished.wait()
+        if job.status != "done":
+            raise RuntimeError(f"Pulling {template['image']} failed: {job.message}")
+
+    def launch(index):
+        container = client.containers.create(
+            template["image"], **replica_run_args(template, index, count)
+        )
+        try:
+            container.start()
+        except Exception:
+            try:
+                container.remove(force=True)
+            except Exception:
+                pass
+            raise
+        # Pick up the host ports the daemon assigned
+        container.reload()
+        return container
+
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, count))) as pool:
+        futures = [pool.submit(launch, index) for index in range(count)]
+        for index, future in enumerate(futures):
+            try:
+                results.append((index, future.result(), None))
+            except Exception as e:
+                results.append((index, None, str(e)))
+    return results
+
+
+class RunTemplates:
+    """Named run templates saved as JSON in the app data directory"""
+
+    def __init__(self, path):
+        self.path = path
+        self._templates = None
+
+    @property
+    def templates(self):
+        # Read on first use so importing the module touches no files
+        if self._templates is None:
+            self._templates = {}
+            if self.path:
+                try:
+                    with open(self.path) as f:
+                        self._templates = json.load(f)
+                except (OSError, ValueError):
+                    pass
+        return self._templates
+
+    def names(self):
+        return sorted(self.templates)
+
+    def get(self, name):
+        return self.templates.get(name)
+
+    def put(self, name, template):
+        self.templates[name] = template
+        self.save()
+
+    def delete(self, name):
+        if self.templates.pop(name, None) is not None:
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        temp_path = f"{self.path}.{os.getpid()}.part"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, "w") as f:
+                json.dump(self.templates, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error saving run templates: {str(e)}")
+
+
+def _run_templates_path():
+    return app_data_path("run_templates.json")
+
+
+# Dockerfile instructions that only change image metadata, never a layer
+METADATA_INSTRUCTIONS = (
+    "ARG", "CMD", "ENTRYPOINT", "ENV", "EXPOSE", "HEALTHCHECK", "LABEL",
+    "MAINTAINER", "ONBUILD", "SHELL", "STOPSIGNAL", "USER", "VOLUME",
+)
+
+
+def layer_chain_ids(diff_ids):
+    """Chain IDs for a RootFS diff ID list; a chain ID names a layer together with everything below it"""
+    chain = []
+    for diff_id in diff_ids:
+        if chain:
+            diff_id = "sha256:" + hashlib.sha256(f"{chain[-1]} {diff_id}".encode()).hexdigest()
+        chain.append(diff_id)
+    return chain
+
+
+def history_layer_sizes(history, layer_count):
+    """Size of each RootFS layer, bottom first, from /images/{id}/history"""
+
+    def creates_layer(entry):
+        if entry.get("Size"):
+            return True
+        created_by = (entry.get("CreatedBy") or "").strip()
+        if not created_by or "#(nop)" in created_by:
+            return False
+        return created_by.split(None, 1)[0].upper() not in METADATA_INSTRUCTIONS
+
+    # The API lists the newest step first
+    entries = list(reversed(history))
+    sizes = [entry.get("Size", 0) for entry in entries if creates_layer(entry)]
+    if len(sizes) != layer_count:
+        # Can't tell which steps made empty layers; only the non-empty
+        # ones matter for sizes, so line those up from the bottom
+        sizes = [entry["Size"] for entry in entries if entry.get("Size")]
+        sizes = (sizes + [0] * layer_count)[:layer_count]
+    return sizes
+
+
+def load_image_layers(client, image_id):
+    """(diff IDs, layer sizes) of one local image"""
+    image = client.api.inspect_image(image_id)
+    diff_ids = (image.get("RootFS") or {}).get("Layers") or []
+    history = client.api.history(image_id)
+    return diff_ids, history_layer_sizes(history, len(diff_ids))
+
+
+class LayerGraph:
+    """Storage layers of the local images and which images use them.
+
+    Layers are keyed by chain ID, so each node also points at its parent
+    layer and images that share a base share the same nodes.
+    """
+
+    def __init__(self):
+        # Chain ID -> {"size", "parent", "images"}
+        self.layers = {}
+        # Image ID -> chain IDs, bottom first
+        self.images = {}
+
+    def add_image(self, image_id, diff_ids, sizes):
+        if image_id in self.images:
+            self.remove_image(image_id)
+        parent = None
+        chain = layer_chain_ids(diff_ids)
+        for chain_id, size in zip(chain, sizes):
+            layer = self.layers.setdefault(
+                chain_id, {"size": size, "parent": parent, "images": set()}
+            )
+            layer["images"].add(image_id)
+            parent = chain_id
+        self.images[image_id] = chain
+
+    def remove_image(self, image_id):
+        for chain_id in self.images.pop(image_id, ()):
+            layer = self.layers.get(chain_id)
+            if layer is not None:
+                layer["images"].discard(image_id)
+                if not layer["images"]:
+                    del self.layers[chain_id]
+
+    def image_sizes(self, image_id):
+        """(unique, shared) bytes of one image"""
+        unique = shared = 0
+        for chain_id in self.images.get(image_id, ()):
+            layer = self.layers[chain_id]
+            if len(layer["images"]) > 1:
+                shared += layer["size"]
+            else:
+                unique += layer["size"]
+        return unique, shared
+
+    def reclaimable(self, image_ids):
+        """Bytes freed by deleting all of these images together"""
+        image_ids = set(image_ids)
+        seen = set()
+        total = 0
+        for image_id in image_ids:
+            for chain_id in self.images.get(image_id, ()):
+                if chain_id in seen:
+                    continue
+                seen.add(chain_id)
+                # A layer goes away only when no remaining image uses it
+                layer = self.layers[chain_id]
+                if layer["images"] <= image_ids:
+                    total += layer["size"]
+        return total
+
+
+class LayerIndex(LayerGraph):
+    """LayerGraph of all local images, updated incrementally and cached on disk.
+
+    Image IDs are content hashes, so an image's layers never change; they are
+    fetched once, saved to a JSON cache, and later syncs only fetch images
+    that are new and drop the ones that are gone.
+    """
+
+    def __init__(self, cache_path):
+        super(LayerIndex, self).__init__()
+        self.cache_path = cache_path
+        self._cache = None
+        self._lock = threading.RLock()
+
+    def _load_cache(self):
+        if self._cache is not None:
+            return
+        self._cache = {}
+        if self.cache_path:
+            try:
+                with open(self.cache_path) as f:
+                    self._cache = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        temp_path = f"{self.cache_path}.{os.getpid()}.part"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, "w") as f:
+                json.dump(self._cache, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"Error saving image layer cache: {str(e)}")
+
+    def sync(self, client, image_ids, workers=BULK_WORKERS):
+        """Bring the graph in line with the given local image IDs"""
+        image_ids = set(image_ids)
+        with self._lock:
+            self._load_cache()
+            for image_id in set(self.images) - image_ids:
+                self.remove_image(image_id)
+            missing = image_ids - set(self.images)
+            to_fetch = [i for i in missing if i not in self._cache]
+
+        # Fetch new images outside the lock so readers are not blocked
+        fetched = {}
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(to_fetch)))) as pool:
+                futures = {
+                    pool.submit(load_image_layers, client, image_id): image_id
+                    for image_id in to_fetch
+                }
+                for future, image_id in futures.items():
+                    try:
+                        diff_ids, sizes = future.result()
+                        fetched[image_id] = {"diff_ids": diff_ids, "sizes": sizes}
+                    except Exception:
+                        pass
+
+        with self._lock:
+            self._cache.update(fetched)
+            for image_id in missing:
+                entry = self._cache.get(image_id)
+                if entry is not None:
+                    self.add_image(image_id, entry["diff_ids"], entry["sizes"])
+            stale = [i for i in self._cache if i not in image_ids]
+            for image_id in stale:
+                del self._cache[image_id]
+            if fetched or stale:
+                self._save_cache()
+        return self
+
+    def image_sizes(self, image_id):
+        with self._lock:
+            return super(LayerIndex, self).image_sizes(image_id)
+
+    def reclaimable(self, image_ids):
+        with self._lock:
+            return super(LayerIndex, self).reclaimable(image_ids)
+
+    def base_image(self, image_id):
+        """The largest other image whose layers are all at the bottom of this one"""
+        with self._lock:
+            chain = self.images.get(image_id, ())
+            for chain_id in reversed(chain[:-1]):
+                for other in self.layers[chain_id]["images"]:
+                    if other != image_id and self.images[other][-1] == chain_id:
+                        return other
+            return None
+
+    def describe_layers(self, image_id):
+        """[(chain ID, size, other image IDs using the layer)] bottom first"""
+        with self._lock:
+            return [
+                (
+                    chain_id,
+                    self.layers[chain_id]["size"],
+                    sorted(self.layers[chain_id]["images"] - {image_id}),
+                )
+                for chain_id in self.images.get(image_id, ())
+            ]
+
+
+def _layer_cache_path():
+    return app_data_path("image_layers.json")
+
+
+# Shared layer graph used by the disk usage and image detail views
+layer_index = LayerIndex(_layer_cache_path())
+
+# Saved container run templates
+run_templates = RunTemplates(_run_templates_path())
+
+
+def summarize_disk_usage(df):
+    """Text lines describing a /system/df response"""
+    images = df.get("Images") or []
+    containers = df.get("Containers") or []
+    volumes = df.get("Volumes") or []
+    build_cache = df.get("BuildCache") or []
+
+    dangling = [i for i in images if not [t for t in i.get("RepoTags") or [] if t != "<none>:<none>"]]
+    unused = [i for i in images if i.get("Containers", 0) <= 0]
+    volume_size = sum(max((v.get("UsageData") or {}).get("Size", 0), 0) for v in volumes)
+    cache_size = sum(entry.get("Size", 0) for entry in build_cache)
+    cache_free = sum(entry.get("Size", 0) for entry in build_cache if not entry.get("InUse"))
+
+    return [
+        f"Images: {len(images)} ({len(dangling)} dangling, {len(unused)} unused) - "
+        f"layers {format_bytes(df.get('LayersSize', 0))}",
+        f"Containers: {len(containers)} - writable layers "
+        f"{format_bytes(sum(c.get('SizeRw', 0) or 0 for c in containers))}",
+        f"Volumes: {len(volumes)} - {format_bytes(volume_size)}",
+        f"Build cache: {len(build_cache)} entries - {format_bytes(cache_size)} "
+        f"({format_bytes(cache_free)} not in use)",
+    ]
+
+
+def select_prune_candidates(df_images, dangling_only=True, older_than=None, larger_than=None):
+    """Images from /system/df that match every criterion and no container uses"""
+    now = time.time()
+    candidates = []
+    for image in df_images:
+        if image.get("Containers", 0) > 0:
+            continue
+        tags = [t for t in image.get("RepoTags") or [] if t != "<none>:<none>"]
+        if dangling_only and tags:
+            continue
+        if older_than is not None and now - image.get("Created", now) < older_than:
+            continue
+        if larger_than is not None and image.get("Size", 0) < larger_than:
+            continue
+        candidates.append(image)
+    return candidates
+
+
+def prune_images(client, graph, image_ids, workers=BULK_WORKERS):
+    """Delete many images in one concurrent pass; returns {image ID: error or None}.
+
+    Images with more layers go first so that children are usually gone
+    before their parents; anything refused with a conflict is retried once
+    at the end.
+    """
+    ordered = sorted(image_ids, key=lambda i: len(graph.images.get(i, ())), reverse=True)
+    conflicts = set()
+
+    def remove(image_id):
+        try:
+            client.api.remove_image(image_id, force=True)
+        except Exception as e:
+            # 409: still referenced by an image that has not been removed yet
+            if getattr(e, "status_code", None) == 409:
+                conflicts.add(image_id)
+            raise
+
+    results = run_bulk_calls(remove, ordered, workers)
+    retry = [image_id for image_id in ordered if image_id in conflicts]
+    for image_id in retry:
+        try:
+            client.api.remove_image(image_id, force=True)
+            results[image_id] = None
+        except Exception as e:
+            results[image_id] = str(e)
+    return results
+
+
+# Container stats: samples kept per metric (the daemon sends one per second)
+# and samples averaged for network and disk rates
+STATS_HISTORY = 60
+STATS_RATE_WINDOW = 5
+STATS_METRICS = ("cpu", "mem", "net_rx", "net_tx", "blk_read", "blk_write")
+
+
+def compute_cpu_percent(stats):
+    """CPU usage the way `docker stats` computes it, 100% per core"""
+    cpu = stats.get("cpu_stats") or {}
+    previous = stats.get("precpu_stats") or {}
+    cpu_delta = (cpu.get("cpu_usage") or {}).get("total_usage", 0) - (
+        previous.get("cpu_usage") or {}
+    ).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - previous.get("system_cpu_usage", 0)
+    if cpu_delta <= 0 or system_delta <= 0:
+        return 0.0
+    cpus = cpu.get("online_cpus") or len((cpu.get("cpu_usage") or {}).get("percpu_usage") or []) or 1
+    return cpu_delta / system_delta * cpus * 100.0
+
+
+def memory_usage(stats):
+    """(used bytes, limit bytes), leaving out reclaimable page cache"""
+    memory = stats.get("memory_stats") or {}
+    details = memory.get("stats") or {}
+    cache = details.get("inactive_file", details.get("total_inactive_file", details.get("cache", 0)))
+    return max(memory.get("usage", 0) - cache, 0), memory.get("limit", 0)
+
+
+def io_counters(stats):
+    """Cumulative (rx, tx, read, write) byte counters"""
+    networks = stats.get("networks") or {}
+    rx = sum(network.get("rx_bytes", 0) for network in networks.values())
+    tx = sum(network.get("tx_bytes", 0) for network in networks.values())
+    read = write = 0
+    for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+        op = entry.get("op", "").lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return rx, tx, read, write
+
+
+class StatsHistory:
+    """Recent samples of one container in fixed-size float ring buffers"""
+
+    def __init__(self, size=STATS_HISTORY):
+        self.size = size
+        self.count = 0
+        self.next = 0
+        self.series = {metric: array("f", [0.0] * size) for metric in STATS_METRICS}
+        self.latest = dict.fromkeys(STATS_METRICS, 0.0)
+        self.memory = (0, 0)
+        self.error = None
+        # Raw cumulative counters for the rolling rate window
+        self._counters = deque(maxlen=STATS_RATE_WINDOW)
+        self._lock = threading.Lock()
+
+    def add(self, stats):
+        read_time = parse_docker_timestamp(stats.get("read")) or time.time()
+        usage, limit = memory_usage(stats)
+        self._counters.append((read_time,) + io_counters(stats))
+
+        rates = [0.0] * 4
+        first, last = self._counters[0], self._counters[-1]
+        elapsed = last[0] - first[0]
+        if elapsed > 0:
+            # Counters reset when a container restarts, never show negative rates
+            rates = [max(b - a, 0) / elapsed for a, b in zip(first[1:], last[1:])]
+
+        values = [compute_cpu_percent(stats), usage / limit * 100.0 if limit else 0.0] + rates
+        with self._lock:
+            for metric, value in zip(STATS_METRICS, values):
+                self.series[metric][self.next] = value
+                self.latest[metric] = value
+            self.memory = (usage, limit)
+            self.next = (self.next + 1) % self.size
+            self.count = min(self.count + 1, self.size)
+
+    def values(self, metric):
+        """Samples oldest first"""
+        with self._lock:
+            data = self.series[metric]
+            if self.count < self.size:
+                return data[:self.count]
+            return data[self.next:] + data[:self.next]
+
+
+class StatsMonitor:
+    """Streams /stats only for the containers whose rows are on screen.
+
+    Table rows report which container they currently show; a stream runs for
+    every container shown by at least one row while the monitor is active.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.active = False
+        self.history = {}
+        self._views = {}
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def assign(self, view, container_id):
+        """Record that a (recycled) row now shows this container"""
+        if self._views.get(view) != container_id:
+            self._views[view] = container_id
+            self._sync()
+
+    def release(self, view):
+        """A row left the viewport; its stream stops unless another row shows it"""
+        if self._views.pop(view, None) is not None:
+            self._sync()
+
+    def retain(self, container_ids):
+        """Forget rows showing containers that are no longer listed"""
+        container_ids = set(container_ids)
+        for view, container_id in list(self._views.items()):
+            if container_id not in container_ids:
+                del self._views[view]
+        for container_id in list(self.history):
+            if container_id not in container_ids:
+                del self.history[container_id]
+        self._sync()
+
+    def get(self, container_id):
+        return self.history.get(container_id)
+
+    def resume(self):
+        self.active = True
+        self._sync()
+
+    def pause(self):
+        self.active = False
+        self._sync()
+
+    def _sync(self):
+        wanted = set(self._views.values()) if self.active else set()
+        with self._lock:
+            for container_id in list(self._streams):
+                if container_id not in wanted:
+                    self._streams.pop(container_id).set()
+            for container_id in wanted - set(self._streams):
+                stop = threading.Event()
+                self._streams[container_id] = stop
+                history = self.history.setdefault(container_id, StatsHistory())
+                threading.Thread(
+                    target=self._stream, args=(container_id, history, stop), daemon=True
+                ).start()
+
+    def _stream(self, container_id, history, stop):
+        try:
+            client = self.engine.get_client()
+            stream = client.api.stats(container_id, stream=True, decode=True)
+            try:
+                for stats in stream:
+                    # Samples arrive every second, so a stop is noticed quickly
+                    if stop.is_set():
+                        break
+                    history.add(stats)
+                    history.error = None
+            finally:
+                stream.close()
+        except Exception as e:
+            history.error = str(e)
+        finally:
+            with self._lock:
+                if self._streams.get(container_id) is stop:
+                    del self._streams[container_id]
+
+
+def create_table(viewclass, row_height=40):
+    """Virtualized table: only the rows in the viewport are instantiated"""
+    table = RecycleView(viewclass=viewclass)
+    layout = RecycleBoxLayout(
+        orientation="vertical",
+        spacing=2,
+        size_hint_y=None,
+        default_size=(None, row_height),
+        default_size_hint=(1, None),
+    )
+    layout.bind(minimum_height=layout.setter("height"))
+    table.add_widget(layout)
+    return table
+
+
+class TableRow(RecycleDataViewBehavior, BoxLayout):
+    """Base class for recycled table rows; each data item is {"row", "screen"}"""
+
+    def __init__(self, **kwargs):
+        super(TableRow, self).__init__(orientation="horizontal", spacing=2, **kwargs)
+        self.row = None
+        self.screen = None
+
+    def refresh_view_attrs(self, rv, index, data):
+        result = super(TableRow, self).refresh_view_attrs(rv, index, data)
+        self.show(data["row"])
+        return result
+
+    def show(self, row):
+        raise NotImplementedError
+
+    @staticmethod
+    def _set_actions(actions, buttons):
+        """Show exactly the given buttons in the actions box"""
+        if list(reversed(actions.children)) != buttons:
+            actions.clear_widgets()
+            for button in buttons:
+                actions.add_widget(button)
+
+
+class ImageRow(TableRow):
+    """One repository:tag (or untagged image) in the images table"""
+
+    def __init__(self, **kwargs):
+        super(ImageRow, self).__init__(**kwargs)
+        self.repo_label = Label()
+        self.tag_label = Label()
+        self.id_label = Label()
+        self.add_widget(self.repo_label)
+        self.add_widget(self.tag_label)
+        self.add_widget(self.id_label)
+
+        self.actions = BoxLayout(orientation="horizontal", spacing=5)
+        self.run_btn = Button(
+            text="Run", size_hint_x=0.5, background_color=(0.3, 0.7, 1, 1)
+        )
+        self.run_btn.bind(on_press=lambda x: self.screen.run_container(self.row["ref"]))
+        self.remove_btn = Button(
+            text="Remove", size_hint_x=0.5, background_color=(1, 0.3, 0.3, 1)
+        )
+        self.remove_btn.bind(on_press=self.on_remove)
+        self.details_btn = Button(
+            text="Details", size_hint_x=0.5, background_color=(0.3, 0.7, 1, 1)
+        )
+        self.details_btn.bind(on_press=lambda x: self.screen.show_image_details(self.row["id"]))
+        self.add_widget(self.actions)
+
+    def show(self, row):
+        self.repo_label.text = row["repo"]
+        self.tag_label.text = row["tag"]
+        self.id_label.text = row["short_id"]
+        if row["ref"]:
+            self._set_actions(self.actions, [self.run_btn, self.details_btn, self.remove_btn])
+        else:
+            # Untagged images can only be inspected and removed
+            self._set_actions(self.actions, [self.details_btn, self.remove_btn])
+
+        # Pending daemon operation on this image
+        pending = row.get("pending")
+        self.remove_btn.text = pending or "Remove"
+        self.run_btn.disabled = self.remove_btn.disabled = bool(pending)
+
+    def on_remove(self, instance):
+        if self.row["ref"]:
+            self.screen.remove_image(self.row["ref"])
+        else:
+            self.screen.remove_image_by_id(self.row["short_id"])
+
+
+class ContainerRow(TableRow):
+    """One container in the containers table"""
+
+    def __init__(self, **kwargs):
+        super(ContainerRow, self).__init__(**kwargs)
+        self.select_box = CheckBox(size_hint_x=0.3)
+        self.select_box.bind(active=self.on_select)
+        self.add_widget(self.select_box)
+        self._showing = False
+        self.id_label = Label()
+        self.name_label = Label()
+        self.image_label = Label()
+        self.status_label = Label()
+        for label in (self.id_label, self.name_label, self.image_label, self.status_label):
+            self.add_widget(label)
+
+        self.actions = BoxLayout(orientation="horizontal", spacing=5)
+        self.stop_btn = Button(
+            text="Stop", size_hint_x=0.5, background_color=(1, 0.5, 0, 1)
+        )
+        self.stop_btn.bind(on_press=lambda x: self.screen.stop_container(self.row["id"]))
+        self.logs_btn = Button(
+            text="Logs", size_hint_x=0.5, background_color=(0.3, 0.7, 1, 1)
+        )
+        self.logs_btn.bind(on_press=lambda x: self.screen.view_logs(self.row["id"]))
+        self.start_btn = Button(
+            text="Start", size_hint_x=0.5, background_color=(0, 0.7, 0, 1)
+        )
+        self.start_btn.bind(on_press=lambda x: self.screen.start_container(self.row["id"]))
+        self.remove_btn = Button(
+            text="Remove", size_hint_x=0.5, background_color=(1, 0.3, 0.3, 1)
+        )
+        self.remove_btn.bind(
+            on_press=lambda x: self.screen.remove_container(self.row["id"])
+        )
+        self.add_widget(self.actions)
+
+    def on_select(self, checkbox, value):
+        if self._showing:
+            return
+        # Keep the flag on the data item so it survives recycling
+        self.row["selected"] = value
+        self.screen.set_selected(self.row["id"], value)
+
+    def show(self, row):
+        self._showing = True
+        self.select_box.active = row.get("selected", False)
+        self._showing = False
+        self.id_label.text = row["short_id"]
+        self.name_label.text = row["name"]
+
+        # Shorten the image name if necessary
+        image_name = row["image"]
+        if len(image_name) > 20:
+            image_name = image_name[:17] + "..."
+        self.image_label.text = image_name
+
+        status = row["status"]
+        pending = row.get("pending")
+        if pending:
+            self.status_label.text = pending
+            self.status_label.color = (0.7, 0.7, 0.7, 1)
+        else:
+            self.status_label.text = status
+            self.status_label.color = (
+                (0, 1, 0, 1) if status == "running" else (1, 0.5, 0, 1)
+            )
+
+        # Different buttons depending on container state
+        if status == "running":
+            buttons = [self.stop_btn, self.logs_btn]
+        else:
+            buttons = [self.start_btn, self.remove_btn]
+        self._set_actions(self.actions, buttons)
+        for button in buttons:
+            button.disabled = bool(pending)
+
+
+class LogLineRow(TableRow):
+    """A single line of container output"""
+
+    def __init__(self, **kwargs):
+        super(LogLineRow, self).__init__(**kwargs)
+        self.line_label = Label(halign="left", valign="middle", shorten=True)
+        self.line_label.bind(size=self.line_label.setter("text_size"))
+        self.add_widget(self.line_label)
+
+    def show(self, row):
+        self.line_label.markup = row.get("markup", False)
+        self.line_label.text = row["text"]
+
+
+class Sparkline(Widget):
+    """Line chart of a metric's recent samples, newest at the right"""
+
+    def __init__(self, color=(0.3, 0.7, 1, 1), **kwargs):
+        super(Sparkline, self).__init__(**kwargs)
+        self.values = []
+        self.maximum = 1.0
+        with self.canvas:
+            Color(*color)
+            self.line = Line(points=[], width=1.2)
+        self.bind(pos=self._redraw, size=self._redraw)
+
+    def set_values(self, values, minimum_scale=0.0):
+        self.values = values
+        # Scale to the largest sample so quiet containers still show a shape
+        self.maximum = max(max(values, default=0.0), minimum_scale, 1e-6)
+        self._redraw()
+
+    def _redraw(self, *args):
+        if len(self.values) < 2:
+            self.line.points = []
+            return
+        step = self.width / float(STATS_HISTORY - 1)
+        start = self.right - step * (len(self.values) - 1)
+        points = []
+        for i, value in enumerate(self.values):
+            points.append(start + i * step)
+            points.append(self.y + min(value / self.maximum, 1.0) * self.height)
+        self.line.points = points
+
+
+class StatsRow(TableRow):
+    """Live CPU / memory / network / block I/O of one container"""
+
+    def __init__(self, **kwargs):
+        super(StatsRow, self).__init__(**kwargs)
+        self.name_label = Label(size_hint_x=0.2)
+        self.cpu_label = Label(size_hint_x=0.1)
+        self.cpu_chart = Sparkline(size_hint_x=0.15)
+        self.mem_label = Label(size_hint_x=0.15)
+        self.mem_chart = Sparkline(color=(0.6, 0.9, 0.4, 1), size_hint_x=0.15)
+        self.net_label = Label(size_hint_x=0.125)
+        self.blk_label = Label(size_hint_x=0.125)
+        for widget in (
+            self.name_label, self.cpu_label, self.cpu_chart, self.mem_label,
+            self.mem_chart, self.net_label, self.blk_label,
+        ):
+            self.add_widget(widget)
+
+    def on_parent(self, instance, parent):
+        # The RecycleView detaches rows that scroll out and keeps them in a
+        # cache, so a detached row must not keep its container's stream open
+        if parent is None and self.screen is not None:
+            self.screen.monitor.release(self)
+
+    def show(self, row):
+        monitor = self.screen.monitor
+        monitor.assign(self, row["id"])
+        self.name_label.text = row["name"]
+
+        history = monitor.get(row["id"])
+        if history is None or history.count == 0:
+            waiting = history.error if history is not None and history.error else "..."
+            for label in (self.cpu_label, self.mem_label, self.net_label, self.blk_label):
+                label.text = waiting
+            self.cpu_chart.set_values([])
+            self.mem_chart.set_values([])
+            return
+
+        latest = history.latest
+        usage, limit = history.memory
+        self.cpu_label.text = f"{latest['cpu']:.1f}%"
+        self.mem_label.text = f"{format_bytes(usage)} / {format_bytes(limit)}"
+        self.net_label.text = (
+            f"rx {format_bytes(latest['net_rx'])}/s\ntx {format_bytes(latest['net_tx'])}/s"
+        )
+        self.blk_label.text = (
+            f"r {format_bytes(latest['blk_read'])}/s\nw {format_bytes(latest['blk_write'])}/s"
+        )
+        self.cpu_chart.set_values(history.values("cpu"), minimum_scale=100.0)
+        self.mem_chart.set_values(history.values("mem"), minimum_scale=100.0)
+
+
+class JobRow(TableRow):
+    """Name / status / detail row used by the pull queue and build plan views"""
+
+    def __init__(self, **kwargs):
+        super(JobRow, self).__init__(**kwargs)
+        self.name_label = Label(size_hint_x=0.3)
+        self.status_label = Label(size_hint_x=0.2)
+        self.detail_label = Label(size_hint_x=0.5)
+        self.add_widget(self.name_label)
+        self.add_widget(self.status_label)
+        self.add_widget(self.detail_label)
+
+    def show(self, row):
+        self.name_label.text = row["name"]
+        self.status_label.text = row["status"]
+        self.status_label.color = {
+            "done": (0, 1, 0, 1),
+            "up to date": (0, 1, 0, 1),
+            "failed": (1, 0.3, 0.3, 1),
+            "blocked": (1, 0.5, 0, 1),
+        }.get(row["status"], (1, 1, 1, 1))
+        self.detail_label.text = row["detail"]
+
+
+def show_run_popup(client, image_name=None):
+    """Run one or more containers, optionally from a saved template"""
+    layout = BoxLayout(orientation="vertical", padding=10, spacing=5)
+
+    def add_field(label_text, widget):
+        row = BoxLayout(orientation="horizontal", size_hint_y=None, height=35)
+        row.add_widget(Label(text=label_text, size_hint_x=0.3))
+        widget.size_hint_x = 0.7
+        row.add_widget(widget)
+        layout.add_widget(row)
+        return widget
+
+    # Saved templates
+    template_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=35, spacing=5)
+    template_spinner = Spinner(
+        text="Load template" if run_templates.names() else "No saved templates",
+        values=run_templates.names(),
+        size_hint_x=0.35,
+    )
+    template_layout.add_widget(template_spinner)
+    template_name_input = TextInput(hint_text="Template name", multiline=False, size_hint_x=0.35)
+    template_layout.add_widget(template_name_input)
+    save_btn = Button(text="Save", size_hint_x=0.15, background_color=(0.3, 0.7, 1, 1))
+    template_layout.add_widget(save_btn)
+    delete_btn = Button(text="Delete", size_hint_x=0.15, background_color=(1, 0.3, 0.3, 1))
+    template_layout.add_widget(delete_btn)
+    layout.add_widget(template_layout)
+
+    # Image, from the shared model or typed in
+    image_tags = []
+    for image in docker_state.list_images():
+        image_tags.extend(image["tags"])
+    image_input = TextInput(
+        text=image_name or "",
+        hint_text="Image name (e.g. ubuntu:latest)",
+        multiline=False,
+    )
+    if image_name is None:
+        image_spinner = Spinner(
+            text="Select image" if image_tags else "No images available",
+            values=image_tags,
+        )
+        image_spinner.bind(text=lambda spinner, text: setattr(image_input, "text", text))
+        add_field("Local image:", image_spinner)
+    add_field("Image:", image_input)
+
+    name_input = add_field("Container name:", TextInput(hint_text="Optional; replicas get -1, -2, ...", multiline=False))
+    cmd_input = add_field("Command:", TextInput(hint_text="Optional", multiline=False))
+    port_input = add_field(
+        "Ports:", TextInput(hint_text="8080:80, 443 (blank host port = any free port)", multiline=False)
+    )
+    env_input = add_field("Environment:", TextInput(hint_text="KEY=value, KEY2=value", multiline=False))
+    volume_input = add_field("Volumes:", TextInput(hint_text="/host/path:/data, name:/cache:ro", multiline=False))
+    label_input = add_field("Labels:", TextInput(hint_text="team=qa, purpose=load-test", multiline=False))
+
+    limits_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=35, spacing=5)
+    limits_layout.add_widget(Label(text="Limits:", size_hint_x=0.3))
+    cpus_input = TextInput(hint_text="CPUs (e.g. 0.5)", multiline=False, size_hint_x=0.25)
+    limits_layout.add_widget(cpus_input)
+    memory_input = TextInput(hint_text="Memory (e.g. 512m)", multiline=False, size_hint_x=0.25)
+    limits_layout.add_widget(memory_input)
+    restart_spinner = Spinner(text="no", values=RESTART_POLICIES, size_hint_x=0.2)
+    limits_layout.add_widget(restart_spinner)
+    layout.add_widget(limits_layout)
+
+    replicas_input = add_field("Replicas:", TextInput(text="1", multiline=False))
+
+    # Status message and per-replica results
+    status_label = Label(text="Configure container parameters", size_hint_y=None, height=30)
+    layout.add_widget(status_label)
+    results_table = create_table(JobRow, row_height=30)
+    layout.add_widget(results_table)
+
+    def read_template():
+        return build_run_template(
+            image_input.text.strip(),
+            name=name_input.text.strip(),
+            command=cmd_input.text.strip(),
+            ports=port_input.text,
+            env=env_input.text,
+            volumes=volume_input.text,
+            labels=label_input.text,
+            cpus=cpus_input.text.strip(),
+            memory=memory_input.text.strip(),
+            restart=restart_spinner.text,
+        )
+
+    def load_template(spinner, name):
+        template = run_templates.get(name)
+        if template is None:
+            return
+        template_name_input.text = name
+        image_input.text = template["image"]
+        name_input.text = template.get("name", "")
+        cmd_input.text = template.get("command", "")
+        port_input.text = ", ".join(
+            f"{host}:{port}" if host else port for host, port in template.get("ports") or []
+        )
+        env_input.text = ", ".join(template.get("env") or [])
+        volume_input.text = ", ".join(template.get("volumes") or [])
+        label_input.text = ", ".join(f"{k}={v}" for k, v in (template.get("labels") or {}).items())
+        cpus_input.text = template.get("cpus", "")
+        memory_input.text = template.get("memory", "")
+        restart_spinner.text = template.get("restart", "no")
+        status_label.text = f"Loaded template {name}"
+
+    def save_template(btn):
+        name = template_name_input.text.strip()
+        if not name:
+            status_label.text = "Enter a template name"
+            return
+        try:
+            run_templates.put(name, read_template())
+        except ValueError as e:
+            status_label.text = str(e)
+            return
+        template_spinner.values = run_templates.names()
+        status_label.text = f"Saved template {name}"
+
+    def delete_template(btn):
+        name = template_name_input.text.strip()
+        if run_templates.get(name) is None:
+            status_label.text = "Choose a saved template to delete"
+            return
+        run_templates.delete(name)
+        template_spinner.values = run_templates.names()
+        template_spinner.text = "Load template" if run_templates.names() else "No saved templates"
+        status_label.text = f"Deleted template {name}"
+
+    template_spinner.bind(text=load_template)
+    save_btn.bind(on_press=save_template)
+    delete_btn.bind(on_press=delete_template)
+
+    def do_run(btn):
+        try:
+            template = read_template()
+            count = int(replicas_input.text.strip() or "1")
+            if not 1 <= count <= MAX_REPLICAS:
+                raise ValueError(f"Replicas must be between 1 and {MAX_REPLICAS}")
+        except ValueError as e:
+            status_label.text = str(e)
+            return
+
+        run_btn.disabled = True
+        status_label.text = f"Starting {count} containers from {template['image']}..."
+        results_table.data = []
+
+        def on_success(results):
+            run_btn.disabled = False
+            started = [r for r in results if r[2] is None]
+            status_label.text = f"Started {len(started)} of {len(results)} containers"
+            results_table.data = [
+                {
+                    "row": {
+                        "name": container.name if container is not None else f"replica {index + 1}",
+                        "status": "done" if error is None else "failed",
+                        "detail": error or describe_published_ports(container),
+                    }
+                }
+                for index, container, error in results
+            ]
+
+        def on_error(error):
+            run_btn.disabled = False
+            status_label.text = f"Error: {str(error)}"
+
+        docker_engine.submit(
+            launch_replicas, client, template, count, on_success=on_success, on_error=on_error
+        )
+
+    btn_layout = BoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=50)
+    run_btn = Button(text="Run")
+    run_btn.bind(on_press=do_run)
+    close_btn = Button(text="Close")
+    close_btn.bind(on_press=lambda x: popup.dismiss())
+    btn_layout.add_widget(run_btn)
+    btn_layout.add_widget(close_btn)
+    layout.add_widget(btn_layout)
+
+    popup = Popup(title="Run Container", content=layout, size_hint=(0.9, 0.95))
+    popup.open()
+    return popup
+
+
+# Placeholder classes to split from main
+class DockerScreen(DockerClientMixin, Screen):
+    def __init__(self, **kwargs):
+        super(DockerScreen, self).__init__(**kwargs)
 
         # Main container with padding
         self.layout = BoxLayout(orientation="vertical", spacing=20, padding=40)
@@ -80,6 +3752,18 @@ class DockerScreen(Screen):
         self.build_image_btn.bind(on_press=self.build_docker_image)
         button_container.add_widget(self.build_image_btn)
 
+        # Build Plan button
+        self.build_plan_btn = Button(
+            text="Run Build Plan",
+            size_hint=(0.8, None),
+            height=60,
+            background_color=(0.3, 0.7, 1, 1),
+            font_size=24,
+            pos_hint={"center_x": 0.5},
+        )
+        self.build_plan_btn.bind(on_press=self.run_build_plan)
+        button_container.add_widget(self.build_plan_btn)
+
         # Manage Docker Images button
         self.manage_images_btn = Button(
             text="Manage Docker Images",
@@ -116,6 +3800,18 @@ class DockerScreen(Screen):
         self.pull_image_btn.bind(on_press=self.pull_image)
         button_container.add_widget(self.pull_image_btn)
 
+        # Pull Queue button
+        self.pull_queue_btn = Button(
+            text="Pull Queue",
+            size_hint=(0.8, None),
+            height=60,
+            background_color=(0.3, 0.7, 1, 1),
+            font_size=24,
+            pos_hint={"center_x": 0.5},
+        )
+        self.pull_queue_btn.bind(on_press=self.open_pull_queue)
+        button_container.add_widget(self.pull_queue_btn)
+
         self.layout.add_widget(button_container)
 
         # Back button
@@ -237,32 +3933,46 @@ CMD ["python", "app.py"]
                 tag = name_input.text
 
                 output_text.text = f"Building image {tag} from {path}...\n"
+                build_btn.disabled = True
+
+                progress = BuildProgress()
+                ui_event = track_build_output(progress, output_text)
+
+                def finish(summary):
+                    ui_event.cancel()
+                    output_text.text = progress.text() + "\n\n" + summary
+                    output_text.cursor = output_text.get_cursor_from_index(len(output_text.text))
+                    build_btn.disabled = False
 
                 # Use a thread to avoid UI freezing
                 def build_thread():
                     try:
-                        # Build Docker image with Python SDK
-                        image, build_logs = self.docker_client.images.build(
-                            path=path,
+                        # Pack the context ourselves: .dockerignore, size report, cache
+                        context = BuildContext(path, cache_dir=get_build_context_cache())
+                        progress.add_note(context.scan().report() + "\n")
+
+                        # Stream the tar and the build output with the low-level API
+                        image_id = stream_build(
+                            self.docker_client,
+                            progress,
+                            fileobj=context.stream(),
+                            custom_context=True,
                             tag=tag,
                             rm=True,
                         )
 
-                        # Log the output
-                        log_output = "Build completed successfully!\n"
-                        log_output += f"Created image: {image.tags[0]}\n"
-
-                        # Update UI on main thread
-                        Clock.schedule_once(
-                            lambda dt: setattr(output_text, "text", log_output), 0
-                        )
+                        elapsed = format_duration(time.time() - progress.started)
+                        summary = f"Build completed successfully in {elapsed}!\n"
+                        summary += f"Created image: {tag} ({(image_id or '').replace('sha256:', '')[:12]})\n"
                     except Exception as e:
-                        error_msg = f"Error building image: {str(e)}"
-                        Clock.schedule_once(
-                            lambda dt: setattr(output_text, "text", error_msg), 0
-                        )
+                        summary = f"Error building image: {str(e)}\n"
+
+                    report = progress.step_report()
+                    if report:
+                        summary += f"\nStep timings (slowest first):\n{report}\n"
+                    Clock.schedule_once(lambda dt: finish(summary), 0)
 
-                threading.Thread(target=build_thread).start()
+                threading.Thread(target=build_thread, daemon=True).start()
 
             except Exception as e:
                 output_text.text = f"Error: {str(e)}"
@@ -281,6 +3991,107 @@ CMD ["python", "app.py"]
         popup = Popup(title="Build Docker Image", content=layout, size_hint=(0.8, 0.8))
         popup.open()
 
+    def run_build_plan(self, instance):
+        """Build many images from a plan file, in dependency order"""
+        if not self._check_docker_client():
+            return
+
+        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
+
+        # Plan file input
+        path_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=30)
+        path_layout.add_widget(Label(text="Build plan file:", size_hint_x=0.3))
+        path_input = TextInput(
+            text=os.path.join(os.getcwd(), "build-plan.json"), size_hint_x=0.7
+        )
+        path_layout.add_widget(path_input)
+        layout.add_widget(path_layout)
+
+        # Worker limit (overrides the plan's own setting)
+        workers_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=30)
+        workers_layout.add_widget(Label(text="Parallel builds:", size_hint_x=0.3))
+        workers_input = TextInput(hint_text="From plan", size_hint_x=0.7)
+        workers_layout.add_widget(workers_input)
+        layout.add_widget(workers_layout)
+
+        # Build list
+        headers = GridLayout(cols=3, size_hint_y=None, height=30, spacing=2)
+        headers.add_widget(Label(text="Image", bold=True))
+        headers.add_widget(Label(text="Status", bold=True))
+        headers.add_widget(Label(text="Details", bold=True))
+        layout.add_widget(headers)
+        builds_table = create_table(JobRow, row_height=30)
+        layout.add_widget(builds_table)
+
+        summary_label = Label(text="", size_hint_y=None, height=30)
+        layout.add_widget(summary_label)
+
+        btn_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=50, spacing=10)
+        run_btn = Button(text="Run Plan")
+        close_btn = Button(text="Close")
+        btn_layout.add_widget(run_btn)
+        btn_layout.add_widget(close_btn)
+        layout.add_widget(btn_layout)
+
+        current = {"plan": None, "event": None}
+
+        def refresh(*args):
+            plan = current["plan"]
+            if plan is None:
+                return
+            rows = []
+            for tag in plan.order:
+                build = plan.builds[tag]
+                if build.status == "building":
+                    lines = build.progress.text().splitlines()
+                    detail = lines[-1] if lines else ""
+                elif build.status in ("done", "failed"):
+                    detail = build.message or format_duration(build.duration)
+                else:
+                    detail = build.message
+                rows.append({"row": {"name": tag, "status": build.status, "detail": detail}})
+            builds_table.data = rows
+            summary_label.text = plan.summary()
+
+        def finish(*args):
+            if current["event"] is not None:
+                current["event"].cancel()
+                current["event"] = None
+            refresh()
+            run_btn.disabled = False
+
+        def run_plan(btn):
+            data_dir = get_app_data_directory()
+            state_path = os.path.join(data_dir, "build_plan_state.json") if data_dir else None
+            try:
+                plan = BuildPlan.load(path_input.text.strip(), state_path)
+                if workers_input.text.strip():
+                    plan.workers = max(1, int(workers_input.text.strip()))
+            except Exception as e:
+                summary_label.text = f"Invalid build plan: {str(e)}"
+                return
+
+            current["plan"] = plan
+            run_btn.disabled = True
+            current["event"] = Clock.schedule_interval(refresh, 1.0 / BUILD_UI_RATE)
+
+            def plan_thread():
+                try:
+                    plan.run(self.docker_client)
+                finally:
+                    Clock.schedule_once(finish, 0)
+
+            threading.Thread(target=plan_thread, daemon=True).start()
+
+        run_btn.bind(on_press=run_plan)
+
+        popup = Popup(title="Run Build Plan", content=layout, size_hint=(0.9, 0.9))
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+        popup.bind(
+            on_dismiss=lambda x: current["event"].cancel() if current["event"] else None
+        )
+        popup.open()
+
     def pull_image(self, instance):
         """Pull a Docker image – now with Hub autocomplete"""
         if not self._check_docker_client():
@@ -340,6 +4151,12 @@ CMD ["python", "app.py"]
         layout.add_widget(Label(text="Pull output:", size_hint_y=None, height=30))
         layout.add_widget(output_text)
 
+        # ---------------- progress ----------------------------------------
+        progress_bar = ProgressBar(max=100, value=0, size_hint_y=None, height=20)
+        progress_lbl = Label(text="", size_hint_y=None, height=30)
+        layout.add_widget(progress_bar)
+        layout.add_widget(progress_lbl)
+
         # ---------------- buttons -----------------------------------------
         btn_row = BoxLayout(size_hint_y=None, height=50, spacing=10)
         pull_btn = Button(text="Pull")
@@ -355,38 +4172,63 @@ CMD ["python", "app.py"]
         # ==================================================================
         #  A) live-search every time user types ≥ 3 chars  (debounced)
         # ==================================================================
-        from functools import partial
-        import time
-        last_req = {"term": "", "t": 0}
+        last_req = {"term": "", "event": None}
+
+        def show_results(term, repos):
+            # ignore stale responses
+            if term != last_req["term"]:
+                return
+            status_lbl.text = f"{len(repos)}⧉" if repos else "0"
+            show_dropdown(repos)
+
+        def launch_search(term):
+            last_req["event"] = None
+            if term != last_req["term"]:
+                return
+
+            def on_error(error):
+                print("SEARCH ERROR:", error)            # ← prints to your terminal
+                output_text.text = f"{error}\n"
+                status_lbl.text = "Err"
+
+            started = hub_search.search(
+                term, lambda repos: show_results(term, repos), on_error
+            )
+            if not started:
+                # too many searches in flight, try again shortly
+                last_req["event"] = Clock.schedule_once(
+                    lambda dt: launch_search(term), SEARCH_DEBOUNCE
+                )
 
         def on_text_change(_inst, new_text):
             term = new_text.strip()
-            if len(term) < 3 or term == last_req["term"]:
+            if len(term) < SEARCH_MIN_LENGTH or term == last_req["term"]:
                 return
             last_req["term"] = term
-            last_req["t"] = time.time()
-            status_lbl.text = "…"
 
-            def search_thread(tsnapshot):
-                try:
-                    hits = self.docker_client.images.search(term, limit=5)
-                    # ignore stale responses
-                    if tsnapshot != last_req["t"]:
-                        return
-                    repos = [hit["name"] for hit in hits]        # list of strings
-                    Clock.schedule_once(lambda dt: (
-                        setattr(status_lbl, "text", f"{len(repos)}⧉" if repos else "0"),
-                        show_dropdown(repos)
-                    ), 0)
-                except Exception as e:
-                    print("SEARCH ERROR:", e)            # ← prints to your terminal
-                    Clock.schedule_once(lambda dt: setattr(output_text, "text", f"{e}\n"))
-                    Clock.schedule_once(lambda dt: setattr(status_lbl, "text", "Err"))
+            # a new keystroke cancels the pending lookup
+            if last_req["event"] is not None:
+                last_req["event"].cancel()
+                last_req["event"] = None
+
+            cached, complete = hub_search.cache.lookup(term)
+            if cached is not None:
+                show_results(term, cached)
+                if complete:
+                    return
+            status_lbl.text = "…"
+            last_req["event"] = Clock.schedule_once(
+                lambda dt: launch_search(term), SEARCH_DEBOUNCE
+            )
 
+        name_input.bind(text=on_text_change)
 
-            threading.Thread(target=search_thread, args=(last_req["t"],), daemon=True).start()
+        def cancel_pending(*args):
+            if last_req["event"] is not None:
+                last_req["event"].cancel()
+                last_req["event"] = None
 
-        name_input.bind(text=on_text_change)
+        popup.bind(on_dismiss=cancel_pending)
 
         # ==================================================================
         #  B) perform the actual pull
@@ -399,47 +4241,141 @@ CMD ["python", "app.py"]
             output_text.text = f"Pulling {image_name} …\n"
             pull_btn.disabled = True
 
-            def pull_thread():
-                try:
-                    # download image (blocking call on this background thread)
-                    self.docker_client.images.pull(image_name)
-
-                    # UI update: show success message
-                    Clock.schedule_once(
-                        lambda dt: setattr(
-                            output_text,
-                            "text",
-                            f"Successfully pulled {image_name}\n"
-                        ),
-                        0
-                    )
+            # The shared queue dedupes this against pulls from other popups
+            job = pull_manager.enqueue([image_name])[0]
+            progress = job.progress
+            progress_bar.value = 0
+            ui_event = track_pull_progress(progress, progress_bar, progress_lbl)
+
+            def finish(job):
+                ui_event.cancel()
+                snapshot = progress.snapshot()
+                progress_bar.value = snapshot["fraction"] * 100
+                progress_lbl.text = progress.describe(snapshot)
+                if job.status == "done":
+                    elapsed = format_duration(time.time() - progress.started)
+                    output_text.text = f"Successfully pulled {image_name} in {elapsed}\n{job.message}\n"
+                else:
+                    output_text.text = f"Failed: {job.message}\n"
+                # re-enable the Pull button
+                pull_btn.disabled = False
 
-                    # refresh the Images screen, if it’s already been created
-                    Clock.schedule_once(
-                        lambda dt: self.manager.get_screen("docker_images").update_image_list(),
-                        0
-                    )
+            job.add_done_callback(finish)
 
-                except Exception as e:
-                    Clock.schedule_once(
-                        lambda dt: setattr(
-                            output_text,
-                            "text",
-                            f"Failed: {e}\n"
-                        ),
-                        0
-                    )
+        pull_btn.bind(on_press=do_pull)
 
-                finally:
-                    # re-enable the Pull button
-                    Clock.schedule_once(
-                        lambda dt: setattr(pull_btn, "disabled", False),
-                        0
-                    )
+    def open_pull_queue(self, instance):
+        """Queue many images at once and watch their progress"""
+        if not self._check_docker_client():
+            return
 
-            threading.Thread(target=pull_thread, daemon=True).start()
+        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
 
-        pull_btn.bind(on_press=do_pull)
+        # References: typed or pasted, one per line
+        layout.add_widget(
+            Label(
+                text="Image references (one per line, or separated by spaces/commas):",
+                size_hint_y=None,
+                height=30,
+            )
+        )
+        refs_input = TextInput(multiline=True, size_hint=(1, 0.3))
+        layout.add_widget(refs_input)
+
+        # ... or loaded from a file
+        file_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=30, spacing=5)
+        file_layout.add_widget(Label(text="Image list file:", size_hint_x=0.3))
+        file_input = TextInput(hint_text="Optional path", multiline=False, size_hint_x=0.5)
+        file_layout.add_widget(file_input)
+        load_btn = Button(text="Load", size_hint_x=0.2)
+        file_layout.add_widget(load_btn)
+        layout.add_widget(file_layout)
+
+        # Concurrency limit
+        limit_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=30, spacing=5)
+        limit_layout.add_widget(Label(text="Parallel pulls:", size_hint_x=0.3))
+        limit_input = TextInput(
+            text=str(pull_manager.concurrency), multiline=False, size_hint_x=0.2
+        )
+        limit_layout.add_widget(limit_input)
+        queue_btn = Button(text="Queue Pulls", size_hint_x=0.5, background_color=(0.3, 0.7, 1, 1))
+        limit_layout.add_widget(queue_btn)
+        layout.add_widget(limit_layout)
+
+        # Queue view
+        headers = GridLayout(cols=3, size_hint_y=None, height=30, spacing=2)
+        headers.add_widget(Label(text="Image", bold=True))
+        headers.add_widget(Label(text="Status", bold=True))
+        headers.add_widget(Label(text="Progress", bold=True))
+        layout.add_widget(headers)
+        queue_table = create_table(JobRow, row_height=30)
+        layout.add_widget(queue_table)
+
+        status_label = Label(text="", size_hint_y=None, height=30)
+        layout.add_widget(status_label)
+
+        btn_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=50, spacing=10)
+        clear_btn = Button(text="Clear Finished")
+        close_btn = Button(text="Close")
+        btn_layout.add_widget(clear_btn)
+        btn_layout.add_widget(close_btn)
+        layout.add_widget(btn_layout)
+
+        def refresh(*args):
+            rows = []
+            counts = {}
+            for job in list(pull_manager.jobs):
+                if job.status == "pulling":
+                    detail = job.progress.describe()
+                else:
+                    detail = job.message
+                rows.append(
+                    {"row": {"name": job.reference, "status": job.status, "detail": detail}}
+                )
+                state = job.status if job.status in ("queued", "done", "failed") else "running"
+                counts[state] = counts.get(state, 0) + 1
+            queue_table.data = rows
+            status_label.text = ", ".join(
+                f"{counts.get(state, 0)} {state}"
+                for state in ("running", "queued", "done", "failed")
+            )
+
+        def load_file(btn):
+            try:
+                with open(file_input.text.strip()) as f:
+                    refs_input.text = f.read()
+            except Exception as e:
+                status_label.text = f"Could not read file: {str(e)}"
+
+        def queue_pulls(btn):
+            try:
+                pull_manager.set_concurrency(int(limit_input.text.strip()))
+            except ValueError:
+                status_label.text = "Parallel pulls must be a number"
+                return
+            references = parse_image_list(refs_input.text)
+            if not references:
+                status_label.text = "Please enter at least one image reference"
+                return
+            pull_manager.enqueue(references)
+            refresh()
+
+        def clear_finished(btn):
+            pull_manager.clear_finished()
+            refresh()
+
+        load_btn.bind(on_press=load_file)
+        queue_btn.bind(on_press=queue_pulls)
+        clear_btn.bind(on_press=clear_finished)
+
+        popup = Popup(title="Pull Queue", content=layout, size_hint=(0.9, 0.9))
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+
+        # Poll the queue at the same fixed rate as single pulls
+        refresh_event = Clock.schedule_interval(refresh, 1.0 / PULL_UI_RATE)
+        popup.bind(on_dismiss=lambda x: refresh_event.cancel())
+        refresh()
+        popup.open()
 
     def go_to_images(self, instance):
         """Navigate to the Docker images management screen"""
@@ -451,40 +4387,27 @@ CMD ["python", "app.py"]
 
     def _check_docker_client(self):
         """Check if Docker client is available, show error if not"""
-        if not self.docker_available:
-            try:
-                import docker
-
-                self.docker_client = docker.from_env()
-                self.docker_available = True
-            except Exception as e:
-                error_popup = Popup(
-                    title="Docker Error",
-                    content=Label(
-                        text=f"Could not connect to Docker: {str(e)}\n\nPlease make sure Docker is installed and running."
-                    ),
-                    size_hint=(0.7, 0.3),
-                )
-                error_popup.open()
-                return False
+        error = self._connect_docker()
+        if error is not None:
+            error_popup = Popup(
+                title="Docker Error",
+                content=Label(
+                    text=f"Could not connect to Docker: {error}\n\nPlease make sure Docker is installed and running."
+                ),
+                size_hint=(0.7, 0.3),
+            )
+            error_popup.open()
+            return False
         return True
 
     def go_back(self, instance):
         self.manager.current = "service_selection"
 
 
-class DockerImagesScreen(Screen):
+class DockerImagesScreen(DockerClientMixin, Screen):
     def __init__(self, **kwargs):
         super(DockerImagesScreen, self).__init__(**kwargs)
 
-        # Try to initialize the Docker client
-        try:
-            self.docker_client = docker.from_env()
-            self.docker_available = True
-        except Exception as e:
-            self.docker_client = None
-            self.docker_available = False
-
         # Main container with padding
         self.layout = BoxLayout(orientation="vertical", spacing=20, padding=40)
         self.add_widget(self.layout)
@@ -504,7 +4427,7 @@ class DockerImagesScreen(Screen):
         refresh_btn = Button(
             text="Refresh", size_hint=(0.3, 1), background_color=(0.3, 0.7, 1, 1)
         )
-        refresh_btn.bind(on_press=lambda x: self.update_image_list())
+        refresh_btn.bind(on_press=lambda x: self.refresh_images())
         header.add_widget(refresh_btn)
 
         self.layout.add_widget(header)
@@ -513,6 +4436,34 @@ class DockerImagesScreen(Screen):
         self.status_label = Label(text="", size_hint=(1, None), height=30)
         self.layout.add_widget(self.status_label)
 
+        # Daemon-side filters and client-side sort
+        query_container = BoxLayout(
+            orientation="horizontal", size_hint=(1, None), height=40, spacing=10
+        )
+        self.filter_input = TextInput(
+            hint_text="Filters, e.g. reference=nginx:* dangling=true limit=20",
+            multiline=False,
+            size_hint=(0.55, 1),
+        )
+        self.filter_input.bind(on_text_validate=self.apply_filters)
+        query_container.add_widget(self.filter_input)
+
+        apply_btn = Button(
+            text="Apply", size_hint=(0.15, 1), background_color=(0.3, 0.7, 1, 1)
+        )
+        apply_btn.bind(on_press=self.apply_filters)
+        query_container.add_widget(apply_btn)
+
+        self.sort_spinner = Spinner(
+            text="Sort: Name",
+            values=["Sort: Name", "Sort: Newest", "Sort: Oldest", "Sort: Largest"],
+            size_hint=(0.3, 1),
+        )
+        self.sort_spinner.bind(text=lambda spinner, text: self.update_image_list())
+        query_container.add_widget(self.sort_spinner)
+
+        self.layout.add_widget(query_container)
+
         # Images list container
         images_container = BoxLayout(orientation="vertical", spacing=10)
 
@@ -524,12 +4475,9 @@ class DockerImagesScreen(Screen):
         headers.add_widget(Label(text="Actions", bold=True))
         images_container.add_widget(headers)
 
-        # Scroll view for image list
-        scroll = ScrollView()
-        self.image_list = GridLayout(cols=4, spacing=2, size_hint_y=None)
-        self.image_list.bind(minimum_height=self.image_list.setter("height"))
-        scroll.add_widget(self.image_list)
-        images_container.add_widget(scroll)
+        # Recycled list of images
+        self.image_list = create_table(ImageRow)
+        images_container.add_widget(self.image_list)
 
         self.layout.add_widget(images_container)
 
@@ -545,6 +4493,13 @@ class DockerImagesScreen(Screen):
         self.pull_btn.bind(on_press=self.pull_image)
         button_container.add_widget(self.pull_btn)
 
+        # Disk usage / prune button
+        self.disk_usage_btn = Button(
+            text="Disk Usage", size_hint=(0.5, 1), background_color=(0.3, 0.7, 1, 1)
+        )
+        self.disk_usage_btn.bind(on_press=self.show_disk_usage)
+        button_container.add_widget(self.disk_usage_btn)
+
         # Back button
         self.back_btn = Button(
             text="Back", size_hint=(0.5, 1), background_color=(0.3, 0.7, 1, 1)
@@ -554,234 +4509,105 @@ class DockerImagesScreen(Screen):
 
         self.layout.add_widget(button_container)
 
-    def on_enter(self):
-        self.update_image_list()
-
-    def update_image_list(self):
-        """Refresh the list of Docker images"""
-        self.image_list.clear_widgets()
-
-        if not self._check_docker_client():
-            self.status_label.text = "Docker is not available"
-            return
-
-        try:
-            # Change status
-            self.status_label.text = "Loading Docker images..."
-
-            # Get all Docker images
-            images = self.docker_client.images.list()
-
-            if not images:
-                self.status_label.text = "No Docker images found"
-                return
-
-            # Add each image to the list
-            for image in images:
-                # Get image tags and ID
-                if image.tags:
-                    for tag in image.tags:
-                        # Parse the repository and tag
-                        if ":" in tag:
-                            repo, tag_name = tag.split(":", 1)
-                        else:
-                            repo, tag_name = tag, "latest"
-
-                        # Add the repository
-                        self.image_list.add_widget(
-                            Label(text=repo, size_hint_y=None, height=40)
-                        )
-
-                        # Add the tag
-                        self.image_list.add_widget(
-                            Label(text=tag_name, size_hint_y=None, height=40)
-                        )
+        # Image ref (or short ID) -> text shown while a daemon call is running
+        self.pending = {}
 
-                        # Add the ID (shortened)
-                        image_id = image.short_id.replace("sha256:", "")
-                        self.image_list.add_widget(
-                            Label(text=image_id, size_hint_y=None, height=40)
-                        )
+        # Filters only narrow this screen's view of the shared model
+        self.image_filter = DaemonFilter(
+            docker_engine, query_images, "image", image_may_match, self._on_filter_changed
+        )
 
-                        # Add action buttons
-                        action_layout = BoxLayout(
-                            orientation="horizontal",
-                            spacing=5,
-                            size_hint_y=None,
-                            height=40,
-                        )
+        # Re-render whenever the shared model changes
+        docker_state.add_listener(self._on_state_changed)
 
-                        # Run button
-                        run_btn = Button(
-                            text="Run",
-                            size_hint_x=0.5,
-                            background_color=(0.3, 0.7, 1, 1),
-                        )
-                        run_btn.bind(
-                            on_press=lambda x, img=tag: self.run_container(img)
-                        )
-                        action_layout.add_widget(run_btn)
+    def on_enter(self):
+        # Connecting and loading happen on the subscriber thread
+        docker_state.start()
+        self.update_image_list()
 
-                        # Remove button
-                        remove_btn = Button(
-                            text="Remove",
-                            size_hint_x=0.5,
-                            background_color=(1, 0.3, 0.3, 1),
-                        )
-                        remove_btn.bind(
-                            on_press=lambda x, img=tag: self.remove_image(img)
-                        )
-                        action_layout.add_widget(remove_btn)
+    def _on_state_changed(self):
+        if self.manager is not None and self.manager.current == self.name:
+            if self.image_filter.affected(docker_state.last_changes, docker_state.get_image):
+                self.image_filter.refresh()
+            self.update_image_list()
 
-                        self.image_list.add_widget(action_layout)
-                else:
-                    # Handle untagged images
-                    self.image_list.add_widget(
-                        Label(text="<none>", size_hint_y=None, height=40)
-                    )
+    def _on_filter_changed(self):
+        if self.manager is not None and self.manager.current == self.name:
+            self.update_image_list()
 
-                    self.image_list.add_widget(
-                        Label(text="<none>", size_hint_y=None, height=40)
-                    )
+    def refresh_images(self):
+        """Force a fresh snapshot from the daemon"""
+        self.status_label.text = "Loading Docker images..."
+        docker_state.start()
+        docker_state.reload()
 
-                    # Add the ID (shortened)
-                    image_id = image.short_id.replace("sha256:", "")
-                    self.image_list.add_widget(
-                        Label(text=image_id, size_hint_y=None, height=40)
-                    )
+    def update_image_list(self):
+        """Render the list of Docker images from the shared model"""
+        if not docker_state.loaded:
+            self.image_list.data = []
+            if docker_state.last_error is not None:
+                self.status_label.text = (
+                    f"Error loading images: {docker_state.last_error}"
+                )
+            else:
+                self.status_label.text = "Loading Docker images..."
+            return
 
-                    # Add action buttons
-                    action_layout = BoxLayout(
-                        orientation="horizontal", spacing=5, size_hint_y=None, height=40
-                    )
+        if self.image_filter.error is not None:
+            self.image_list.data = []
+            self.status_label.text = f"Error filtering images: {self.image_filter.error}"
+            return
 
-                    # Remove button only for untagged images
-                    remove_btn = Button(
-                        text="Remove",
-                        size_hint_x=1.0,
-                        background_color=(1, 0.3, 0.3, 1),
-                    )
-                    remove_btn.bind(
-                        on_press=lambda x, img_id=image_id: self.remove_image_by_id(
-                            img_id
-                        )
+        images = sort_rows(
+            self.image_filter.view(docker_state.list_images),
+            self.sort_spinner.text,
+            IMAGE_SORT_KEYS,
+        )
+        rows = []
+        for image in images:
+            if image["tags"]:
+                for tag in image["tags"]:
+                    # Parse the repository and tag
+                    if ":" in tag:
+                        repo, tag_name = tag.split(":", 1)
+                    else:
+                        repo, tag_name = tag, "latest"
+                    rows.append(
+                        {
+                            "repo": repo,
+                            "tag": tag_name,
+                            "ref": tag,
+                            "id": image["id"],
+                            "short_id": image["short_id"],
+                            "pending": self.pending.get(tag),
+                        }
                     )
-                    action_layout.add_widget(remove_btn)
+            else:
+                # Handle untagged images
+                rows.append(
+                    {
+                        "repo": "<none>",
+                        "tag": "<none>",
+                        "ref": None,
+                        "id": image["id"],
+                        "short_id": image["short_id"],
+                        "pending": self.pending.get(image["short_id"]),
+                    }
+                )
 
-                    self.image_list.add_widget(action_layout)
+        # Only the visible rows are (re)bound to these dicts
+        self.image_list.data = [{"row": row, "screen": self} for row in rows]
 
+        if images:
             self.status_label.text = f"Found {len(images)} Docker images"
-
-        except Exception as e:
-            self.status_label.text = f"Error loading images: {str(e)}"
+        else:
+            self.status_label.text = "No Docker images found"
 
     def run_container(self, image_name):
-        """Run a new container from the selected image"""
+        """Run containers from the selected image"""
         if not self._check_docker_client():
             return
-
-        # Create popup to get container parameters
-        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
-
-        # Container name input (optional)
-        name_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=30)
-        name_layout.add_widget(Label(text="Container name:", size_hint_x=0.3))
-        name_input = TextInput(hint_text="Optional", size_hint_x=0.7)
-        name_layout.add_widget(name_input)
-        layout.add_widget(name_layout)
-
-        # Port mapping input
-        port_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=30)
-        port_layout.add_widget(Label(text="Port mapping:", size_hint_x=0.3))
-        port_input = TextInput(
-            hint_text="host:container (e.g. 8080:80)", size_hint_x=0.7
-        )
-        port_layout.add_widget(port_input)
-        layout.add_widget(port_layout)
-
-        # Command input
-        cmd_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=30)
-        cmd_layout.add_widget(Label(text="Command:", size_hint_x=0.3))
-        cmd_input = TextInput(hint_text="Optional", size_hint_x=0.7)
-        cmd_layout.add_widget(cmd_input)
-        layout.add_widget(cmd_layout)
-
-        # Status output
-        status_label = Label(
-            text=f"Running image: {image_name}", size_hint_y=None, height=30
-        )
-        layout.add_widget(status_label)
-
-        # Button layout
-        btn_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=50)
-
-        # Function to run container
-        def do_run_container(btn):
-            try:
-                # Parse parameters
-                name = name_input.text.strip() if name_input.text.strip() else None
-
-                # Parse port mapping
-                ports = {}
-                if port_input.text.strip():
-                    try:
-                        host_port, container_port = port_input.text.strip().split(":")
-                        ports = {container_port: host_port}
-                    except ValueError:
-                        status_label.text = "Invalid port format. Use host:container"
-                        return
-
-                # Get command
-                command = cmd_input.text.strip() if cmd_input.text.strip() else None
-
-                # Run container in a separate thread
-                def run_thread():
-                    try:
-                        container = self.docker_client.containers.run(
-                            image_name,
-                            name=name,
-                            ports=ports,
-                            command=command,
-                            detach=True,  # Run in background
-                        )
-                        Clock.schedule_once(
-                            lambda dt: setattr(
-                                status_label,
-                                "text",
-                                f"Container started: {container.short_id}",
-                            ),
-                            0,
-                        )
-                        # Update container list
-                        Clock.schedule_once(lambda dt: self.update_image_list(), 1)
-
-                    except Exception as e:
-                        Clock.schedule_once(
-                            lambda dt: setattr(
-                                status_label, "text", f"Error: {str(e)}"
-                            ),
-                            0,
-                        )
-
-                status_label.text = f"Starting container from {image_name}..."
-                threading.Thread(target=run_thread).start()
-
-            except Exception as e:
-                status_label.text = f"Error: {str(e)}"
-
-        # Create run and cancel buttons
-        run_btn = Button(text="Run Container")
-        run_btn.bind(on_press=do_run_container)
-        cancel_btn = Button(text="Close")
-        cancel_btn.bind(on_press=lambda x: popup.dismiss())
-
-        btn_layout.add_widget(run_btn)
-        btn_layout.add_widget(cancel_btn)
-        layout.add_widget(btn_layout)
-
-        # Create and open popup
-        popup = Popup(title="Run Container", content=layout, size_hint=(0.8, 0.6))
-        popup.open()
+        show_run_popup(self.docker_client, image_name)
 
     def remove_image(self, image_name):
         """Remove a Docker image by name"""
@@ -802,14 +4628,8 @@ class DockerImagesScreen(Screen):
 
         # Function to remove image
         def do_remove_image(btn):
-            try:
-                self.docker_client.images.remove(image_name, force=True)
-                self.status_label.text = f"Successfully removed image {image_name}"
-                self.update_image_list()
-                popup.dismiss()
-            except Exception as e:
-                self.status_label.text = f"Error removing image: {str(e)}"
-                popup.dismiss()
+            popup.dismiss()
+            self._remove_image_async(image_name)
 
         # Create buttons
         cancel_btn = Button(text="Cancel")
@@ -845,14 +4665,8 @@ class DockerImagesScreen(Screen):
 
         # Function to remove image
         def do_remove_image(btn):
-            try:
-                self.docker_client.images.remove(image_id, force=True)
-                self.status_label.text = f"Successfully removed image {image_id}"
-                self.update_image_list()
-                popup.dismiss()
-            except Exception as e:
-                self.status_label.text = f"Error removing image: {str(e)}"
-                popup.dismiss()
+            popup.dismiss()
+            self._remove_image_async(image_id)
 
         # Create buttons
         cancel_btn = Button(text="Cancel")
@@ -869,6 +4683,277 @@ class DockerImagesScreen(Screen):
         popup = Popup(title="Confirm Remove", content=content, size_hint=(0.7, 0.3))
         popup.open()
 
+    def _remove_image_async(self, image_ref):
+        """Remove an image on the worker pool, marking its row as pending"""
+        self.pending[image_ref] = "Removing..."
+        self.update_image_list()
+
+        def on_success(result):
+            self.pending.pop(image_ref, None)
+            self.update_image_list()
+            self.status_label.text = f"Successfully removed image {image_ref}"
+
+        def on_error(error):
+            self.pending.pop(image_ref, None)
+            self.update_image_list()
+            self.status_label.text = f"Error removing image: {str(error)}"
+
+        docker_engine.submit(
+            lambda: self.docker_client.api.remove_image(image_ref, force=True),
+            on_success=on_success,
+            on_error=on_error,
+        )
+
+    def apply_filters(self, instance):
+        """Ask the daemon for matching images only"""
+        try:
+            filters = parse_filter_text(self.filter_input.text, IMAGE_FILTER_KEYS + ("limit",))
+            limit = int(filters.pop("limit")[-1]) if "limit" in filters else None
+        except ValueError as e:
+            self.status_label.text = str(e)
+            return
+        self.status_label.text = "Loading Docker images..."
+        docker_state.start()
+        self.image_filter.set(filters, limit)
+
+    def show_image_details(self, image_id):
+        """Show an image's layers and how much of it is shared with other images"""
+        if not self._check_docker_client():
+            return
+
+        image = None
+        for candidate in docker_state.list_images():
+            if candidate["id"] == image_id:
+                image = candidate
+        if image is None:
+            self.status_label.text = "Error showing image: image not found"
+            return
+
+        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
+
+        info_text = f"Tags: {', '.join(image['tags']) or '<none>'}\n"
+        info_text += f"ID: {image['short_id']}\n"
+        info_text += f"Size: {format_bytes(image['size'])}"
+        info_label = Label(text=info_text, size_hint_y=None, height=70, halign="left", valign="top")
+        info_label.bind(size=info_label.setter("text_size"))
+        layout.add_widget(info_label)
+
+        sharing_label = Label(text="Reading layers...", size_hint_y=None, height=50, halign="left", valign="top")
+        sharing_label.bind(size=sharing_label.setter("text_size"))
+        layout.add_widget(sharing_label)
+
+        # Layers, bottom first
+        headers = GridLayout(cols=3, size_hint_y=None, height=30, spacing=2)
+        headers.add_widget(Label(text="Layer", bold=True))
+        headers.add_widget(Label(text="Size", bold=True))
+        headers.add_widget(Label(text="Shared with", bold=True))
+        layout.add_widget(headers)
+        layers_table = create_table(JobRow, row_height=30)
+        layout.add_widget(layers_table)
+
+        close_btn = Button(text="Close", size_hint_y=None, height=40)
+        layout.add_widget(close_btn)
+
+        def load():
+            # Sharing counts every local image, not just the filtered list;
+            # only images not seen before are inspected
+            client = self.docker_client
+            image_ids = [i["Id"] for i in client.api.images()]
+            return layer_index.sync(client, image_ids)
+
+        def show_layers(index):
+            unique, shared = index.image_sizes(image_id)
+            sharing_label.text = f"Unique: {format_bytes(unique)}    Shared: {format_bytes(shared)}"
+            base = index.base_image(image_id)
+            if base is not None:
+                sharing_label.text += f"\nBuilt on: {docker_state.image_name(base, base.split(':')[-1][:12])}"
+
+            rows = []
+            for position, (chain_id, size, others) in enumerate(index.describe_layers(image_id), 1):
+                names = [docker_state.image_name(o, o.split(":")[-1][:12]) for o in others]
+                if not names:
+                    detail = "unique to this image"
+                elif len(names) <= 3:
+                    detail = ", ".join(names)
+                else:
+                    detail = f"{', '.join(names[:3])} and {len(names) - 3} more"
+                rows.append(
+                    {
+                        "row": {
+                            "name": f"{position}. {chain_id.split(':')[-1][:12]}",
+                            "status": format_bytes(size),
+                            "detail": detail,
+                        }
+                    }
+                )
+            layers_table.data = rows
+
+        def show_error(error):
+            sharing_label.text = f"Error reading layers: {str(error)}"
+
+        docker_engine.submit(load, on_success=show_layers, on_error=show_error)
+
+        popup = Popup(
+            title=f"Image - {image['tags'][0] if image['tags'] else image['short_id']}",
+            content=layout,
+            size_hint=(0.9, 0.9),
+        )
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+        popup.open()
+
+    def show_disk_usage(self, instance):
+        """Show what uses disk space and prune unused images"""
+        if not self._check_docker_client():
+            return
+
+        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
+
+        # System df summary
+        summary_label = Label(
+            text="Loading disk usage...", size_hint_y=None, height=100, halign="left", valign="top"
+        )
+        summary_label.bind(size=summary_label.setter("text_size"))
+        layout.add_widget(summary_label)
+
+        # Prune criteria
+        criteria_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=40, spacing=10)
+        kind_spinner = Spinner(
+            text="Dangling only", values=["Dangling only", "All unused"], size_hint_x=0.25
+        )
+        criteria_layout.add_widget(kind_spinner)
+        age_input = TextInput(hint_text="Older than (days)", multiline=False, size_hint_x=0.25)
+        criteria_layout.add_widget(age_input)
+        size_input = TextInput(hint_text="Larger than (MB)", multiline=False, size_hint_x=0.25)
+        criteria_layout.add_widget(size_input)
+        find_btn = Button(text="Find Candidates", size_hint_x=0.25, background_color=(0.3, 0.7, 1, 1))
+        criteria_layout.add_widget(find_btn)
+        layout.add_widget(criteria_layout)
+
+        build_cache_toggle = ToggleButton(
+            text="Also prune unused build cache", size_hint_y=None, height=40
+        )
+        layout.add_widget(build_cache_toggle)
+
+        # Candidate images
+        headers = GridLayout(cols=3, size_hint_y=None, height=30, spacing=2)
+        headers.add_widget(Label(text="Image", bold=True))
+        headers.add_widget(Label(text="Size", bold=True))
+        headers.add_widget(Label(text="Details", bold=True))
+        layout.add_widget(headers)
+        candidates_table = create_table(JobRow, row_height=30)
+        layout.add_widget(candidates_table)
+
+        prune_status = Label(text="", size_hint_y=None, height=30)
+        layout.add_widget(prune_status)
+
+        btn_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=50, spacing=10)
+        prune_btn = Button(text="Prune", background_color=(1, 0.3, 0.3, 1), disabled=True)
+        close_btn = Button(text="Close")
+        btn_layout.add_widget(prune_btn)
+        btn_layout.add_widget(close_btn)
+        layout.add_widget(btn_layout)
+
+        current = {"df": None, "graph": None, "candidates": []}
+
+        def load():
+            client = self.docker_client
+            df = client.api.df()
+            graph = layer_index.sync(client, [i["Id"] for i in df.get("Images") or []])
+            return df, graph
+
+        def show_usage(result):
+            current["df"], current["graph"] = result
+            summary_label.text = "\n".join(summarize_disk_usage(current["df"]))
+            find_candidates()
+
+        def show_error(error):
+            summary_label.text = f"Error reading disk usage: {str(error)}"
+
+        def find_candidates(*args):
+            if current["df"] is None:
+                return
+            try:
+                days = float(age_input.text) if age_input.text.strip() else None
+                megabytes = float(size_input.text) if size_input.text.strip() else None
+            except ValueError:
+                prune_status.text = "Age and size must be numbers"
+                return
+
+            candidates = select_prune_candidates(
+                current["df"].get("Images") or [],
+                dangling_only=kind_spinner.text == "Dangling only",
+                older_than=days * 86400 if days is not None else None,
+                larger_than=megabytes * 1024 * 1024 if megabytes is not None else None,
+            )
+            current["candidates"] = candidates
+            graph = current["graph"]
+
+            rows = []
+            for image in sorted(candidates, key=lambda i: i.get("Size", 0), reverse=True):
+                tags = [t for t in image.get("RepoTags") or [] if t != "<none>:<none>"]
+                unique, shared = graph.image_sizes(image["Id"])
+                age = (time.time() - image.get("Created", time.time())) / 86400
+                rows.append(
+                    {
+                        "row": {
+                            "name": tags[0] if tags else image["Id"].split(":")[-1][:12],
+                            "status": format_bytes(image.get("Size", 0)),
+                            "detail": f"{age:.0f} days old, {format_bytes(unique)} unique",
+                        }
+                    }
+                )
+            candidates_table.data = rows
+
+            # Layers shared only among the candidates are freed as well
+            reclaimable = graph.reclaimable(i["Id"] for i in candidates)
+            prune_status.text = (
+                f"{len(candidates)} candidates - {format_bytes(reclaimable)} reclaimable"
+            )
+            prune_btn.disabled = not candidates and build_cache_toggle.state != "down"
+
+        def do_prune(btn):
+            image_ids = [i["Id"] for i in current["candidates"]]
+            prune_cache = build_cache_toggle.state == "down"
+            graph = current["graph"]
+            prune_btn.disabled = True
+            prune_status.text = f"Pruning {len(image_ids)} images..."
+
+            def prune():
+                client = self.docker_client
+                results = prune_images(client, graph, image_ids)
+                freed = graph.reclaimable(i for i, error in results.items() if not error)
+                if prune_cache:
+                    freed += client.api.prune_builds().get("SpaceReclaimed") or 0
+                return results, freed
+
+            def on_pruned(result):
+                results, freed = result
+                failed = [i for i, error in results.items() if error]
+                prune_status.text = (
+                    f"Removed {len(results) - len(failed)} of {len(results)} images, "
+                    f"freed {format_bytes(freed)}"
+                )
+                if failed:
+                    prune_status.text += f" - {len(failed)} failed: {results[failed[0]]}"
+                summary_label.text = "Loading disk usage..."
+                docker_engine.submit(load, on_success=show_usage, on_error=show_error)
+
+            def on_prune_error(error):
+                prune_status.text = f"Error pruning: {str(error)}"
+                prune_btn.disabled = False
+
+            docker_engine.submit(prune, on_success=on_pruned, on_error=on_prune_error)
+
+        find_btn.bind(on_press=find_candidates)
+        build_cache_toggle.bind(state=find_candidates)
+        prune_btn.bind(on_press=do_prune)
+
+        docker_engine.submit(load, on_success=show_usage, on_error=show_error)
+
+        popup = Popup(title="Disk Usage", content=layout, size_hint=(0.9, 0.9))
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+        popup.open()
+
     def pull_image(self, instance):
         """Pull a Docker image"""
         if not self._check_docker_client():
@@ -889,6 +4974,12 @@ class DockerImagesScreen(Screen):
         )
         layout.add_widget(status_label)
 
+        # Progress
+        progress_bar = ProgressBar(max=100, value=0, size_hint_y=None, height=20)
+        progress_label = Label(text="", size_hint_y=None, height=30)
+        layout.add_widget(progress_bar)
+        layout.add_widget(progress_label)
+
         # Button layout
         btn_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=50)
 
@@ -903,31 +4994,24 @@ class DockerImagesScreen(Screen):
             status_label.text = f"Pulling image {image_name}..."
             pull_btn.disabled = True
 
-            # Pull image in a separate thread
-            def pull_thread():
-                try:
-                    self.docker_client.images.pull(image_name)
-
-                    Clock.schedule_once(
-                        lambda dt: setattr(
-                            status_label, "text", f"Successfully pulled {image_name}"
-                        ),
-                        0,
-                    )
-                    Clock.schedule_once(
-                        lambda dt: setattr(pull_btn, "disabled", False), 0
-                    )
-                    Clock.schedule_once(lambda dt: self.update_image_list(), 1)
-
-                except Exception as e:
-                    Clock.schedule_once(
-                        lambda dt: setattr(status_label, "text", f"Error: {str(e)}"), 0
-                    )
-                    Clock.schedule_once(
-                        lambda dt: setattr(pull_btn, "disabled", False), 0
-                    )
+            # The shared queue dedupes this against pulls from other popups
+            job = pull_manager.enqueue([image_name])[0]
+            progress = job.progress
+            progress_bar.value = 0
+            ui_event = track_pull_progress(progress, progress_bar, progress_label)
+
+            def finish(job):
+                ui_event.cancel()
+                snapshot = progress.snapshot()
+                progress_bar.value = snapshot["fraction"] * 100
+                progress_label.text = progress.describe(snapshot)
+                if job.status == "done":
+                    status_label.text = f"Successfully pulled {image_name}"
+                else:
+                    status_label.text = f"Error: {job.message}"
+                pull_btn.disabled = False
 
-            threading.Thread(target=pull_thread).start()
+            job.add_done_callback(finish)
 
         # Create pull and cancel buttons
         pull_btn = Button(text="Pull Image")
@@ -941,18 +5025,15 @@ class DockerImagesScreen(Screen):
         layout.add_widget(btn_layout)
 
         # Create and open popup
-        popup = Popup(title="Pull Docker Image", content=layout, size_hint=(0.8, 0.4))
+        popup = Popup(title="Pull Docker Image", content=layout, size_hint=(0.8, 0.5))
         popup.open()
 
     def _check_docker_client(self):
         """Check if Docker client is available"""
-        if not self.docker_available:
-            try:
-                self.docker_client = docker.from_env()
-                self.docker_available = True
-            except Exception as e:
-                self.status_label.text = f"Docker not available: {str(e)}"
-                return False
+        error = self._connect_docker()
+        if error is not None:
+            self.status_label.text = f"Docker not available: {error}"
+            return False
         return True
 
     def go_back(self, instance):
@@ -960,18 +5041,10 @@ class DockerImagesScreen(Screen):
         self.manager.current = "docker"
 
 
-class DockerContainersScreen(Screen):
+class DockerContainersScreen(DockerClientMixin, Screen):
     def __init__(self, **kwargs):
         super(DockerContainersScreen, self).__init__(**kwargs)
 
-        # Try to initialize the Docker client
-        try:
-            self.docker_client = docker.from_env()
-            self.docker_available = True
-        except Exception as e:
-            self.docker_client = None
-            self.docker_available = False
-
         # Main container with padding
         self.layout = BoxLayout(orientation="vertical", spacing=20, padding=40)
         self.add_widget(self.layout)
@@ -989,11 +5062,18 @@ class DockerContainersScreen(Screen):
 
         # Refresh button
         refresh_btn = Button(
-            text="Refresh", size_hint=(0.3, 1), background_color=(0.3, 0.7, 1, 1)
+            text="Refresh", size_hint=(0.15, 1), background_color=(0.3, 0.7, 1, 1)
         )
-        refresh_btn.bind(on_press=lambda x: self.update_container_list())
+        refresh_btn.bind(on_press=lambda x: self.refresh_containers())
         header.add_widget(refresh_btn)
 
+        # Stats button
+        stats_btn = Button(
+            text="Stats", size_hint=(0.15, 1), background_color=(0.3, 0.7, 1, 1)
+        )
+        stats_btn.bind(on_press=lambda x: setattr(self.manager, "current", "docker_stats"))
+        header.add_widget(stats_btn)
+
         self.layout.add_widget(header)
 
         # Filter container
@@ -1007,21 +5087,85 @@ class DockerContainersScreen(Screen):
             size_hint=(0.5, 1),
             background_color=(0.3, 0.7, 1, 1),
         )
-        self.show_all = False
-        self.show_all_btn.bind(on_press=self.toggle_show_all)
-        filter_container.add_widget(self.show_all_btn)
+        self.show_all = False
+        self.show_all_btn.bind(on_press=self.toggle_show_all)
+        filter_container.add_widget(self.show_all_btn)
+
+        # Status label
+        self.status_label = Label(text="", size_hint=(0.5, 1))
+        filter_container.add_widget(self.status_label)
+
+        self.layout.add_widget(filter_container)
+
+        # Daemon-side filters and client-side sort
+        query_container = BoxLayout(
+            orientation="horizontal", size_hint=(1, None), height=40, spacing=10
+        )
+        self.filter_input = TextInput(
+            hint_text="Filters, e.g. name=web status=exited label=env=prod limit=50",
+            multiline=False,
+            size_hint=(0.55, 1),
+        )
+        self.filter_input.bind(on_text_validate=self.apply_filters)
+        query_container.add_widget(self.filter_input)
+
+        apply_btn = Button(
+            text="Apply", size_hint=(0.15, 1), background_color=(0.3, 0.7, 1, 1)
+        )
+        apply_btn.bind(on_press=self.apply_filters)
+        query_container.add_widget(apply_btn)
 
-        # Status label
-        self.status_label = Label(text="", size_hint=(0.5, 1))
-        filter_container.add_widget(self.status_label)
+        self.sort_spinner = Spinner(
+            text="Sort: Name",
+            values=["Sort: Name", "Sort: Newest", "Sort: Oldest", "Sort: Status"],
+            size_hint=(0.3, 1),
+        )
+        self.sort_spinner.bind(text=lambda spinner, text: self.update_container_list())
+        query_container.add_widget(self.sort_spinner)
 
-        self.layout.add_widget(filter_container)
+        self.layout.add_widget(query_container)
+
+        # Bulk actions on the selected containers
+        bulk_container = BoxLayout(
+            orientation="horizontal", size_hint=(1, None), height=40, spacing=5
+        )
+        self.selection_label = Label(text="0 selected", size_hint=(0.12, 1))
+        bulk_container.add_widget(self.selection_label)
+
+        select_all_btn = Button(text="Select All", size_hint=(0.12, 1))
+        select_all_btn.bind(on_press=lambda x: self.select_all(True))
+        bulk_container.add_widget(select_all_btn)
+
+        clear_btn = Button(text="Clear", size_hint=(0.1, 1))
+        clear_btn.bind(on_press=lambda x: self.select_all(False))
+        bulk_container.add_widget(clear_btn)
+
+        for action, color in (
+            ("Stop", (1, 0.5, 0, 1)),
+            ("Start", (0, 0.7, 0, 1)),
+            ("Restart", (0.3, 0.7, 1, 1)),
+            ("Kill", (1, 0.3, 0.3, 1)),
+            ("Remove", (1, 0.3, 0.3, 1)),
+        ):
+            action_btn = Button(text=action, size_hint=(0.1, 1), background_color=color)
+            action_btn.bind(on_press=lambda x, a=action: self.bulk_action(a))
+            bulk_container.add_widget(action_btn)
+
+        self.stop_timeout_input = TextInput(
+            hint_text=f"Stop timeout (s): {BULK_STOP_TIMEOUT}",
+            multiline=False,
+            size_hint=(0.16, 1),
+        )
+        bulk_container.add_widget(self.stop_timeout_input)
+
+        self.layout.add_widget(bulk_container)
 
         # Containers list container
         containers_container = BoxLayout(orientation="vertical", spacing=10)
 
         # Column headers
-        headers = GridLayout(cols=5, size_hint_y=None, height=40, spacing=2)
+        headers = GridLayout(cols=6, size_hint_y=None, height=40, spacing=2)
+        headers.add_widget(Label(text="", size_hint_x=0.3))
         headers.add_widget(Label(text="Container ID", bold=True))
         headers.add_widget(Label(text="Name", bold=True))
         headers.add_widget(Label(text="Image", bold=True))
@@ -1029,12 +5173,9 @@ class DockerContainersScreen(Screen):
         headers.add_widget(Label(text="Actions", bold=True))
         containers_container.add_widget(headers)
 
-        # Scroll view for container list
-        scroll = ScrollView()
-        self.container_list = GridLayout(cols=5, spacing=2, size_hint_y=None)
-        self.container_list.bind(minimum_height=self.container_list.setter("height"))
-        scroll.add_widget(self.container_list)
-        containers_container.add_widget(scroll)
+        # Recycled list of containers
+        self.container_list = create_table(ContainerRow)
+        containers_container.add_widget(self.container_list)
 
         self.layout.add_widget(containers_container)
 
@@ -1052,6 +5193,24 @@ class DockerContainersScreen(Screen):
         self.run_btn.bind(on_press=self.run_container)
         button_container.add_widget(self.run_btn)
 
+        # Log search button
+        self.search_logs_btn = Button(
+            text="Search Logs",
+            size_hint=(0.5, 1),
+            background_color=(0.3, 0.7, 1, 1),
+        )
+        self.search_logs_btn.bind(on_press=self.search_logs)
+        button_container.add_widget(self.search_logs_btn)
+
+        # Combined logs button
+        self.combined_logs_btn = Button(
+            text="Combined Logs",
+            size_hint=(0.5, 1),
+            background_color=(0.3, 0.7, 1, 1),
+        )
+        self.combined_logs_btn.bind(on_press=self.view_combined_logs)
+        button_container.add_widget(self.combined_logs_btn)
+
         # Back button
         self.back_btn = Button(
             text="Back", size_hint=(0.5, 1), background_color=(0.3, 0.7, 1, 1)
@@ -1061,9 +5220,44 @@ class DockerContainersScreen(Screen):
 
         self.layout.add_widget(button_container)
 
+        # Container ID -> text shown while a daemon call is running
+        self.pending = {}
+
+        # Container IDs ticked for bulk actions
+        self.selected = set()
+
+        # Filters only narrow this screen's view of the shared model
+        self.container_filter = DaemonFilter(
+            docker_engine, query_containers, "container", container_may_match,
+            self._on_filter_changed,
+        )
+
+        # Re-render whenever the shared model changes
+        docker_state.add_listener(self._on_state_changed)
+
     def on_enter(self):
+        # Connecting and loading happen on the subscriber thread
+        docker_state.start()
         self.update_container_list()
 
+    def _on_state_changed(self):
+        if self.manager is not None and self.manager.current == self.name:
+            if self.container_filter.affected(
+                docker_state.last_changes, docker_state.get_container
+            ):
+                self.container_filter.refresh()
+            self.update_container_list()
+
+    def _on_filter_changed(self):
+        if self.manager is not None and self.manager.current == self.name:
+            self.update_container_list()
+
+    def refresh_containers(self):
+        """Force a fresh snapshot from the daemon"""
+        self.status_label.text = "Loading Docker containers..."
+        docker_state.start()
+        docker_state.reload()
+
     def toggle_show_all(self, instance):
         """Toggle showing all containers vs only running ones"""
         self.show_all = not self.show_all
@@ -1073,135 +5267,241 @@ class DockerContainersScreen(Screen):
         self.update_container_list()
 
     def update_container_list(self):
-        """Refresh the list of Docker containers"""
-        self.container_list.clear_widgets()
+        """Render the list of Docker containers from the shared model"""
+        if not docker_state.loaded:
+            self.container_list.data = []
+            if docker_state.last_error is not None:
+                self.status_label.text = (
+                    f"Error loading containers: {docker_state.last_error}"
+                )
+            else:
+                self.status_label.text = "Loading Docker containers..."
+            return
+
+        if self.container_filter.error is not None:
+            self.container_list.data = []
+            self.status_label.text = f"Error filtering containers: {self.container_filter.error}"
+            return
+
+        containers = self.container_filter.view(docker_state.list_containers)
+        if not self.show_all:
+            containers = [c for c in containers if c["status"] == "running"]
+        if self.container_filter.active:
+            # Matches keep their own row; only image names follow the model
+            for container in containers:
+                container["image"] = docker_state.image_name(
+                    container["image_id"], container["image_ref"]
+                )
+        containers = sort_rows(containers, self.sort_spinner.text, CONTAINER_SORT_KEYS)
+
+        # Containers that disappeared can no longer be selected
+        self.selected &= set(c["id"] for c in containers)
+        self._update_selection_label()
+
+        # Only the visible rows are (re)bound to these dicts
+        self.container_list.data = [
+            {
+                "row": dict(
+                    container,
+                    pending=self.pending.get(container["id"]),
+                    selected=container["id"] in self.selected,
+                ),
+                "screen": self,
+            }
+            for container in containers
+        ]
+
+        state = "all" if self.show_all else "running"
+        if containers:
+            self.status_label.text = f"Found {len(containers)} {state} containers"
+        else:
+            self.status_label.text = f"No {state} containers found"
+
+    def apply_filters(self, instance):
+        """Ask the daemon for matching containers only"""
+        try:
+            filters = parse_filter_text(
+                self.filter_input.text, CONTAINER_FILTER_KEYS + ("limit",)
+            )
+            limit = int(filters.pop("limit")[-1]) if "limit" in filters else None
+        except ValueError as e:
+            self.status_label.text = str(e)
+            return
+        self.status_label.text = "Loading Docker containers..."
+        docker_state.start()
+        self.container_filter.set(filters, limit)
+
+    def _container_name(self, container_id):
+        container = docker_state.get_container(container_id)
+        return container["name"] if container is not None else container_id[:12]
+
+    def _update_selection_label(self):
+        self.selection_label.text = f"{len(self.selected)} selected"
+
+    def set_selected(self, container_id, selected):
+        if selected:
+            self.selected.add(container_id)
+        else:
+            self.selected.discard(container_id)
+        self._update_selection_label()
+
+    def select_all(self, selected):
+        """Tick or clear every container in the current list"""
+        if selected:
+            self.selected = set(item["row"]["id"] for item in self.container_list.data)
+        else:
+            self.selected = set()
+        self.update_container_list()
 
+    def bulk_action(self, action):
+        """Run one action on all selected containers"""
         if not self._check_docker_client():
-            self.status_label.text = "Docker is not available"
             return
 
+        container_ids = [
+            item["row"]["id"] for item in self.container_list.data
+            if item["row"]["id"] in self.selected and item["row"]["id"] not in self.pending
+        ]
+        if not container_ids:
+            self.status_label.text = "No containers selected"
+            return
+
+        timeout_text = self.stop_timeout_input.text.strip()
         try:
-            # Change status
-            self.status_label.text = "Loading Docker containers..."
+            timeout = int(timeout_text) if timeout_text else BULK_STOP_TIMEOUT
+        except ValueError:
+            self.status_label.text = "Stop timeout must be a whole number of seconds"
+            return
 
-            # Get all Docker containers
-            containers = self.docker_client.containers.list(all=self.show_all)
+        if action in ("Kill", "Remove"):
+            self._confirm_bulk_action(action, container_ids, timeout)
+        else:
+            self._run_bulk_action(action, container_ids, timeout)
 
-            if not containers:
-                state = "all" if self.show_all else "running"
-                self.status_label.text = f"No {state} containers found"
-                return
+    def _confirm_bulk_action(self, action, container_ids, timeout):
+        content = BoxLayout(orientation="vertical", padding=10, spacing=10)
+        content.add_widget(
+            Label(
+                text=f"Are you sure you want to {action.lower()} {len(container_ids)} containers?\nThis action cannot be undone."
+            )
+        )
 
-            # Add each container to the list
-            for container in containers:
-                # Add container ID (shortened)
-                container_id = container.short_id
-                self.container_list.add_widget(
-                    Label(text=container_id, size_hint_y=None, height=40)
-                )
+        btn_layout = BoxLayout(
+            orientation="horizontal", spacing=10, size_hint_y=None, height=50
+        )
 
-                # Add container name
-                self.container_list.add_widget(
-                    Label(text=container.name, size_hint_y=None, height=40)
-                )
+        def do_action(btn):
+            popup.dismiss()
+            self._run_bulk_action(action, container_ids, timeout)
 
-                # Add image name (shortened if necessary)
-                image_name = (
-                    container.image.tags[0]
-                    if container.image.tags
-                    else container.image.short_id
-                )
-                if len(image_name) > 20:
-                    image_name = image_name[:17] + "..."
+        cancel_btn = Button(text="Cancel")
+        cancel_btn.bind(on_press=lambda x: popup.dismiss())
 
-                self.container_list.add_widget(
-                    Label(text=image_name, size_hint_y=None, height=40)
-                )
+        action_btn = Button(text=action, background_color=(1, 0.3, 0.3, 1))
+        action_btn.bind(on_press=do_action)
 
-                # Add status
-                status = container.status
-                status_color = (0, 1, 0, 1) if status == "running" else (1, 0.5, 0, 1)
-                status_label = Label(
-                    text=status, size_hint_y=None, height=40, color=status_color
-                )
-                self.container_list.add_widget(status_label)
+        btn_layout.add_widget(cancel_btn)
+        btn_layout.add_widget(action_btn)
+        content.add_widget(btn_layout)
 
-                # Add action buttons
-                action_layout = BoxLayout(
-                    orientation="horizontal", spacing=5, size_hint_y=None, height=40
-                )
+        popup = Popup(title=f"Confirm {action}", content=content, size_hint=(0.7, 0.3))
+        popup.open()
 
-                # Different buttons depending on container state
-                if container.status == "running":
-                    # Stop button
-                    stop_btn = Button(
-                        text="Stop", size_hint_x=0.5, background_color=(1, 0.5, 0, 1)
-                    )
-                    stop_btn.bind(
-                        on_press=lambda x, c=container.id: self.stop_container(c)
-                    )
-                    action_layout.add_widget(stop_btn)
+    def _run_bulk_action(self, action, container_ids, timeout):
+        verb, done = BULK_ACTIONS[action][:2]
+        names = dict((cid, self._container_name(cid)) for cid in container_ids)
+        for container_id in container_ids:
+            self.pending[container_id] = f"{verb}..."
+        self.update_container_list()
+        self.status_label.text = f"{verb} {len(container_ids)} containers..."
 
-                    # Logs button
-                    logs_btn = Button(
-                        text="Logs", size_hint_x=0.5, background_color=(0.3, 0.7, 1, 1)
-                    )
-                    logs_btn.bind(on_press=lambda x, c=container.id: self.view_logs(c))
-                    action_layout.add_widget(logs_btn)
-                else:
-                    # Start button
-                    start_btn = Button(
-                        text="Start", size_hint_x=0.5, background_color=(0, 0.7, 0, 1)
-                    )
-                    start_btn.bind(
-                        on_press=lambda x, c=container.id: self.start_container(c)
-                    )
-                    action_layout.add_widget(start_btn)
+        def run():
+            results = run_bulk_action(self.docker_client, container_ids, action, timeout)
+            # One filtered list call brings the model up to date for all of
+            # them; the event stream catches up on its own if this fails
+            try:
+                docker_state.refresh_containers(container_ids)
+            except Exception:
+                pass
+            return results
+
+        def on_success(results):
+            for container_id in container_ids:
+                self.pending.pop(container_id, None)
+            failed = dict((cid, error) for cid, error in results.items() if error)
+            self.update_container_list()
 
-                    # Remove button
-                    remove_btn = Button(
-                        text="Remove",
-                        size_hint_x=0.5,
-                        background_color=(1, 0.3, 0.3, 1),
-                    )
-                    remove_btn.bind(
-                        on_press=lambda x, c=container.id: self.remove_container(c)
-                    )
-                    action_layout.add_widget(remove_btn)
+            self.status_label.text = (
+                f"{done} {len(results) - len(failed)} of {len(results)} containers"
+            )
+            if failed:
+                self.status_label.text += f", {len(failed)} failed"
+                self._show_bulk_failures(action, names, failed)
 
-                self.container_list.add_widget(action_layout)
+        def on_error(error):
+            for container_id in container_ids:
+                self.pending.pop(container_id, None)
+            self.update_container_list()
+            self.status_label.text = f"Error {verb.lower()} containers: {str(error)}"
 
-            state = "all" if self.show_all else "running"
-            self.status_label.text = f"Found {len(containers)} {state} containers"
+        docker_engine.submit(run, on_success=on_success, on_error=on_error)
 
-        except Exception as e:
-            self.status_label.text = f"Error loading containers: {str(e)}"
+    def _show_bulk_failures(self, action, names, failed):
+        """List the containers a bulk action could not handle"""
+        content = BoxLayout(orientation="vertical", padding=10, spacing=10)
+        output = TextInput(
+            readonly=True,
+            text="\n".join(f"{names.get(cid, cid[:12])}: {error}" for cid, error in failed.items()),
+        )
+        content.add_widget(output)
+        close_btn = Button(text="Close", size_hint_y=None, height=40)
+        content.add_widget(close_btn)
+        popup = Popup(
+            title=f"{action} failed for {len(failed)} containers",
+            content=content,
+            size_hint=(0.8, 0.6),
+        )
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+        popup.open()
 
-    def stop_container(self, container_id):
-        """Stop a running container"""
+    def _container_action(self, container_id, verb, done, action):
+        """Run a daemon call for one container on the worker pool"""
         if not self._check_docker_client():
             return
 
-        try:
-            container = self.docker_client.containers.get(container_id)
-            container.stop()
-            self.status_label.text = f"Stopped container {container.name}"
+        name = self._container_name(container_id)
+        self.pending[container_id] = f"{verb}..."
+        self.update_container_list()
+
+        def on_success(result):
+            self.pending.pop(container_id, None)
             self.update_container_list()
-        except Exception as e:
-            self.status_label.text = f"Error stopping container: {str(e)}"
+            self.status_label.text = f"{done} container {name}"
+
+        def on_error(error):
+            self.pending.pop(container_id, None)
+            self.update_container_list()
+            self.status_label.text = f"Error {verb.lower()} container: {str(error)}"
+
+        docker_engine.submit(action, on_success=on_success, on_error=on_error)
+
+    def stop_container(self, container_id):
+        """Stop a running container"""
+        self._container_action(
+            container_id,
+            "Stopping",
+            "Stopped",
+            lambda: self.docker_client.api.stop(container_id),
+        )
 
     def start_container(self, container_id):
         """Start a stopped container"""
-        if not self._check_docker_client():
-            return
-
-        try:
-            container = self.docker_client.containers.get(container_id)
-            container.start()
-            self.status_label.text = f"Started container {container.name}"
-            self.update_container_list()
-        except Exception as e:
-            self.status_label.text = f"Error starting container: {str(e)}"
+        self._container_action(
+            container_id,
+            "Starting",
+            "Started",
+            lambda: self.docker_client.api.start(container_id),
+        )
 
     def remove_container(self, container_id):
         """Remove a stopped container"""
@@ -1210,20 +5510,11 @@ class DockerContainersScreen(Screen):
 
         # Confirm dialog
         content = BoxLayout(orientation="vertical", padding=10, spacing=10)
-
-        try:
-            container = self.docker_client.containers.get(container_id)
-            content.add_widget(
-                Label(
-                    text=f"Are you sure you want to remove container {container.name}?\nThis action cannot be undone."
-                )
-            )
-        except:
-            content.add_widget(
-                Label(
-                    text=f"Are you sure you want to remove this container?\nThis action cannot be undone."
-                )
+        content.add_widget(
+            Label(
+                text=f"Are you sure you want to remove container {self._container_name(container_id)}?\nThis action cannot be undone."
             )
+        )
 
         btn_layout = BoxLayout(
             orientation="horizontal", spacing=10, size_hint_y=None, height=50
@@ -1231,16 +5522,14 @@ class DockerContainersScreen(Screen):
 
         # Function to remove container
         def do_remove_container(btn):
-            try:
-                container = self.docker_client.containers.get(container_id)
-                name = container.name
-                container.remove(force=True)  # Force removal even if running
-                self.status_label.text = f"Successfully removed container {name}"
-                self.update_container_list()
-                popup.dismiss()
-            except Exception as e:
-                self.status_label.text = f"Error removing container: {str(e)}"
-                popup.dismiss()
+            popup.dismiss()
+            self._container_action(
+                container_id,
+                "Removing",
+                "Successfully removed",
+                # Force removal even if running
+                lambda: self.docker_client.api.remove_container(container_id, force=True),
+            )
 
         # Create buttons
         cancel_btn = Button(text="Cancel")
@@ -1262,247 +5551,428 @@ class DockerContainersScreen(Screen):
         if not self._check_docker_client():
             return
 
-        try:
-            container = self.docker_client.containers.get(container_id)
+        container = docker_state.get_container(container_id)
+        if container is None:
+            self.status_label.text = "Error viewing logs: container not found"
+            return
 
-            # Create popup to display logs
-            layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
+        # Create popup to display logs
+        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
 
-            # Container info
-            info_text = f"Container: {container.name}\n"
-            info_text += f"Image: {container.image.tags[0] if container.image.tags else container.image.short_id}\n"
-            info_text += f"Status: {container.status}\n\n"
+        # Container info, straight from the shared model
+        info_text = f"Container: {container['name']}\n"
+        info_text += f"Image: {container['image']}\n"
+        info_text += f"Status: {container['status']}\n\n"
 
-            layout.add_widget(
-                Label(
-                    text=info_text,
-                    size_hint_y=None,
-                    height=80,
-                    halign="left",
-                    valign="top",
-                )
+        layout.add_widget(
+            Label(
+                text=info_text,
+                size_hint_y=None,
+                height=80,
+                halign="left",
+                valign="top",
             )
+        )
 
-            # Function to get logs
-            def get_logs():
-                try:
-                    # Get logs with tail limit to avoid huge logs
-                    logs = container.logs(tail=100).decode("utf-8")
-                    return logs if logs else "No logs available"
-                except Exception as e:
-                    return f"Error retrieving logs: {str(e)}"
-
-            # Get logs in a separate thread
-            def get_logs_thread():
-                logs = get_logs()
-                Clock.schedule_once(lambda dt: setattr(log_output, "text", logs), 0)
-
-            # Logs output
-            log_output = TextInput(
-                readonly=True, multiline=True, text="Loading logs..."
-            )
-            layout.add_widget(log_output)
+        # Logs output, only the visible lines are turned into widgets
+        log_table = create_table(LogLineRow, row_height=20)
+        layout.add_widget(log_table)
+
+        log_status = Label(text="Loading logs...", size_hint_y=None, height=30)
+        layout.add_widget(log_status)
+
+        follower = LogFollower(docker_engine, container_id)
+        shown = {"seen": 0}
+
+        # Append only the lines that arrived since the last tick
+        def update_logs(*args):
+            new_lines, shown["seen"] = follower.drain(shown["seen"])
+            if new_lines:
+                at_bottom = log_table.scroll_y <= 0.01
+                log_table.data.extend({"row": {"text": line}} for line in new_lines)
+                excess = len(log_table.data) - follower.lines.maxlen
+                if excess > 0:
+                    del log_table.data[:excess]
+                if at_bottom:
+                    log_table.scroll_y = 0
+
+            if follower.error:
+                log_status.text = f"Error retrieving logs: {follower.error}"
+            elif follower.following:
+                log_status.text = f"Following - {len(log_table.data)} lines"
+            elif follow_btn.text == "Pause":
+                log_status.text = f"Log stream ended - {len(log_table.data)} lines"
+            else:
+                log_status.text = f"Paused - {len(log_table.data)} lines"
 
-            # Start the logs thread
-            threading.Thread(target=get_logs_thread).start()
+        btn_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=40, spacing=10)
 
-            # Refresh button
-            refresh_btn = Button(text="Refresh Logs", size_hint_y=None, height=40)
-            refresh_btn.bind(
-                on_press=lambda x: threading.Thread(target=get_logs_thread).start()
-            )
-            layout.add_widget(refresh_btn)
+        # Pause / resume following
+        follow_btn = Button(text="Pause")
 
-            # Close button
-            close_btn = Button(text="Close", size_hint_y=None, height=40)
-            close_btn.bind(on_press=lambda x: popup.dismiss())
-            layout.add_widget(close_btn)
+        def toggle_follow(btn):
+            if follow_btn.text == "Pause":
+                follower.pause()
+                follow_btn.text = "Resume"
+            else:
+                follower.start()
+                follow_btn.text = "Pause"
+            update_logs()
 
-            # Create and open popup
-            popup = Popup(
-                title=f"Logs - {container.name}", content=layout, size_hint=(0.9, 0.9)
-            )
-            popup.open()
+        follow_btn.bind(on_press=toggle_follow)
+        btn_layout.add_widget(follow_btn)
 
-        except Exception as e:
-            self.status_label.text = f"Error viewing logs: {str(e)}"
+        # Close button
+        close_btn = Button(text="Close")
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+        btn_layout.add_widget(close_btn)
+        layout.add_widget(btn_layout)
 
-    def run_container(self, instance):
-        """Run a new container from an image"""
-        if not self._check_docker_client():
-            return
+        follower.start()
+        update_event = Clock.schedule_interval(update_logs, 1.0 / LOG_UI_RATE)
 
-        # Get list of available images
-        try:
-            images = self.docker_client.images.list()
-            image_tags = []
-            for image in images:
-                if image.tags:
-                    image_tags.extend(image.tags)
-        except:
-            image_tags = []
-
-        # Create popup for container parameters
-        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
+        def stop_following(*args):
+            update_event.cancel()
+            follower.pause()
 
-        # Image selection
-        image_layout = BoxLayout(
-            orientation="vertical", size_hint_y=None, height=80, spacing=5
-        )
-        image_layout.add_widget(
-            Label(text="Select or enter image:", size_hint_y=None, height=20)
+        # Create and open popup
+        popup = Popup(
+            title=f"Logs - {container['name']}", content=layout, size_hint=(0.9, 0.9)
         )
+        popup.bind(on_dismiss=stop_following)
+        popup.open()
 
-        image_spinner = Spinner(
-            text="Select image" if image_tags else "No images available",
-            values=image_tags,
-            size_hint_y=None,
-            height=40,
-        )
+    def view_combined_logs(self, instance):
+        """Follow the logs of several containers in one merged view"""
+        if not self._check_docker_client():
+            return
 
-        image_input = TextInput(
-            hint_text="Or type image name (e.g. ubuntu:latest)",
-            multiline=False,
+        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
+        mux = LogMultiplexer(docker_engine)
+
+        # Containers to include
+        select_scroll = ScrollView(size_hint_y=None, height=90)
+        select_grid = GridLayout(cols=4, spacing=5, size_hint_y=None)
+        select_grid.bind(minimum_height=select_grid.setter("height"))
+
+        def toggle_container(btn, value, container):
+            if value == "down":
+                if not mux.add(container):
+                    btn.state = "normal"
+                    log_status.text = f"At most {mux.max_sources} containers can be followed at once"
+                    return
+                btn.color = get_color_from_hex(mux.sources[container["id"]].color)
+            else:
+                mux.remove(container["id"])
+                btn.color = (1, 1, 1, 1)
+
+        running = docker_state.list_containers(all=False)
+        for container in sorted(running, key=lambda c: c["name"]):
+            toggle = ToggleButton(text=container["name"], size_hint_y=None, height=40)
+            toggle.bind(state=lambda btn, value, c=container: toggle_container(btn, value, c))
+            select_grid.add_widget(toggle)
+        select_scroll.add_widget(select_grid)
+        layout.add_widget(select_scroll)
+
+        # Merged output, colour-coded by container
+        log_table = create_table(LogLineRow, row_height=20)
+        layout.add_widget(log_table)
+
+        log_status = Label(
+            text="Select containers to follow" if running else "No running containers",
             size_hint_y=None,
-            height=40,
+            height=30,
         )
+        layout.add_widget(log_status)
+
+        def update_logs(*args):
+            ready = mux.merge()
+            if ready:
+                at_bottom = log_table.scroll_y <= 0.01
+                log_table.data.extend(
+                    {
+                        "row": {
+                            "text": "[color={}]{}[/color] {}".format(
+                                source.color, escape_markup(source.name), escape_markup(text)
+                            ),
+                            "markup": True,
+                        }
+                    }
+                    for _, source, text in ready
+                )
+                excess = len(log_table.data) - LOG_BUFFER_LINES
+                if excess > 0:
+                    del log_table.data[:excess]
+                if at_bottom:
+                    log_table.scroll_y = 0
+
+            if mux.sources:
+                queued = sum(source.queue.qsize() for source in mux.sources.values())
+                errors = [s.name for s in mux.sources.values() if s.error]
+                state = "Paused" if mux.paused else "Following"
+                log_status.text = (
+                    f"{state} {len(mux.sources)} containers - "
+                    f"{len(log_table.data)} lines, {queued} queued"
+                )
+                if errors:
+                    log_status.text += f" - errors from {', '.join(errors)}"
 
-        # Function to update text input when spinner is selected
-        def on_spinner_select(spinner, text):
-            image_input.text = text
-
-        image_spinner.bind(text=on_spinner_select)
-
-        image_layout.add_widget(image_spinner)
-        image_layout.add_widget(image_input)
-        layout.add_widget(image_layout)
+        btn_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=40, spacing=10)
+        pause_btn = Button(text="Pause")
 
-        # Container name (optional)
-        name_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=40)
-        name_layout.add_widget(Label(text="Container name:", size_hint_x=0.3))
-        name_input = TextInput(hint_text="Optional", size_hint_x=0.7)
-        name_layout.add_widget(name_input)
-        layout.add_widget(name_layout)
+        def toggle_pause(btn):
+            if mux.paused:
+                mux.resume()
+                pause_btn.text = "Pause"
+            else:
+                mux.pause()
+                pause_btn.text = "Resume"
 
-        # Port mapping
-        port_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=40)
-        port_layout.add_widget(Label(text="Port mapping:", size_hint_x=0.3))
-        port_input = TextInput(
-            hint_text="host:container (e.g. 8080:80)", size_hint_x=0.7
-        )
-        port_layout.add_widget(port_input)
-        layout.add_widget(port_layout)
+        pause_btn.bind(on_press=toggle_pause)
+        btn_layout.add_widget(pause_btn)
 
-        # Command
-        cmd_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=40)
-        cmd_layout.add_widget(Label(text="Command:", size_hint_x=0.3))
-        cmd_input = TextInput(hint_text="Optional", size_hint_x=0.7)
-        cmd_layout.add_widget(cmd_input)
-        layout.add_widget(cmd_layout)
+        close_btn = Button(text="Close")
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+        btn_layout.add_widget(close_btn)
+        layout.add_widget(btn_layout)
 
-        # Status message
-        status_label = Label(
-            text="Configure container parameters", size_hint_y=None, height=40
-        )
-        layout.add_widget(status_label)
+        update_event = Clock.schedule_interval(update_logs, 1.0 / LOG_UI_RATE)
 
-        # Button layout
-        btn_layout = BoxLayout(
-            orientation="horizontal", spacing=10, size_hint_y=None, height=50
-        )
+        def stop_following(*args):
+            update_event.cancel()
+            mux.stop()
 
-        # Function to run container
-        def do_run_container(btn):
-            try:
-                # Get parameters
-                image_name = image_input.text.strip()
-                if not image_name:
-                    status_label.text = "Please enter an image name"
-                    return
+        popup = Popup(title="Combined Logs", content=layout, size_hint=(0.9, 0.9))
+        popup.bind(on_dismiss=stop_following)
+        popup.open()
 
-                # Optional name
-                name = name_input.text.strip() if name_input.text.strip() else None
+    def search_logs(self, instance):
+        """Capture logs from selected containers and search them"""
+        layout = BoxLayout(orientation="vertical", padding=10, spacing=10)
 
-                # Parse port mapping
-                ports = {}
-                if port_input.text.strip():
-                    try:
-                        host_port, container_port = port_input.text.strip().split(":")
-                        ports = {container_port: host_port}
-                    except ValueError:
-                        status_label.text = "Invalid port format. Use host:container"
-                        return
+        # Containers whose logs are copied into the store
+        layout.add_widget(
+            Label(text="Capture logs from:", size_hint_y=None, height=30)
+        )
+        capture_scroll = ScrollView(size_hint_y=None, height=90)
+        capture_grid = GridLayout(cols=4, spacing=5, size_hint_y=None)
+        capture_grid.bind(minimum_height=capture_grid.setter("height"))
+        for container in sorted(docker_state.list_containers(), key=lambda c: c["name"]):
+            toggle = ToggleButton(
+                text=container["name"],
+                size_hint_y=None,
+                height=40,
+                state="down" if log_capture.is_captured(container["id"]) else "normal",
+            )
+            toggle.bind(
+                state=lambda btn, value, c=container: log_capture.set_captured(c, value == "down")
+            )
+            capture_grid.add_widget(toggle)
+        capture_scroll.add_widget(capture_grid)
+        layout.add_widget(capture_scroll)
+
+        # Query, time range and container filter
+        search_layout = BoxLayout(orientation="horizontal", size_hint_y=None, height=40, spacing=10)
+        query_input = TextInput(hint_text="Text or request ID", multiline=False, size_hint_x=0.4)
+        search_layout.add_widget(query_input)
+
+        ranges = OrderedDict(
+            [
+                ("Last 15 minutes", 15 * 60),
+                ("Last hour", 3600),
+                ("Last 24 hours", 24 * 3600),
+                ("Last 7 days", 7 * 24 * 3600),
+                ("All time", None),
+            ]
+        )
+        range_spinner = Spinner(text="Last 24 hours", values=list(ranges), size_hint_x=0.2)
+        search_layout.add_widget(range_spinner)
 
-                # Optional command
-                command = cmd_input.text.strip() if cmd_input.text.strip() else None
+        container_spinner = Spinner(
+            text="All containers",
+            values=["All containers"],
+            size_hint_x=0.2,
+        )
+        search_layout.add_widget(container_spinner)
 
-                # Run container in a thread
-                def run_thread():
-                    try:
-                        container = self.docker_client.containers.run(
-                            image_name,
-                            name=name,
-                            ports=ports,
-                            command=command,
-                            detach=True,
-                        )
+        # Names come from the store's manifest, read on the worker pool
+        def show_containers(names):
+            container_spinner.values = ["All containers"] + names
 
-                        # Update UI
-                        Clock.schedule_once(
-                            lambda dt: setattr(
-                                status_label,
-                                "text",
-                                f"Container {container.name} started successfully",
-                            ),
-                            0,
-                        )
+        docker_engine.submit(log_store.containers, on_success=show_containers)
 
-                        # Close popup after success
-                        Clock.schedule_once(lambda dt: popup.dismiss(), 2)
+        search_btn = Button(text="Search", size_hint_x=0.2, background_color=(0.3, 0.7, 1, 1))
+        search_layout.add_widget(search_btn)
+        layout.add_widget(search_layout)
 
-                        # Update container list
-                        Clock.schedule_once(lambda dt: self.update_container_list(), 2)
+        # Matching lines, newest first
+        results_table = create_table(LogLineRow, row_height=20)
+        layout.add_widget(results_table)
 
-                    except Exception as e:
-                        Clock.schedule_once(
-                            lambda dt: setattr(
-                                status_label, "text", f"Error: {str(e)}"
-                            ),
-                            0,
-                        )
+        search_status = Label(text="", size_hint_y=None, height=30)
+        layout.add_widget(search_status)
 
-                status_label.text = "Starting container..."
-                threading.Thread(target=run_thread).start()
+        def run_search(*args):
+            query = query_input.text.strip()
+            if not query:
+                search_status.text = "Enter text to search for"
+                return
+            seconds = ranges[range_spinner.text]
+            since_ns = time.time_ns() - seconds * 1000000000 if seconds else None
+            containers = None
+            if container_spinner.text != "All containers":
+                containers = [container_spinner.text]
+            search_status.text = "Searching..."
+            started = time.time()
+
+            def search():
+                return log_store.search(query, containers=containers, since_ns=since_ns)
+
+            def show_results(result):
+                matches, stats = result
+                results_table.data = [
+                    {
+                        "row": {
+                            "text": "{} {} | {}".format(
+                                datetime.fromtimestamp(nanos / 1e9).strftime("%Y-%m-%d %H:%M:%S"),
+                                container,
+                                text,
+                            )
+                        }
+                    }
+                    for nanos, container, text in matches
+                ]
+                search_status.text = (
+                    f"{len(matches)} matches in {(time.time() - started) * 1000:.0f} ms "
+                    f"({stats['scanned']} of {stats['segments']} segments searched)"
+                )
 
-            except Exception as e:
-                status_label.text = f"Error: {str(e)}"
+            def show_error(error):
+                search_status.text = f"Error searching logs: {str(error)}"
 
-        # Create run and cancel buttons
-        run_btn = Button(text="Run Container")
-        run_btn.bind(on_press=do_run_container)
+            docker_engine.submit(search, on_success=show_results, on_error=show_error)
 
-        cancel_btn = Button(text="Cancel")
-        cancel_btn.bind(on_press=lambda x: popup.dismiss())
+        search_btn.bind(on_press=run_search)
+        query_input.bind(on_text_validate=run_search)
 
-        btn_layout.add_widget(run_btn)
-        btn_layout.add_widget(cancel_btn)
-        layout.add_widget(btn_layout)
+        close_btn = Button(text="Close", size_hint_y=None, height=40)
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+        layout.add_widget(close_btn)
 
-        # Create and open popup
-        popup = Popup(title="Run Container", content=layout, size_hint=(0.8, 0.8))
+        popup = Popup(title="Search Logs", content=layout, size_hint=(0.9, 0.9))
         popup.open()
 
+    def run_container(self, instance):
+        """Run containers from any image"""
+        if not self._check_docker_client():
+            return
+        show_run_popup(self.docker_client)
+
     def _check_docker_client(self):
         """Check if Docker client is available"""
-        if not self.docker_available:
-            try:
-                self.docker_client = docker.from_env()
-                self.docker_available = True
-            except Exception as e:
-                self.status_label.text = f"Docker not available: {str(e)}"
-                return False
+        error = self._connect_docker()
+        if error is not None:
+            self.status_label.text = f"Docker not available: {error}"
+            return False
         return True
 
     def go_back(self, instance):
         """Return to Docker menu"""
         self.manager.current = "docker"
+
+
+class DockerStatsScreen(DockerClientMixin, Screen):
+    def __init__(self, **kwargs):
+        super(DockerStatsScreen, self).__init__(**kwargs)
+
+        # Main container with padding
+        self.layout = BoxLayout(orientation="vertical", spacing=20, padding=40)
+        self.add_widget(self.layout)
+
+        # Title and header
+        header = BoxLayout(orientation="horizontal", size_hint=(1, None), height=50)
+        title = Label(
+            text="Container Stats",
+            font_size=32,
+            bold=True,
+            color=(0.3, 0.7, 1, 1),
+            size_hint=(0.7, 1),
+        )
+        header.add_widget(title)
+
+        # Back button
+        back_btn = Button(
+            text="Back", size_hint=(0.3, 1), background_color=(0.3, 0.7, 1, 1)
+        )
+        back_btn.bind(on_press=self.go_back)
+        header.add_widget(back_btn)
+
+        self.layout.add_widget(header)
+
+        # Status label
+        self.status_label = Label(text="", size_hint=(1, None), height=30)
+        self.layout.add_widget(self.status_label)
+
+        # Column headers
+        headers = GridLayout(cols=5, size_hint_y=None, height=40, spacing=2)
+        for text, width in (
+            ("Name", 0.2), ("CPU", 0.25), ("Memory", 0.3), ("Network", 0.125), ("Block I/O", 0.125),
+        ):
+            headers.add_widget(Label(text=text, bold=True, size_hint_x=width))
+        self.layout.add_widget(headers)
+
+        # Only rows in the viewport exist, and only they stream stats
+        self.monitor = StatsMonitor(docker_engine)
+        self.stats_list = create_table(StatsRow, row_height=50)
+        self.layout.add_widget(self.stats_list)
+
+        self.update_event = None
+
+        # Re-render whenever the shared model changes
+        docker_state.add_listener(self._on_state_changed)
+
+    def on_enter(self):
+        docker_state.start()
+        self.update_stats_list()
+        self.monitor.resume()
+        self.update_event = Clock.schedule_interval(self._redraw, 1.0)
+
+    def on_leave(self):
+        # No streams while the screen is hidden
+        self.monitor.pause()
+        if self.update_event is not None:
+            self.update_event.cancel()
+            self.update_event = None
+
+    def _on_state_changed(self):
+        if self.manager is not None and self.manager.current == self.name:
+            self.update_stats_list()
+
+    def _redraw(self, dt):
+        self.stats_list.refresh_from_data()
+
+    def update_stats_list(self):
+        """Render the running containers from the shared model"""
+        if not docker_state.loaded:
+            self.stats_list.data = []
+            if docker_state.last_error is not None:
+                self.status_label.text = (
+                    f"Error loading containers: {docker_state.last_error}"
+                )
+            else:
+                self.status_label.text = "Loading Docker containers..."
+            return
+
+        containers = sorted(docker_state.list_containers(all=False), key=lambda c: c["name"])
+        self.monitor.retain(c["id"] for c in containers)
+        self.stats_list.data = [{"row": c, "screen": self} for c in containers]
+
+        if containers:
+            self.status_label.text = f"Streaming stats for {len(containers)} running containers"
+        else:
+            self.status_label.text = "No running containers found"
+
+    def go_back(self, instance):
+        """Return to the containers list"""
+        self.manager.current = "docker_containers"
+
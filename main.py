@@ -23,11 +23,16 @@ from vm_utils import (
     DiskManagementScreen,
     VMScreen,
     ExistingVMsScreen,
+    disk_jobs,
 )
 from docker_utils import (
+    docker_engine,
+    docker_state,
+    log_capture,
     DockerScreen,
     DockerImagesScreen,
     DockerContainersScreen,
+    DockerStatsScreen,
 )
 
 
@@ -150,9 +155,18 @@ class CloudApp(App):
         sm.add_widget(DockerScreen(name="docker"))
         sm.add_widget(DockerImagesScreen(name="docker_images"))
         sm.add_widget(DockerContainersScreen(name="docker_containers"))
+        sm.add_widget(DockerStatsScreen(name="docker_stats"))
 
         return sm
 
+    def on_stop(self):
+        # Cancel unfinished disk jobs so no partial disks are left behind
+        disk_jobs.cancel_all()
+        # Stop log capture, the event subscriber, the worker pool and the Docker connections
+        log_capture.stop()
+        docker_state.stop()
+        docker_engine.shutdown()
+
 
 if __name__ == "__main__":
     CloudApp().run()
\ No newline at end of file
@@ -8,9 +8,16 @@ from kivy.uix.scrollview import ScrollView
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.popup import Popup
 from kivy.uix.dropdown import DropDown
+from kivy.uix.progressbar import ProgressBar
+from kivy.clock import Clock
 
 import os
+import re
+import json
 import subprocess
+import threading
+import time
+from collections import OrderedDict
 
 
 def find_msys64():
@@ -68,6 +75,507 @@ def get_disk_directory():
     return disk_dir
 
 
+DISK_FORMATS = ("qcow2", "raw", "vmdk", "vhdx")
+
+# Preallocation modes offered per format. vhdx has no preallocation option,
+# "full" selects its fixed-size subformat. vmdk gets none: its flat variants
+# keep the data in a separate <name>-flat.vmdk extent file
+PREALLOCATION_MODES = {
+    "qcow2": ("off", "metadata", "falloc", "full"),
+    "raw": ("off", "falloc", "full"),
+    "vhdx": ("off", "full"),
+}
+# Creation options only qcow2 understands
+QCOW2_OPTIONS = ("cluster_size", "lazy_refcounts", "extended_l2")
+CLUSTER_SIZES = ("64k", "128k", "256k", "512k", "1M", "2M")
+
+# Performance profiles; each format uses only the options it supports
+DISK_PROFILES = OrderedDict(
+    [
+        ("default", {}),
+        # Sparse: created instantly, space is allocated as the guest writes
+        ("fast-create", {"preallocation": "off"}),
+        # Space reserved up front, fewer and cheaper metadata updates on write
+        (
+            "fast-io",
+            {
+                "preallocation": "falloc",
+                "cluster_size": "128k",
+                "lazy_refcounts": "on",
+                "extended_l2": "on",
+            },
+        ),
+    ]
+)
+
+DISK_METADATA_FILE = "disks.json"
+
+
+def supported_disk_settings(disk_format, settings):
+    """The settings this format supports"""
+    supported = {}
+    if settings.get("preallocation") in PREALLOCATION_MODES.get(disk_format, ()):
+        supported["preallocation"] = settings["preallocation"]
+    if disk_format == "qcow2":
+        for key in QCOW2_OPTIONS:
+            if settings.get(key):
+                supported[key] = settings[key]
+    return supported
+
+
+def disk_create_options(disk_format, settings):
+    """qemu-img -o options for the settings this format supports"""
+    options = OrderedDict()
+    settings = supported_disk_settings(disk_format, settings)
+    if disk_format == "vhdx":
+        if settings.get("preallocation") == "full":
+            options["subformat"] = "fixed"
+    elif "preallocation" in settings:
+        options["preallocation"] = settings["preallocation"]
+    for key in QCOW2_OPTIONS:
+        if key in settings:
+            options[key] = settings[key]
+    return options
+
+
+def list_disk_files(disk_dir):
+    """Disk images in the directory, leaving out vmdk data extents"""
+    return [
+        f
+        for f in os.listdir(disk_dir)
+        if f.endswith((".qcow2", ".raw", ".vmdk", ".vhdx")) and not f.endswith("-flat.vmdk")
+    ]
+
+
+def disk_create_command(disk_path, disk_format, size_gb, options):
+    command = ["qemu-img", "create", "-f", disk_format]
+    if options:
+        command += ["-o", ",".join(f"{key}={value}" for key, value in options.items())]
+    return command + [disk_path, f"{size_gb}G"]
+
+
+def load_disk_metadata(disk_dir):
+    """Options recorded for each disk file in the disk directory"""
+    try:
+        with open(os.path.join(disk_dir, DISK_METADATA_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_disk_metadata(disk_dir, metadata):
+    path = os.path.join(disk_dir, DISK_METADATA_FILE)
+    temp_path = f"{path}.{os.getpid()}.part"
+    try:
+        with open(temp_path, "w") as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Error saving disk metadata: {str(e)}")
+
+
+def record_disk(disk_dir, disk_file, info):
+    metadata = load_disk_metadata(disk_dir)
+    metadata[disk_file] = info
+    save_disk_metadata(disk_dir, metadata)
+
+
+def forget_disk(disk_dir, disk_file):
+    metadata = load_disk_metadata(disk_dir)
+    if metadata.pop(disk_file, None) is not None:
+        save_disk_metadata(disk_dir, metadata)
+
+
+def qemu_img_info(disk_path, backing_chain=False):
+    """Parsed `qemu-img info --output=json`; a list when backing_chain is set"""
+    command = ["qemu-img", "info", "--output=json"]
+    if backing_chain:
+        command.append("--backing-chain")
+    # -U: a running VM holds a write lock on its disk
+    command += ["-U", disk_path]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"qemu-img info failed for {disk_path}")
+    return json.loads(result.stdout)
+
+
+def clone_create_command(base_path, base_format, clone_path):
+    """qemu-img command for a qcow2 overlay backed by base_path"""
+    # A relative backing name keeps the disk directory relocatable
+    return [
+        "qemu-img", "create", "-f", "qcow2",
+        "-b", os.path.basename(base_path), "-F", base_format,
+        clone_path,
+    ]
+
+
+# Values offered for qemu-img convert -m (parallel coroutines, default 8)
+CONVERT_COROUTINES = ("1", "2", "4", "8", "16")
+
+
+def disk_convert_command(
+    src_path,
+    src_format,
+    dst_path,
+    dst_format,
+    compress=False,
+    coroutines=None,
+    out_of_order=False,
+    backing=None,
+    backing_format=None,
+    options=None,
+):
+    """qemu-img convert command that reports progress"""
+    command = ["qemu-img", "convert", "-p", "-f", src_format, "-O", dst_format]
+    if options:
+        command += ["-o", ",".join(f"{key}={value}" for key, value in options.items())]
+    if compress:
+        command.append("-c")
+    if coroutines:
+        command += ["-m", str(coroutines)]
+    if out_of_order:
+        command.append("-W")
+    if backing:
+        # Keep a linked clone on its base instead of flattening the chain
+        command += ["-B", backing]
+        if backing_format:
+            command += ["-F", backing_format]
+    return command + [src_path, dst_path]
+
+
+# vmdk subformats that keep their data in separate extent files
+VMDK_FLAT_SUBFORMATS = ("monolithicFlat", "twoGbMaxExtentFlat", "vmfs")
+
+
+def disk_rewrite_options(disk_format, info, recorded=None):
+    """-o options that keep a disk's creation settings when it is rewritten.
+
+    Settings are read back from qemu-img info where it reports them, and
+    the options recorded in disks.json (such as preallocation) win.
+    """
+    options = OrderedDict()
+    specific = info.get("format-specific", {}).get("data", {})
+    if disk_format == "qcow2":
+        if info.get("cluster-size"):
+            options["cluster_size"] = str(info["cluster-size"])
+        for key in ("lazy-refcounts", "extended-l2"):
+            if key in specific:
+                options[key.replace("-", "_")] = "on" if specific[key] else "off"
+    elif disk_format == "vmdk" and specific.get("create-type"):
+        options["subformat"] = specific["create-type"]
+    options.update(recorded or {})
+    return options
+
+
+def disk_clones(disk_dir, disk_file, metadata=None):
+    """Disk files recorded as linked clones of disk_file"""
+    if metadata is None:
+        metadata = load_disk_metadata(disk_dir)
+    return sorted(name for name, info in metadata.items() if info.get("backing") == disk_file)
+
+
+DISK_INDEX_FILE = ".disk-index.json"
+
+
+def format_disk_size(size):
+    """Human readable size for a byte count"""
+    if size < 1024:
+        return f"{size} B"
+    for unit in ("KB", "MB", "GB", "TB"):
+        size /= 1024
+        if size < 1024 or unit == "TB":
+            return f"{size:.1f} {unit}"
+
+
+def size_report(disk_file, before, after):
+    """Allocated size of a disk before and after a rewrite"""
+    text = f"{disk_file}: {format_disk_size(before)} -> {format_disk_size(after)}"
+    if before > after:
+        text += f"\nreclaimed {format_disk_size(before - after)}"
+    return text
+
+
+class DiskIndex:
+    """qemu-img info for each disk in a directory, cached on disk.
+
+    Results are stored in .disk-index.json together with the file's mtime and
+    size, and qemu-img only runs again for files where either has changed.
+    """
+
+    def __init__(self, disk_dir):
+        self.disk_dir = disk_dir
+        self.path = os.path.join(disk_dir, DISK_INDEX_FILE)
+        self._entries = None
+        self._lock = threading.RLock()
+        # One refresh at a time so the same disk is not inspected twice
+        self._refresh_lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        try:
+            with open(self.path) as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        temp_path = f"{self.path}.{os.getpid()}.part"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(self._entries, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error saving disk index: {str(e)}")
+
+    @staticmethod
+    def summarize(info):
+        """The fields of qemu-img info the disk list shows"""
+        specific = info.get("format-specific", {}).get("data", {})
+        return {
+            "format": info.get("format"),
+            "virtual_size": info.get("virtual-size", 0),
+            "actual_size": info.get("actual-size", 0),
+            "backing": info.get("backing-filename"),
+            "backing_format": info.get("backing-filename-format"),
+            "dirty": bool(info.get("dirty-flag", False)),
+            "corrupt": bool(specific.get("corrupt", False)),
+        }
+
+    def cached(self, disk_file):
+        """Last known info for a disk file, which may be out of date"""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(disk_file)
+            return entry["info"] if entry else None
+
+    def refresh(self, disk_files):
+        """Info for each disk file, running qemu-img only for changed files"""
+        with self._refresh_lock:
+            with self._lock:
+                self._load()
+                entries = dict(self._entries)
+
+            results = {}
+            changed = False
+            for disk_file in disk_files:
+                disk_path = os.path.join(self.disk_dir, disk_file)
+                try:
+                    stat = os.stat(disk_path)
+                except OSError:
+                    continue
+                key = [stat.st_mtime_ns, stat.st_size]
+                entry = entries.get(disk_file)
+                if entry is None or entry["key"] != key:
+                    try:
+                        info = self.summarize(qemu_img_info(disk_path))
+                    except (OSError, RuntimeError, ValueError):
+                        continue
+                    entry = {"key": key, "info": info}
+                    entries[disk_file] = entry
+                    changed = True
+                results[disk_file] = entry["info"]
+
+            stale = [f for f in entries if not os.path.exists(os.path.join(self.disk_dir, f))]
+            for disk_file in stale:
+                del entries[disk_file]
+
+            with self._lock:
+                self._entries = entries
+                if changed or stale:
+                    self._save()
+            return results
+
+
+def find_disk_clones(disk_index, disk_file):
+    """Disks backed by disk_file, from disks.json and from qemu-img's backing info.
+
+    Overlays made outside the app are only known to qemu-img, so this
+    refreshes the disk index; call it off the UI thread.
+    """
+    disk_dir = disk_index.disk_dir
+    clones = set(disk_clones(disk_dir, disk_file))
+    base_path = os.path.normpath(os.path.join(disk_dir, disk_file))
+    for name, info in disk_index.refresh(list_disk_files(disk_dir)).items():
+        backing = info.get("backing")
+        # Relative backing names are resolved from the overlay's directory
+        if backing and os.path.normpath(os.path.join(disk_dir, backing)) == base_path:
+            clones.add(name)
+    return sorted(clones)
+
+
+# Disk jobs running at the same time; more just queue up
+DISK_JOB_WORKERS = int(os.environ.get("DISK_JOB_WORKERS", "3"))
+DISK_JOB_POLL = 0.5
+
+# "(42.17/100%)" as printed by qemu-img -p
+QEMU_PROGRESS = re.compile(r"\((\d+(?:\.\d+)?)/100%\)")
+
+
+def allocated_size(path):
+    """Bytes actually used on disk by a (possibly sparse) file"""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return 0
+    blocks = getattr(info, "st_blocks", None)
+    return blocks * 512 if blocks is not None else info.st_size
+
+
+class DiskJob:
+    """A qemu-img command that runs in the background"""
+
+    def __init__(self, kind, target, command, expected_bytes=None, on_done=None):
+        self.kind = kind
+        self.target = target
+        self.command = command
+        # Used to estimate progress from the file size when the command
+        # itself does not report any
+        self.expected_bytes = expected_bytes
+        self.on_done = on_done
+        self.status = "queued"
+        self.message = ""
+        self.progress = None
+        self.started = None
+        self.finished = None
+        self.process = None
+        self._cancelled = False
+        # True once qemu-img reported progress itself; the size estimate
+        # must not overwrite it
+        self._reported = False
+        # Guards process and _cancelled between the job thread and cancel()
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return os.path.basename(self.target)
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def describe(self):
+        """Short progress text for the job list"""
+        if self.status == "running":
+            if self.progress is not None:
+                return f"{self.progress * 100:.0f}%"
+            return f"{time.time() - self.started:.0f}s"
+        if self.status == "done" and self.started:
+            return self.message or f"done in {self.finished - self.started:.1f}s"
+        return self.message
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            process = self.process
+        if process is not None and process.poll() is None:
+            process.terminate()
+
+
+class DiskJobManager:
+    """Runs disk jobs on background threads, a few at a time"""
+
+    def __init__(self, workers=DISK_JOB_WORKERS):
+        self.jobs = []
+        self._slots = threading.Semaphore(workers)
+
+    def submit(self, job):
+        self.jobs.append(job)
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if job.active]
+
+    def cancel_all(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def is_busy(self, path):
+        """True if an unfinished job writes to this path"""
+        return any(job.active and job.target == path for job in self.jobs)
+
+    def _run(self, job):
+        with self._slots:
+            if job._cancelled:
+                self._finish(job, "cancelled", "")
+                return
+            existed = os.path.exists(job.target)
+            job.status = "running"
+            job.started = time.time()
+            try:
+                process = subprocess.Popen(
+                    job.command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                )
+            except Exception as e:
+                self._finish(job, "failed", str(e))
+                return
+            # A cancel() that ran before the process was published could
+            # not terminate it, so check again once it is visible
+            with job._lock:
+                job.process = process
+                cancelled = job._cancelled
+            if cancelled:
+                process.terminate()
+
+            # Progress lines are separated by carriage returns, so read raw
+            output = []
+            reader = threading.Thread(
+                target=self._read_output, args=(job, process, output), daemon=True
+            )
+            reader.start()
+            while process.poll() is None:
+                if job.expected_bytes and not job._reported:
+                    job.progress = min(allocated_size(job.target) / float(job.expected_bytes), 1.0)
+                time.sleep(DISK_JOB_POLL)
+            reader.join()
+
+            if job._cancelled or process.returncode != 0:
+                # Never leave a half-written disk behind, it would block a retry
+                if not existed and os.path.exists(job.target):
+                    try:
+                        os.remove(job.target)
+                    except OSError as e:
+                        print(f"Error removing partial disk: {str(e)}")
+
+            if job._cancelled:
+                self._finish(job, "cancelled", "")
+            elif process.returncode != 0:
+                text = b"".join(output).decode(errors="replace").strip()
+                self._finish(job, "failed", text.splitlines()[-1] if text else f"exit code {process.returncode}")
+            else:
+                job.progress = 1.0
+                self._finish(job, "done", "")
+
+    def _read_output(self, job, process, output):
+        stream = process.stdout
+        while True:
+            chunk = stream.read1(4096) if hasattr(stream, "read1") else stream.read(4096)
+            if not chunk:
+                break
+            output.append(chunk)
+            matches = QEMU_PROGRESS.findall(chunk.decode(errors="replace"))
+            if matches:
+                job._reported = True
+                job.progress = float(matches[-1]) / 100.0
+
+    def _finish(self, job, status, message):
+        job.status = status
+        job.message = message
+        job.finished = time.time()
+        with job._lock:
+            job.process = None
+        if job.on_done is not None:
+            Clock.schedule_once(lambda dt: job.on_done(job), 0)
+
+
+# Shared by the disk screens so jobs survive switching screens
+disk_jobs = DiskJobManager()
+
+
 class ServiceSelectionScreen(Screen):
     def __init__(self, **kwargs):
         super(ServiceSelectionScreen, self).__init__(**kwargs)
@@ -283,10 +791,74 @@ class DiskScreen(Screen):
             height=50,
             background_color=(0.1, 0.1, 0.1, 1),
         )
+        self.disk_format.bind(text=self.on_profile_select)
         input_container.add_widget(self.disk_format)
 
+        # Performance profile
+        self.disk_profile = Spinner(
+            text="default",
+            values=list(DISK_PROFILES) + ["custom"],
+            size_hint=(1, None),
+            height=50,
+            background_color=(0.1, 0.1, 0.1, 1),
+        )
+        self.disk_profile.bind(text=self.on_profile_select)
+        input_container.add_widget(self.disk_profile)
+
+        # Individual options, editable with the custom profile
+        options_container = BoxLayout(
+            orientation="horizontal", spacing=10, size_hint=(1, None), height=50
+        )
+        self.preallocation = Spinner(
+            text="preallocation: -",
+            values=["preallocation: -"] + [f"preallocation: {m}" for m in PREALLOCATION_MODES["qcow2"]],
+        )
+        self.cluster_size = Spinner(
+            text="cluster_size: -",
+            values=["cluster_size: -"] + [f"cluster_size: {c}" for c in CLUSTER_SIZES],
+        )
+        self.lazy_refcounts = Spinner(
+            text="lazy_refcounts: -",
+            values=["lazy_refcounts: -", "lazy_refcounts: on", "lazy_refcounts: off"],
+        )
+        self.extended_l2 = Spinner(
+            text="extended_l2: -",
+            values=["extended_l2: -", "extended_l2: on", "extended_l2: off"],
+        )
+        self.option_spinners = OrderedDict(
+            [
+                ("preallocation", self.preallocation),
+                ("cluster_size", self.cluster_size),
+                ("lazy_refcounts", self.lazy_refcounts),
+                ("extended_l2", self.extended_l2),
+            ]
+        )
+        for spinner in self.option_spinners.values():
+            spinner.background_color = (0.1, 0.1, 0.1, 1)
+            options_container.add_widget(spinner)
+        input_container.add_widget(options_container)
+        self.on_profile_select(self.disk_profile, self.disk_profile.text)
+
         self.layout.add_widget(input_container)
 
+        # Background disk jobs
+        jobs_header = BoxLayout(orientation="horizontal", size_hint=(1, None), height=30)
+        jobs_header.add_widget(Label(text="Disk jobs", bold=True, size_hint=(0.8, 1)))
+        clear_btn = Button(text="Clear finished", size_hint=(0.2, 1))
+        clear_btn.bind(on_press=self.clear_finished_jobs)
+        jobs_header.add_widget(clear_btn)
+        self.layout.add_widget(jobs_header)
+
+        jobs_scroll = ScrollView(size_hint=(1, 0.4))
+        self.job_list = GridLayout(cols=4, spacing=10, size_hint_y=None)
+        self.job_list.bind(minimum_height=self.job_list.setter("height"))
+        jobs_scroll.add_widget(self.job_list)
+        self.layout.add_widget(jobs_scroll)
+
+        # Job -> (status label, progress bar, cancel button)
+        self.job_rows = {}
+        self.job_event = None
+
         # Button container
         button_container = BoxLayout(
             orientation="horizontal", spacing=20, size_hint=(1, None), height=50
@@ -311,6 +883,90 @@ class DiskScreen(Screen):
     def go_back(self, instance):
         self.manager.current = "vm_selection"
 
+    def on_enter(self):
+        self.update_job_list()
+        self.job_event = Clock.schedule_interval(lambda dt: self.update_job_list(), 0.5)
+
+    def on_leave(self):
+        if self.job_event is not None:
+            self.job_event.cancel()
+            self.job_event = None
+
+    def update_job_list(self):
+        # Rows are only rebuilt when jobs are added or cleared
+        if list(self.job_rows) != disk_jobs.jobs:
+            self.job_list.clear_widgets()
+            self.job_rows = {}
+            for job in disk_jobs.jobs:
+                self.job_list.add_widget(
+                    Label(text=f"{job.kind}: {job.name}", size_hint_y=None, height=40)
+                )
+                status_label = Label(size_hint_y=None, height=40)
+                self.job_list.add_widget(status_label)
+                progress_bar = ProgressBar(max=100, value=0, size_hint_y=None, height=40)
+                self.job_list.add_widget(progress_bar)
+                cancel_btn = Button(
+                    text="Cancel",
+                    size_hint_y=None,
+                    height=40,
+                    background_color=(1, 0.3, 0.3, 1),
+                )
+                cancel_btn.bind(on_press=lambda x, job=job: job.cancel())
+                self.job_list.add_widget(cancel_btn)
+                self.job_rows[job] = (status_label, progress_bar, cancel_btn)
+
+        for job, (status_label, progress_bar, cancel_btn) in self.job_rows.items():
+            detail = job.describe()
+            status_label.text = f"{job.status} {detail}".strip()
+            status_label.color = {
+                "done": (0, 1, 0, 1),
+                "failed": (1, 0.3, 0.3, 1),
+            }.get(job.status, (1, 1, 1, 1))
+            progress_bar.value = (job.progress or 0) * 100
+            cancel_btn.disabled = not job.active
+
+    def clear_finished_jobs(self, instance):
+        disk_jobs.clear_finished()
+        self.update_job_list()
+
+    def on_profile_select(self, spinner, text):
+        """Show a preset's options, or unlock them for a custom profile.
+
+        Only the options the selected format supports are offered.
+        """
+        profile = self.disk_profile.text
+        custom = profile == "custom"
+        # Before a format is picked, offer everything (qcow2 supports it all)
+        disk_format = self.disk_format.text if self.disk_format.text in DISK_FORMATS else "qcow2"
+        settings = supported_disk_settings(disk_format, DISK_PROFILES.get(profile, {}))
+
+        modes = PREALLOCATION_MODES.get(disk_format, ())
+        self.preallocation.values = ["preallocation: -"] + [f"preallocation: {m}" for m in modes]
+        for key, option_spinner in self.option_spinners.items():
+            if key == "preallocation":
+                supported = bool(modes)
+            else:
+                supported = disk_format == "qcow2"
+            if not custom or not supported:
+                option_spinner.text = f"{key}: {settings.get(key, '-')}"
+            elif option_spinner.text not in option_spinner.values:
+                option_spinner.text = f"{key}: -"
+            option_spinner.disabled = not custom or not supported
+
+    def selected_disk_settings(self):
+        """The option values shown in the option spinners"""
+        settings = {}
+        for key, option_spinner in self.option_spinners.items():
+            value = option_spinner.text.split(": ", 1)[1]
+            if value != "-":
+                settings[key] = value
+        return settings
+
+    def refresh_disk_lists(self):
+        """Show new disks on the other screens"""
+        vm_screen = self.manager.get_screen("vm")
+        vm_screen.disk_selection.values = vm_screen.get_available_disks()
+
     def create_disk(self, instance):
         disk_name = self.disk_name.text.strip()
         disk_size = self.disk_size.text.strip()
@@ -320,6 +976,10 @@ class DiskScreen(Screen):
             self.show_error("Please fill in all fields")
             return
 
+        if disk_format not in DISK_FORMATS:
+            self.show_error("Please select a disk format")
+            return
+
         try:
             disk_size = int(disk_size)
             if disk_size <= 0:
@@ -334,34 +994,40 @@ class DiskScreen(Screen):
             self.show_error("Failed to access or create disk directory")
             return
 
-        print(f"Creating disk in directory: {disk_dir}")  # Debug print
-
         disk_path = os.path.join(disk_dir, f"{disk_name}.{disk_format}")
-        print(f"Full disk path: {disk_path}")  # Debug print
-
-        try:
-            # Create the disk using qemu-img
-            subprocess.run(
-                ["qemu-img", "create", "-f", disk_format, disk_path, f"{disk_size}G"],
-                check=True,
-            )
-
-            print(f"Disk created successfully at: {disk_path}")  # Debug print
-            print(f"Disk file exists: {os.path.exists(disk_path)}")  # Debug print
-
-            self.show_success(f"Disk created successfully")
+        if os.path.exists(disk_path) or disk_jobs.is_busy(disk_path):
+            self.show_error(f"Disk {disk_name}.{disk_format} already exists")
+            return
 
-            # Update the disk list in the VM screen before switching
-            vm_screen = self.manager.get_screen("vm")
-            vm_screen.disk_selection.values = vm_screen.get_available_disks()
+        profile = self.disk_profile.text
+        options = disk_create_options(disk_format, self.selected_disk_settings())
+        command = disk_create_command(disk_path, disk_format, disk_size, options)
+
+        # Preallocated disks take a while; watch the file fill up
+        expected_bytes = None
+        if options.get("preallocation") in ("falloc", "full") or options.get("subformat") == "fixed":
+            expected_bytes = disk_size * 1024 ** 3
+
+        def on_done(job):
+            if job.status == "done":
+                record_disk(
+                    disk_dir,
+                    os.path.basename(disk_path),
+                    {
+                        "format": disk_format,
+                        "size_gb": disk_size,
+                        "profile": profile,
+                        "options": dict(options),
+                        "created": time.time(),
+                    },
+                )
+                self.refresh_disk_lists()
 
-            self.manager.current = "vm_selection"
-        except subprocess.CalledProcessError as e:
-            print(f"Error creating disk: {str(e)}")  # Debug print
-            self.show_error(f"Failed to create disk: {str(e)}")
-        except Exception as e:
-            print(f"Unexpected error: {str(e)}")  # Debug print
-            self.show_error(f"An error occurred: {str(e)}")
+        # Create the disk using qemu-img, off the UI thread
+        disk_jobs.submit(
+            DiskJob("create", disk_path, command, expected_bytes=expected_bytes, on_done=on_done)
+        )
+        self.update_job_list()
 
     def show_error(self, message):
         popup = Popup(
@@ -515,10 +1181,7 @@ class VMScreen(Screen):
         if not disk_dir:
             return ["No disks available"]
 
-        disks = []
-        for file in os.listdir(disk_dir):
-            if file.endswith((".qcow2", ".raw", ".vmdk", ".vhdx")):
-                disks.append(file)
+        disks = list_disk_files(disk_dir)
 
         return disks if disks else ["No disks available"]
 
@@ -911,15 +1574,17 @@ class DiskManagementScreen(Screen):
         disk_container = BoxLayout(orientation="vertical", spacing=10)
 
         # Column headers
-        headers = GridLayout(cols=3, size_hint_y=None, height=40)
+        headers = GridLayout(cols=5, size_hint_y=None, height=40)
         headers.add_widget(Label(text="Disk Name", bold=True))
         headers.add_widget(Label(text="Format", bold=True))
+        headers.add_widget(Label(text="Virtual", bold=True))
+        headers.add_widget(Label(text="Allocated", bold=True))
         headers.add_widget(Label(text="Actions", bold=True))
         disk_container.add_widget(headers)
 
         # Scroll view for disk list
         scroll = ScrollView()
-        self.disk_list = GridLayout(cols=3, spacing=10, size_hint_y=None)
+        self.disk_list = GridLayout(cols=5, spacing=10, size_hint_y=None)
         self.disk_list.bind(minimum_height=self.disk_list.setter("height"))
         scroll.add_widget(self.disk_list)
         disk_container.add_widget(scroll)
@@ -937,11 +1602,15 @@ class DiskManagementScreen(Screen):
         self.back_btn.bind(on_press=self.go_back)
         self.layout.add_widget(self.back_btn)
 
+        self.disk_index = None
+        self.info_labels = {}
+
     def on_enter(self):
         self.update_disk_list()
 
     def update_disk_list(self):
         self.disk_list.clear_widgets()
+        self.info_labels = {}
 
         # Get the disk directory
         disk_dir = get_disk_directory()
@@ -971,11 +1640,7 @@ class DiskManagementScreen(Screen):
             return
 
         # Find all disk files
-        disk_files = [
-            f
-            for f in os.listdir(disk_dir)
-            if f.endswith((".qcow2", ".raw", ".vmdk", ".vhdx"))
-        ]
+        disk_files = list_disk_files(disk_dir)
         print(f"Found disk files: {disk_files}")  # Debug print
 
         if not disk_files:
@@ -989,24 +1654,67 @@ class DiskManagementScreen(Screen):
             )
             return
 
+        metadata = load_disk_metadata(disk_dir)
+        disk_index = self.get_disk_index(disk_dir)
+
         for disk_file in disk_files:
             disk_name = os.path.splitext(disk_file)[0]
             disk_path = os.path.join(disk_dir, disk_file)
             disk_format = os.path.splitext(disk_file)[1][1:]  # Remove the dot
 
             # Add disk info to the list
-            self.disk_list.add_widget(
-                Label(text=disk_name, size_hint_y=None, height=50)
+            name_label = Label(text=disk_name, size_hint_y=None, height=50)
+            self.disk_list.add_widget(name_label)
+            format_text = disk_format.upper()
+            profile = metadata.get(disk_file, {}).get("profile")
+            if profile and profile != "default":
+                format_text += f" ({profile})"
+            format_label = Label(text=format_text, size_hint_y=None, height=50)
+            self.disk_list.add_widget(format_label)
+
+            # Sizes come from the disk index, filled in below
+            virtual_label = Label(text="...", size_hint_y=None, height=50)
+            self.disk_list.add_widget(virtual_label)
+            allocated_label = Label(text="...", size_hint_y=None, height=50)
+            self.disk_list.add_widget(allocated_label)
+            self.info_labels[disk_file] = (
+                disk_name, format_text, name_label, format_label, virtual_label, allocated_label
             )
-            self.disk_list.add_widget(
-                Label(text=disk_format.upper(), size_hint_y=None, height=50)
+            cached = disk_index.cached(disk_file)
+            if cached:
+                self.show_disk_info(disk_file, cached)
+
+            actions = BoxLayout(orientation="horizontal", spacing=5, size_hint_y=None, height=50)
+
+            # Clone button
+            clone_btn = Button(text="Clone", background_color=(0.3, 0.7, 1, 1))
+            clone_btn.bind(
+                on_press=lambda x, path=disk_path, fmt=disk_format: self.clone_disk(path, fmt)
             )
+            actions.add_widget(clone_btn)
+
+            # Backing chain button
+            chain_btn = Button(text="Chain", background_color=(0.3, 0.7, 1, 1))
+            chain_btn.bind(on_press=lambda x, path=disk_path: self.show_backing_chain(path))
+            actions.add_widget(chain_btn)
+
+            # Convert and compact buttons
+            convert_btn = Button(text="Convert", background_color=(0.3, 0.7, 1, 1))
+            convert_btn.bind(
+                on_press=lambda x, path=disk_path, fmt=disk_format: self.convert_disk(path, fmt)
+            )
+            actions.add_widget(convert_btn)
+            compact_btn = Button(text="Compact", background_color=(0.3, 0.7, 1, 1))
+            compact_btn.bind(
+                on_press=lambda x, path=disk_path, fmt=disk_format: self.convert_disk(
+                    path, fmt, compact=True
+                )
+            )
+            actions.add_widget(compact_btn)
 
             # Delete button
             delete_btn = Button(
                 text="Delete",
-                size_hint_y=None,
-                height=50,
                 background_color=(1, 0.3, 0.3, 1),
             )
             delete_btn.bind(
@@ -1014,12 +1722,409 @@ class DiskManagementScreen(Screen):
                     path, name
                 )
             )
-            self.disk_list.add_widget(delete_btn)
+            actions.add_widget(delete_btn)
+            self.disk_list.add_widget(actions)
+
+        # Disks still being written by a job are left for the next refresh
+        indexed = [f for f in disk_files if not disk_jobs.is_busy(os.path.join(disk_dir, f))]
+
+        def refresh_index():
+            results = disk_index.refresh(indexed)
+            Clock.schedule_once(lambda dt: self.show_index_results(results), 0)
+
+        threading.Thread(target=refresh_index, daemon=True).start()
+
+    def get_disk_index(self, disk_dir):
+        if self.disk_index is None or self.disk_index.disk_dir != disk_dir:
+            self.disk_index = DiskIndex(disk_dir)
+        return self.disk_index
+
+    def show_index_results(self, results):
+        for disk_file, info in results.items():
+            self.show_disk_info(disk_file, info)
+
+    def show_disk_info(self, disk_file, info):
+        """Fill in a disk row from its qemu-img info"""
+        labels = self.info_labels.get(disk_file)
+        if labels is None:
+            return
+        disk_name, format_text, name_label, format_label, virtual_label, allocated_label = labels
+
+        if info.get("backing"):
+            name_label.text = f"{disk_name}\n<- {os.path.basename(info['backing'])}"
+        if info.get("corrupt"):
+            format_label.text = f"{format_text}\ncorrupt"
+            format_label.color = (1, 0.3, 0.3, 1)
+        elif info.get("dirty"):
+            format_label.text = f"{format_text}\ndirty"
+            format_label.color = (1, 0.7, 0.3, 1)
+
+        virtual_size = info.get("virtual_size", 0)
+        actual_size = info.get("actual_size", 0)
+        virtual_label.text = format_disk_size(virtual_size)
+        allocated_text = format_disk_size(actual_size)
+        if virtual_size:
+            allocated_text += f" ({actual_size * 100 / virtual_size:.0f}%)"
+        allocated_label.text = allocated_text
+        # Highlight images that take more space than their virtual size
+        if actual_size > virtual_size:
+            allocated_label.color = (1, 0.7, 0.3, 1)
+
+    def clone_disk(self, base_path, base_format):
+        """Create copy-on-write qcow2 overlays on top of a base disk"""
+        base_name = os.path.splitext(os.path.basename(base_path))[0]
+
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        content.add_widget(
+            Label(text=f"Linked clones share {base_name} and only store their own changes.\nDo not modify the base disk while clones use it.")
+        )
+        name_input = TextInput(
+            text=f"{base_name}-clone", hint_text="Clone name", multiline=False, size_hint_y=None, height=40
+        )
+        content.add_widget(name_input)
+        count_input = TextInput(
+            text="1", hint_text="Number of clones", multiline=False, size_hint_y=None, height=40
+        )
+        content.add_widget(count_input)
+
+        btn_layout = BoxLayout(
+            orientation="horizontal", spacing=10, size_hint_y=None, height=50
+        )
+        cancel_btn = Button(text="Cancel")
+        create_btn = Button(text="Create Clones", background_color=(0.3, 0.7, 1, 1))
+        btn_layout.add_widget(cancel_btn)
+        btn_layout.add_widget(create_btn)
+        content.add_widget(btn_layout)
+
+        popup = Popup(title=f"Clone {base_name}", content=content, size_hint=(0.7, 0.5))
+
+        def do_clone(instance):
+            clone_name = name_input.text.strip()
+            try:
+                count = int(count_input.text.strip())
+                if count <= 0:
+                    raise ValueError
+            except ValueError:
+                self.show_error("Please enter a valid number of clones")
+                return
+            if not clone_name:
+                self.show_error("Please enter a clone name")
+                return
+
+            disk_dir = os.path.dirname(base_path)
+            names = [clone_name] if count == 1 else [f"{clone_name}-{i + 1}" for i in range(count)]
+            clone_paths = [os.path.join(disk_dir, f"{name}.qcow2") for name in names]
+            taken = [p for p in clone_paths if os.path.exists(p) or disk_jobs.is_busy(p)]
+            if taken:
+                self.show_error(f"Disk {os.path.basename(taken[0])} already exists")
+                return
+
+            def on_done(job):
+                if job.status == "done":
+                    record_disk(
+                        disk_dir,
+                        os.path.basename(job.target),
+                        {
+                            "format": "qcow2",
+                            "profile": "linked clone",
+                            "backing": os.path.basename(base_path),
+                            "created": time.time(),
+                        },
+                    )
+                    if self.manager is not None and self.manager.current == self.name:
+                        self.update_disk_list()
+                    vm_screen = self.manager.get_screen("vm")
+                    vm_screen.disk_selection.values = vm_screen.get_available_disks()
+
+            for clone_path in clone_paths:
+                disk_jobs.submit(
+                    DiskJob(
+                        "clone",
+                        clone_path,
+                        clone_create_command(base_path, base_format, clone_path),
+                        on_done=on_done,
+                    )
+                )
+            popup.dismiss()
+            self.show_success(f"Creating {count} linked clones of {base_name}")
+
+        cancel_btn.bind(on_press=lambda x: popup.dismiss())
+        create_btn.bind(on_press=do_clone)
+        popup.open()
+
+    def show_backing_chain(self, disk_path):
+        """Show the chain of backing files under a disk"""
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        chain_label = Label(text="Reading backing chain...", halign="left", valign="top")
+        chain_label.bind(size=chain_label.setter("text_size"))
+        scroll = ScrollView()
+        scroll.add_widget(chain_label)
+        content.add_widget(scroll)
+        close_btn = Button(text="Close", size_hint_y=None, height=50)
+        content.add_widget(close_btn)
+
+        popup = Popup(
+            title=f"Backing chain - {os.path.basename(disk_path)}",
+            content=content,
+            size_hint=(0.8, 0.7),
+        )
+        close_btn.bind(on_press=lambda x: popup.dismiss())
+
+        def show_chain(chain, clones):
+            lines = []
+            for depth, image in enumerate(chain):
+                prefix = "  " * depth + ("-> " if depth else "")
+                lines.append(
+                    f"{prefix}{os.path.basename(image.get('filename', '?'))} "
+                    f"[{image.get('format', '?')}] "
+                    f"virtual {image.get('virtual-size', 0) / 1024 ** 3:.1f} GB, "
+                    f"allocated {image.get('actual-size', 0) / 1024 ** 3:.2f} GB"
+                )
+            if clones:
+                lines.append("")
+                lines.append(f"Linked clones using this disk: {', '.join(clones)}")
+            chain_label.text = "\n".join(lines)
+            chain_label.texture_update()
+            chain_label.size_hint_y = None
+            chain_label.height = max(chain_label.texture_size[1], scroll.height)
+
+        def read_chain():
+            try:
+                chain = qemu_img_info(disk_path, backing_chain=True)
+                clones = find_disk_clones(disk_index, os.path.basename(disk_path))
+                Clock.schedule_once(lambda dt: show_chain(chain, clones), 0)
+            except Exception as e:
+                message = f"Failed to read backing chain: {str(e)}"
+                Clock.schedule_once(lambda dt: setattr(chain_label, "text", message), 0)
+
+        disk_index = self.get_disk_index(os.path.dirname(disk_path))
+        threading.Thread(target=read_chain, daemon=True).start()
+        popup.open()
+
+    def convert_disk(self, disk_path, disk_format, compact=False):
+        """Rewrite a disk in another format, or compact it in place"""
+        disk_dir = os.path.dirname(disk_path)
+        disk_file = os.path.basename(disk_path)
+        disk_name = os.path.splitext(disk_file)[0]
+
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        if compact:
+            text = f"Rewrite {disk_file} without its unused and zeroed clusters.\nStop any VM using this disk first."
+        else:
+            text = f"Copy {disk_file} to a new disk.\nLinked clones are flattened into a standalone disk."
+        content.add_widget(Label(text=text))
+
+        target_format = Spinner(
+            text=f"format: {disk_format}",
+            values=[f"format: {f}" for f in DISK_FORMATS],
+            size_hint_y=None,
+            height=40,
+            disabled=compact,
+        )
+        content.add_widget(target_format)
+        name_input = TextInput(
+            text=disk_name, hint_text="New disk name", multiline=False, size_hint_y=None, height=40
+        )
+        if not compact:
+            content.add_widget(name_input)
+
+        options = BoxLayout(orientation="horizontal", spacing=10, size_hint_y=None, height=40)
+        compress = Spinner(text="compress: off", values=["compress: off", "compress: on"])
+        coroutines = Spinner(
+            text="coroutines: 8", values=[f"coroutines: {c}" for c in CONVERT_COROUTINES]
+        )
+        out_of_order = Spinner(
+            text="out_of_order: off", values=["out_of_order: off", "out_of_order: on"]
+        )
+        for spinner in (compress, coroutines, out_of_order):
+            options.add_widget(spinner)
+        content.add_widget(options)
+
+        btn_layout = BoxLayout(
+            orientation="horizontal", spacing=10, size_hint_y=None, height=50
+        )
+        cancel_btn = Button(text="Cancel")
+        start_btn = Button(
+            text="Compact" if compact else "Convert", background_color=(0.3, 0.7, 1, 1)
+        )
+        btn_layout.add_widget(cancel_btn)
+        btn_layout.add_widget(start_btn)
+        content.add_widget(btn_layout)
+
+        popup = Popup(
+            title=f"{'Compact' if compact else 'Convert'} {disk_file}",
+            content=content,
+            size_hint=(0.7, 0.6),
+        )
+
+        def do_convert(instance):
+            dst_format = target_format.text.split(": ", 1)[1]
+            use_compress = compress.text.endswith("on")
+            use_out_of_order = out_of_order.text.endswith("on")
+            if use_compress and dst_format != "qcow2":
+                self.show_error("Compression is only supported for qcow2")
+                return
+            if use_compress and use_out_of_order:
+                # qemu-img refuses -c together with -W
+                self.show_error("Compression and out-of-order writes\ncannot be combined")
+                return
+            if disk_jobs.is_busy(disk_path):
+                self.show_error(f"A job is still writing {disk_file}")
+                return
+
+            if compact:
+                # Written next to the disk and swapped in once complete
+                dst_path = f"{disk_path}.compact"
+            else:
+                dst_name = name_input.text.strip()
+                if not dst_name:
+                    self.show_error("Please enter a disk name")
+                    return
+                dst_path = os.path.join(disk_dir, f"{dst_name}.{dst_format}")
+                if dst_path == disk_path:
+                    self.show_error("Use Compact to rewrite a disk in place")
+                    return
+            if os.path.exists(dst_path) or disk_jobs.is_busy(dst_path):
+                self.show_error(f"Disk {os.path.basename(dst_path)} already exists")
+                return
+
+            def submit_job(backing=None, backing_format=None, options=None):
+                before = allocated_size(disk_path)
+
+                def on_done(job):
+                    if job.status == "failed":
+                        self.show_error(f"{job.kind.capitalize()} failed: {job.message}")
+                        return
+                    if job.status != "done":
+                        return
+                    try:
+                        if compact:
+                            os.replace(dst_path, disk_path)
+                            info = load_disk_metadata(disk_dir).get(disk_file, {})
+                            info["compacted"] = time.time()
+                            recorded = info.get("options") or {}
+                            if any(options.get(key) != value for key, value in recorded.items()):
+                                # Compression dropped an option the profile set
+                                info["options"] = {k: v for k, v in recorded.items() if k in options}
+                                info["profile"] = "compressed" if use_compress else "custom"
+                            record_disk(disk_dir, disk_file, info)
+                            report = size_report(disk_file, before, allocated_size(disk_path))
+                        else:
+                            record_disk(
+                                disk_dir,
+                                os.path.basename(dst_path),
+                                {
+                                    "format": dst_format,
+                                    "profile": "compressed" if use_compress else "converted",
+                                    "converted_from": disk_file,
+                                    "created": time.time(),
+                                },
+                            )
+                            report = size_report(
+                                os.path.basename(dst_path), before, allocated_size(dst_path)
+                            )
+                    except OSError as e:
+                        self.show_error(f"Failed to finish {job.kind}: {str(e)}")
+                        return
+                    job.message = report.replace("\n", ", ")
+                    self.show_success(report)
+                    if self.manager is not None and self.manager.current == self.name:
+                        self.update_disk_list()
+                    vm_screen = self.manager.get_screen("vm")
+                    vm_screen.disk_selection.values = vm_screen.get_available_disks()
+
+                command = disk_convert_command(
+                    disk_path,
+                    disk_format,
+                    dst_path,
+                    dst_format,
+                    compress=use_compress,
+                    coroutines=coroutines.text.split(": ", 1)[1],
+                    out_of_order=use_out_of_order,
+                    backing=backing,
+                    backing_format=backing_format,
+                    options=options,
+                )
+                disk_jobs.submit(
+                    DiskJob("compact" if compact else "convert", dst_path, command, on_done=on_done)
+                )
+                popup.dismiss()
+
+            if not compact:
+                submit_job()
+                return
+
+            # A base must not be rewritten under its clones, and a clone must
+            # keep its backing file. Both need qemu-img, so they are read off
+            # the UI thread, and the compact is refused if they can't be
+            disk_index = self.get_disk_index(disk_dir)
+            start_btn.disabled = True
+
+            def inspect():
+                try:
+                    result = (find_disk_clones(disk_index, disk_file), qemu_img_info(disk_path), None)
+                except (OSError, RuntimeError, ValueError) as e:
+                    result = ([], None, str(e))
+                Clock.schedule_once(lambda dt: on_inspected(*result), 0)
+
+            def on_inspected(clones, info, error):
+                start_btn.disabled = False
+                if error is not None:
+                    self.show_error(f"Cannot compact {disk_file}:\n{error}")
+                    return
+                if clones:
+                    self.show_error(
+                        f"{disk_file} is the base of\n{', '.join(clones[:5])}\nIt cannot be compacted while clones use it"
+                    )
+                    return
+
+                recorded = load_disk_metadata(disk_dir).get(disk_file, {}).get("options")
+                options = disk_rewrite_options(disk_format, info, recorded)
+                if options.get("subformat") in VMDK_FLAT_SUBFORMATS:
+                    self.show_error(f"{disk_file} keeps its data in\nseparate extent files and\ncannot be compacted in place")
+                    return
+                if use_compress:
+                    # qemu-img cannot preallocate compressed clusters
+                    options.pop("preallocation", None)
+                submit_job(info.get("backing-filename"), info.get("backing-filename-format"), options)
+
+            threading.Thread(target=inspect, daemon=True).start()
+
+        cancel_btn.bind(on_press=lambda x: popup.dismiss())
+        start_btn.bind(on_press=do_convert)
+        popup.open()
 
     def delete_disk(self, disk_path, disk_name):
+        if disk_jobs.is_busy(disk_path) or disk_jobs.is_busy(f"{disk_path}.compact"):
+            self.show_error(f"A job is still running on {disk_name}")
+            return
+
+        # A base disk can't go while linked clones still read from it. The
+        # check may run qemu-img on every disk, so it happens off the UI thread
+        disk_index = self.get_disk_index(os.path.dirname(disk_path))
+
+        def check_clones():
+            try:
+                clones = find_disk_clones(disk_index, os.path.basename(disk_path))
+            except OSError:
+                clones = []
+            Clock.schedule_once(lambda dt: self.confirm_delete(disk_path, disk_name, clones), 0)
+
+        threading.Thread(target=check_clones, daemon=True).start()
+
+    def confirm_delete(self, disk_path, disk_name, clones):
+        if clones:
+            self.show_error(f"{disk_name} is the base of\n{', '.join(clones[:5])}\nDelete the clones first")
+            return
+
         def confirm_delete(instance):
             try:
                 os.remove(disk_path)
+                # Flat vmdk disks keep their data in a separate extent
+                extent_path = disk_path[: -len(".vmdk")] + "-flat.vmdk"
+                if disk_path.endswith(".vmdk") and os.path.exists(extent_path):
+                    os.remove(extent_path)
+                forget_disk(os.path.dirname(disk_path), os.path.basename(disk_path))
                 self.show_success(f"Disk {disk_name} deleted successfully")
                 self.update_disk_list()
 